@@ -1,106 +1,196 @@
-import logging
+import asyncio
 import json
+import logging
+import multiprocessing.util
+import os
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import Annotated
+from typing import Annotated, NamedTuple, Optional
 
 from dotenv import load_dotenv
 from livekit.agents import (
     Agent,
     AgentSession,
     JobContext,
+    JobExecutorType,
     JobProcess,
     MetricsCollectedEvent,
     RoomInputOptions,
     WorkerOptions,
     cli,
+    llm,
     metrics,
-    tokenize,
     function_tool,
     RunContext
 )
 from livekit.plugins import silero, google, deepgram, noise_cancellation
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
 import murf_tts
+import pipeline_metrics
+from pipeline_metrics import timed_tool
+from text_chunker import AdaptiveChunker
+from tts_cache import AudioCache, CacheablePhrases
+from faq_context import build_faq_context
+from faq_search import build_entries
+from faq_source import FAQRegistry, FAQSnapshot, FAQSource
+from lead_checkpoint import CheckpointDirectory, LeadCheckpointer, recover_orphans
+from lead_store import Lead, LeadStore, LeadWriter, migrate_legacy, open_lead_store
 
 logger = logging.getLogger("sdr_agent")
 
 load_dotenv(".env.local")
 
-# Load company FAQ
+# Company FAQ, parsed and indexed once per process. prewarm starts a watcher
+# that rebuilds it in the background when the file changes (every
+# FAQ_RELOAD_INTERVAL seconds, 0 disables); each call keeps the snapshot it
+# started with. FAQ_FUZZY_THRESHOLD tunes how aggressively misheard words are
+# corrected, and FAQ_SEARCH_MODE=semantic adds a local vector index whose
+# matrix is cached next to the FAQ file and shared across workers. The last
+# FAQ_QUERY_CACHE_SIZE distinct (normalized) queries are memoized per FAQ.
 COMPANY_FAQ_FILE = Path("../shared-data/day5_company_faq.json")
-company_data = {}
-if COMPANY_FAQ_FILE.exists():
-    with open(COMPANY_FAQ_FILE, "r") as f:
-        company_data = json.load(f)
-        logger.info(f"Loaded company data for {company_data.get('company', {}).get('name', 'Unknown')}")
-else:
-    logger.warning(f"Company FAQ file not found: {COMPANY_FAQ_FILE}")
-
-# Lead storage
-LEADS_FILE = Path("../shared-data/leads.json")
-lead_data = {
-    "name": None,
-    "company": None,
-    "email": None,
-    "role": None,
-    "use_case": None,
-    "team_size": None,
-    "timeline": None,
-    "questions_asked": [],
-    "conversation_summary": None,
-    "timestamp": None
-}
-
-
-def save_lead():
-    """Save the current lead data to JSON file"""
-    lead_data["timestamp"] = datetime.now().isoformat()
-    
-    # Load existing leads
-    leads = []
-    if LEADS_FILE.exists():
-        with open(LEADS_FILE, "r") as f:
-            try:
-                leads = json.load(f)
-            except:
-                leads = []
-    
-    # Add new lead
-    leads.append(lead_data.copy())
-    
-    # Save back
-    with open(LEADS_FILE, "w") as f:
-        json.dump(leads, f, indent=2)
-    
-    logger.info(f"Lead saved: {lead_data.get('name')} from {lead_data.get('company')}")
+FAQ_FUZZY_THRESHOLD = float(os.environ.get("FAQ_FUZZY_THRESHOLD", "0.4"))
+FAQ_SEARCH_MODE = os.environ.get("FAQ_SEARCH_MODE", "keyword")
+FAQ_RELOAD_INTERVAL = float(os.environ.get("FAQ_RELOAD_INTERVAL", "5"))
+FAQ_QUERY_CACHE_SIZE = int(os.environ.get("FAQ_QUERY_CACHE_SIZE", "1024"))
+faq_source = FAQSource(
+    COMPANY_FAQ_FILE,
+    semantic=FAQ_SEARCH_MODE == "semantic",
+    fuzzy_threshold=FAQ_FUZZY_THRESHOLD,
+    query_cache_size=FAQ_QUERY_CACHE_SIZE,
+)
 
+# Multi-tenant FAQs: a job whose metadata carries {"tenant": "<id>"} answers
+# from FAQ_TENANTS_DIR/<id>.json instead. Tenants load on first use, are
+# shared by all calls in the process and are evicted least-recently-used
+# beyond FAQ_CACHE_MB of estimated memory.
+FAQ_TENANTS_DIR = Path(os.environ.get("FAQ_TENANTS_DIR", "../shared-data/tenants"))
+FAQ_CACHE_MB = float(os.environ.get("FAQ_CACHE_MB", "256"))
+faq_registry = FAQRegistry(
+    FAQ_TENANTS_DIR,
+    faq_source,
+    max_bytes=int(FAQ_CACHE_MB * 1024 * 1024),
+    semantic=FAQ_SEARCH_MODE == "semantic",
+    fuzzy_threshold=FAQ_FUZZY_THRESHOLD,
+    query_cache_size=FAQ_QUERY_CACHE_SIZE,
+)
 
-def search_faq(query: str) -> str:
-    """Simple keyword search in FAQ"""
-    query_lower = query.lower()
-    
-    # Search in FAQ
-    for faq_item in company_data.get("faq", []):
-        question = faq_item["question"].lower()
-        answer = faq_item["answer"]
-        
-        # Simple keyword matching
-        if any(word in question for word in query_lower.split()):
-            return answer
-    
-    # Search in products
-    for product in company_data.get("products", []):
-        if any(word in product["name"].lower() for word in query_lower.split()):
-            return f"{product['name']}: {product['description']} Best for: {product['use_case']}"
-    
-    return None
+# When the user asks a question, the FAQ entries most relevant to it (up to
+# FAQ_CONTEXT_TOP_K, within FAQ_CONTEXT_TOKENS) are added to that turn's LLM
+# context, so most questions are answered without a search_faq round trip. An
+# entry must contain FAQ_CONTEXT_MIN_COVERAGE of the question's keywords.
+# FAQ_CONTEXT_TOKENS=0 disables it.
+FAQ_CONTEXT_TOP_K = int(os.environ.get("FAQ_CONTEXT_TOP_K", "3"))
+FAQ_CONTEXT_TOKENS = int(os.environ.get("FAQ_CONTEXT_TOKENS", "300"))
+FAQ_CONTEXT_MIN_COVERAGE = float(os.environ.get("FAQ_CONTEXT_MIN_COVERAGE", "0.3"))
+
+# Lead storage: LEAD_STORE=jsonl (default) appends to a log, LEAD_STORE=sqlite
+# uses an indexed database. Either exports to the legacy JSON array with
+# `python src/lead_store.py export`. LEADS_FSYNC_EVERY batches log fsyncs.
+# Partial leads are checkpointed to LEAD_CHECKPOINT_DIR during calls
+# (LEAD_CHECKPOINT_DELAY seconds after a change, coalescing bursts) and saved
+# when the call ends; ones left behind by a crashed worker are recovered when
+# the storage is opened. Nothing is opened at import: prewarm (or the first
+# call) does it, so importing this module never touches shared-data.
+LEADS_DIR = Path("../shared-data")
+LEAD_STORE_BACKEND = os.environ.get("LEAD_STORE", "jsonl")
+LEADS_FSYNC_EVERY = int(os.environ.get("LEADS_FSYNC_EVERY", "1"))
+LEAD_CHECKPOINT_DIR = Path(os.environ.get("LEAD_CHECKPOINT_DIR", "../shared-data/lead_checkpoints"))
+LEAD_CHECKPOINT_DELAY = float(os.environ.get("LEAD_CHECKPOINT_DELAY", "1.0"))
+
+
+class LeadStorage(NamedTuple):
+    store: LeadStore
+    # Writes happen on a background thread so tools never block on disk I/O
+    writer: LeadWriter
+    checkpoints: CheckpointDirectory
+
+
+def open_lead_storage(directory: Path = LEADS_DIR, *, checkpoint_dir: Optional[Path] = None) -> LeadStorage:
+    """
+    Open the lead store in a directory, migrating a legacy leads.json and
+    saving leads checkpointed by crashed workers.
+
+    Args:
+        directory: Holds leads.jsonl or leads.db (per LEAD_STORE) and any legacy leads.json
+        checkpoint_dir: Where calls checkpoint partial leads, defaults to directory/lead_checkpoints
+    """
+    directory = Path(directory)
+    if LEAD_STORE_BACKEND == "sqlite":
+        store = open_lead_store("sqlite", path=directory / "leads.db")
+    else:
+        store = open_lead_store("jsonl", path=directory / "leads.jsonl", fsync_every=LEADS_FSYNC_EVERY)
+    migrate_legacy(directory / "leads.json", store)
+    checkpoints = CheckpointDirectory(checkpoint_dir or directory / "lead_checkpoints")
+    recover_orphans(checkpoints, store)
+    return LeadStorage(store, LeadWriter(store), checkpoints)
+
+
+lead_storage: Optional[LeadStorage] = None
+_lead_storage_lock = threading.Lock()
+
+
+def get_lead_storage() -> LeadStorage:
+    """The process's lead storage, opened on first use and closed when the process exits"""
+    global lead_storage
+    with _lead_storage_lock:
+        if lead_storage is None:
+            lead_storage = open_lead_storage(LEADS_DIR, checkpoint_dir=LEAD_CHECKPOINT_DIR)
+            # Job processes end through multiprocessing, which skips atexit but runs its
+            # finalizers; closing flushes the writer and saves the JSONL offset index
+            multiprocessing.util.Finalize(None, lead_storage.writer.close, exitpriority=10)
+        return lead_storage
+
+
+# Synthesized phrases are cached per worker process (memory) and on disk, so
+# repeated acknowledgements and FAQ answers skip the Murf round-trip. Only
+# sentences found in those known phrases are cached, never free-form replies
+# that may carry a caller's details; the disk tier is capped at
+# MURF_TTS_CACHE_DISK_MB, evicting the least recently used audio.
+tts_cache = AudioCache(
+    Path(os.environ.get("MURF_TTS_CACHE_DIR", ".tts_cache")),
+    max_memory_bytes=int(os.environ.get("MURF_TTS_CACHE_MB", "64")) * 1024 * 1024,
+    max_disk_bytes=int(os.environ.get("MURF_TTS_CACHE_DISK_MB", "256")) * 1024 * 1024,
+)
+
+# MURF_PREWARM_TTS=1 pre-synthesizes FAQ answers and fixed tool responses into
+# the cache when a worker process starts
+PREWARM_TTS = os.environ.get("MURF_PREWARM_TTS") == "1"
+PREWARM_TTS_CONCURRENCY = int(os.environ.get("MURF_PREWARM_CONCURRENCY", "4"))
+
+# Each worker process serves Prometheus histograms on METRICS_PORT (or the
+# next free port); set METRICS_PORT to an empty value to disable
+METRICS_PORT = os.environ.get("METRICS_PORT", "9464")
+metrics_server = None
+
+LEAD_NOTED_RESPONSE = "Got it, I've noted that down."
+LEAD_REJECTED_RESPONSE = "I couldn't store that information."
+# Played from the TTS cache while Murf is unavailable
+TTS_FILLER_RESPONSE = "Sorry, I'm having a little trouble with my connection. Could you give me a moment?"
+
+
+def save_lead(lead: Lead):
+    """Queue a session's lead for the background lead writer"""
+    lead.timestamp = datetime.now().isoformat()
+    get_lead_storage().writer.submit(lead.to_dict())
+    lead.mark_saved()
+    logger.info(f"Lead saved: {lead.name} from {lead.company}")
+
+
+def search_faq(query: str, snapshot: Optional[FAQSnapshot] = None) -> Optional[str]:
+    """Return the best-ranked FAQ answer for a query, or None if nothing matches"""
+    results = (snapshot or faq_source.snapshot).search(query, top_k=1)
+    if not results:
+        return None
+    return results[0][0].answer
 
 
 class SDRAgent(Agent):
-    def __init__(self) -> None:
-        company_name = company_data.get("company", {}).get("name", "our company")
-        company_desc = company_data.get("company", {}).get("description", "")
+    def __init__(self, faq: Optional[FAQSnapshot] = None) -> None:
+        # Pin the FAQ for this call so a reload mid-call can't change its answers
+        self._faq = faq or faq_source.snapshot
+        company_name = self._faq.company_name
+        company_desc = self._faq.company_description
         
         super().__init__(
             instructions=f"""You are a friendly and professional Sales Development Representative (SDR) for {company_name}.
@@ -134,14 +224,15 @@ CONVERSATION STYLE:
 - When you don't know something, be honest and offer to find out
 
 IMPORTANT:
-- Use the search_faq tool when they ask about products, pricing, or features
+- When they ask about products, pricing, or features, answer from the FAQ excerpts provided with their message; use the search_faq tool only when those don't cover the question
 - Use the collect_lead_info tool to store information as you learn it
 - Use the end_call_summary tool when they say they're done or ready to leave
 - Don't make up information - only use what's in the FAQ""",
         )
     
     @function_tool
-    async def search_faq(self, context: RunContext, query: Annotated[str, "The user's question about the company, product, or pricing"]):
+    @timed_tool("search_faq")
+    async def search_faq(self, context: RunContext[Lead], query: Annotated[str, "The user's question about the company, product, or pricing"]):
         """Search the company FAQ for answers to user questions.
         
         Args:
@@ -150,21 +241,38 @@ IMPORTANT:
         logger.info(f"Searching FAQ for: {query}")
         
         # Track questions asked
-        if query not in lead_data["questions_asked"]:
-            lead_data["questions_asked"].append(query)
+        context.userdata.add_question(query)
         
-        answer = search_faq(query)
+        answer = search_faq(query, self._faq)
         
         if answer:
             return f"Based on our FAQ: {answer}"
         else:
             # Return general company info
-            return f"I don't have specific information about that in my FAQ. Let me tell you generally: {company_data.get('company', {}).get('description', 'We provide payment solutions for businesses.')}"
+            return f"I don't have specific information about that in my FAQ. Let me tell you generally: {self._faq.company_description or 'We provide payment solutions for businesses.'}"
+
+    async def on_user_turn_completed(self, turn_ctx: llm.ChatContext, new_message: llm.ChatMessage) -> None:
+        """Add the FAQ excerpts relevant to the user's question to this turn's context"""
+        query = new_message.text_content or ""
+        context = build_faq_context(
+            self._faq,
+            query,
+            top_k=FAQ_CONTEXT_TOP_K,
+            max_tokens=FAQ_CONTEXT_TOKENS,
+            min_coverage=FAQ_CONTEXT_MIN_COVERAGE,
+        )
+        if context is None:
+            return
+        # turn_ctx is a per-turn copy, so the excerpts never pile up in the history
+        turn_ctx.add_message(role="system", content=context)
+        # Only questions get excerpts; answered without search_faq, so track the question here
+        self.session.userdata.add_question(query)
     
     @function_tool
+    @timed_tool("collect_lead_info")
     async def collect_lead_info(
         self, 
-        context: RunContext,
+        context: RunContext[Lead],
         field: Annotated[str, "The field name: 'name', 'company', 'email', 'role', 'use_case', 'team_size', or 'timeline'"],
         value: Annotated[str, "The value to store"]
     ):
@@ -174,59 +282,127 @@ IMPORTANT:
             field: Which field to update
             value: The value to store
         """
-        if field in lead_data:
-            lead_data[field] = value
+        if context.userdata.set_field(field, value):
             logger.info(f"Collected lead info: {field} = {value}")
-            return f"Got it, I've noted that down."
+            return LEAD_NOTED_RESPONSE
         else:
-            return "I couldn't store that information."
+            return LEAD_REJECTED_RESPONSE
     
     @function_tool
-    async def end_call_summary(self, context: RunContext, summary: Annotated[str, "A brief summary of the conversation and the lead's needs"]):
+    @timed_tool("end_call_summary")
+    async def end_call_summary(self, context: RunContext[Lead], summary: Annotated[str, "A brief summary of the conversation and the lead's needs"]):
         """End the call and provide a summary of the lead.
         
         Args:
             summary: Brief summary of the conversation
         """
-        lead_data["conversation_summary"] = summary
-        save_lead()
+        lead = context.userdata
+        lead.conversation_summary = summary
+        save_lead(lead)
         
         # Create verbal summary
-        name = lead_data.get("name", "there")
-        company = lead_data.get("company", "your company")
-        use_case = lead_data.get("use_case", "your needs")
-        timeline = lead_data.get("timeline", "soon")
+        name = lead.name or "there"
+        company = lead.company or "your company"
+        use_case = lead.use_case or "your needs"
+        timeline = lead.timeline or "soon"
         
         return f"Thank you so much for your time, {name}! I've captured all the details about {company} and your interest in using our solution for {use_case}. Based on our conversation, it sounds like you're looking to move forward {timeline}. I'll make sure our team follows up with you shortly. Have a great day!"
 
 
+def create_tts(faq: Optional[FAQSnapshot] = None) -> murf_tts.TTS:
+    """Create the Murf TTS used for calls (and for prewarming its cache), caching phrases of the call's FAQ"""
+    return murf_tts.TTS(
+        voice="en-US-ryan",
+        style="Conversational",
+        base_url=os.environ.get("MURF_API_URL", murf_tts.MURF_API_URL),
+        tokenizer=AdaptiveChunker(
+            first_chunk_chars=int(os.environ.get("MURF_TTS_FIRST_CHUNK_CHARS", "60")),
+            target_chunk_chars=int(os.environ.get("MURF_TTS_TARGET_CHUNK_CHARS", "150")),
+            max_chunk_chars=int(os.environ.get("MURF_TTS_MAX_CHUNK_CHARS", "300")),
+        ),
+        cache=tts_cache,
+        cacheable=CacheablePhrases(prewarm_phrases((faq or faq_source.snapshot).company_data)),
+        lookahead=int(os.environ.get("MURF_TTS_LOOKAHEAD", "2")),
+        hedge_after=float(os.environ.get("MURF_TTS_HEDGE_AFTER", "2.0")),
+        max_retries=int(os.environ.get("MURF_TTS_MAX_RETRIES", "2")),
+        filler_text=TTS_FILLER_RESPONSE,
+        audio_format=os.environ.get("MURF_TTS_FORMAT", "WAV"),
+    )
+
+
+def prewarm_phrases(data: dict) -> list[str]:
+    """Phrases likely to be spoken verbatim: FAQ answers, product blurbs and fixed tool responses (the TTS caches its filler itself)"""
+    phrases = [LEAD_NOTED_RESPONSE, LEAD_REJECTED_RESPONSE]
+    phrases.extend(entry.answer for entry, _ in build_entries(data))
+    return phrases
+
+
+def presynthesize_in_background():
+    """Fill the TTS cache on a background thread so process startup isn't delayed"""
+
+    async def _presynthesize():
+        tts_instance = create_tts()
+        try:
+            await tts_instance.presynthesize(prewarm_phrases(faq_source.snapshot.company_data), max_concurrency=PREWARM_TTS_CONCURRENCY)
+        finally:
+            await tts_instance.aclose()
+
+    def _run():
+        try:
+            asyncio.run(_presynthesize())
+        except Exception as e:
+            logger.warning(f"TTS prewarm failed: {e}")
+
+    threading.Thread(target=_run, name="tts-prewarm", daemon=True).start()
+
+
 def prewarm(proc: JobProcess):
-    """Prewarm the VAD model"""
+    """Prewarm the VAD model, open the lead store, start the metrics endpoint and FAQ watcher and, optionally, fill the TTS cache"""
+    global metrics_server
     proc.userdata["vad"] = silero.VAD.load()
+    get_lead_storage()
+    if METRICS_PORT and metrics_server is None:
+        metrics_server = pipeline_metrics.start_http_server(int(METRICS_PORT))
+    if FAQ_RELOAD_INTERVAL > 0:
+        faq_registry.watch(FAQ_RELOAD_INTERVAL)
+    if PREWARM_TTS:
+        presynthesize_in_background()
+
+
+def tenant_from_metadata(*metadata: Optional[str]) -> Optional[str]:
+    """The "tenant" field of the first JSON metadata string that has one."""
+    for raw in metadata:
+        if not raw:
+            continue
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            continue
+        if isinstance(data, dict) and isinstance(data.get("tenant"), str):
+            return data["tenant"]
+    return None
 
 
 async def entrypoint(ctx: JobContext):
     """Main entrypoint for the SDR agent"""
     
-    # Reset lead data for new session
-    global lead_data
-    lead_data = {
-        "name": None,
-        "company": None,
-        "email": None,
-        "role": None,
-        "use_case": None,
-        "team_size": None,
-        "timeline": None,
-        "questions_asked": [],
-        "conversation_summary": None,
-        "timestamp": None
-    }
-    
     logger.info(f"Starting SDR agent for room: {ctx.room.name}")
     
-    # Create session with Murf TTS
-    session = AgentSession(
+    # Answer from the tenant's FAQ (loaded off the event loop the first time
+    # this process sees it)
+    tenant = tenant_from_metadata(ctx.job.metadata, ctx.job.room.metadata)
+    faq = await asyncio.to_thread(faq_registry.get, tenant)
+    logger.info(f"Using FAQ for {faq.company_name} (tenant {tenant or 'default'})")
+
+    # Create session with Murf TTS. Lead state lives on the session, so
+    # concurrent calls in one worker process never share it. Each call also
+    # gets its own TTS, so its retry budget and circuit breaker are per call.
+    session_tts = create_tts(faq)
+    storage = get_lead_storage()
+    lead = Lead()
+    checkpointer = LeadCheckpointer(lead, storage.checkpoints, storage.writer, save_lead, delay=LEAD_CHECKPOINT_DELAY)
+    session = AgentSession[Lead](
+        userdata=lead,
         stt=deepgram.STT(
             model="nova-3",
             language="en-US",
@@ -235,33 +411,37 @@ async def entrypoint(ctx: JobContext):
             model="gemini-2.5-flash",
             temperature=0.7,
         ),
-        tts=murf_tts.TTS(
-            voice="en-US-ryan",
-            style="Conversational",
-            tokenizer=tokenize.basic.SentenceTokenizer(
-                min_sentence_len=5,
-            ),
-        ),
+        tts=session_tts,
         turn_detection=MultilingualModel(),
         vad=ctx.proc.userdata["vad"],
     )
     
-    # Metrics collection
+    # Metrics collection: logged, summed for the shutdown summary and
+    # recorded into the process's Prometheus histograms
     usage_collector = metrics.UsageCollector()
+    turn_latency = pipeline_metrics.TurnLatency()
 
     @session.on("metrics_collected")
     def _on_metrics_collected(ev: MetricsCollectedEvent):
         metrics.log_metrics(ev.metrics)
         usage_collector.collect(ev.metrics)
+        pipeline_metrics.record(ev.metrics, turn_latency)
 
     async def log_usage():
         summary = usage_collector.get_summary()
         logger.info(f"Usage: {summary}")
+        logger.info(f"TTS cache: {tts_cache.stats()}")
+        logger.info(f"TTS resilience: {session_tts.stats()}")
+        logger.info(f"FAQ registry: {faq_registry.stats()}")
 
     ctx.add_shutdown_callback(log_usage)
+    # The TTS owns this call's pooled HTTP session; AgentSession doesn't close it
+    ctx.add_shutdown_callback(session_tts.aclose)
+    # Saves the lead even if end_call_summary was never called, then flushes the writer
+    ctx.add_shutdown_callback(checkpointer.aclose)
 
     # Start the session with SDR agent
-    sdr = SDRAgent()
+    sdr = SDRAgent(faq=faq)
     
     await session.start(
         agent=sdr,
@@ -276,4 +456,9 @@ async def entrypoint(ctx: JobContext):
 
 
 if __name__ == "__main__":
-    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
+    worker_options = WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm)
+    # AGENT_JOB_EXECUTOR=thread hosts many calls in one worker process, sharing
+    # its prewarmed models; lead state is per-session so this is safe
+    if os.environ.get("AGENT_JOB_EXECUTOR"):
+        worker_options.job_executor_type = JobExecutorType(os.environ["AGENT_JOB_EXECUTOR"])
+    cli.run_app(worker_options)
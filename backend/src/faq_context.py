@@ -0,0 +1,148 @@
+"""
+FAQ snippets injected into the LLM context for the current turn.
+
+Without them the model has to call search_faq and then generate a second
+time to use the result, which doubles the LLM latency of most product and
+pricing questions. Instead, when the user finishes speaking, the FAQ entries
+most relevant to what they said are added to that turn's chat context, so
+common questions are answered in a single pass. The snippets are capped by a
+token budget and are not kept in the conversation history, so the prompt
+does not grow from turn to turn. Only questions get excerpts: a caller
+giving their name or team size shares words with the FAQ too, but wants
+nothing looked up.
+"""
+import math
+import re
+from collections.abc import Iterable
+from typing import Optional
+
+from faq_search import FAQEntry
+
+# Gemini's tokenizer isn't available offline; English averages about four
+# characters per token, which is close enough for a budget
+CHARS_PER_TOKEN = 4
+CONTEXT_HEADER = (
+    "Company FAQ excerpts relevant to the user's last message. Answer from these when they cover "
+    "the question; use the search_faq tool only for anything they don't cover."
+)
+
+
+# First words that open a question even when the transcript has no "?"
+QUESTION_OPENERS = frozenset({
+    "what", "whats", "which", "who", "whom", "whose", "when", "where", "why", "how",
+    "do", "does", "did", "can", "could", "would", "will", "should", "shall",
+    "is", "are", "was", "were", "am", "have", "has", "any",
+})
+# Requests for information phrased as statements
+QUESTION_PHRASES = (
+    "tell me", "i want to know", "i'd like to know", "i would like to know", "i wonder",
+    "i was wondering", "explain", "wondering if", "wondering whether", "curious about",
+    "interested in knowing", "do you know",
+)
+
+_WORD_RE = re.compile(r"[a-z']+")
+
+
+def is_question(text: str) -> bool:
+    """Whether a transcribed utterance asks something, rather than only stating facts."""
+    text = text.strip().lower()
+    if "?" in text:
+        return True
+    words = _WORD_RE.findall(text.replace("\u2019", "'"))
+    # Fillers ahead of the question ("so, how much ...", "okay and do you ...")
+    while words and words[0] in ("so", "okay", "ok", "and", "also", "um", "uh", "well", "hey", "hi", "right", "oh"):
+        words.pop(0)
+    if not words:
+        return False
+    if words[0].replace("'", "") in QUESTION_OPENERS:
+        return True
+    text = " ".join(words)
+    return any(phrase in text for phrase in QUESTION_PHRASES)
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate LLM token count of a piece of text."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    if max_tokens <= 0:
+        return ""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    cut = text[: max_chars - 1]
+    if " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut.rstrip(" ,;:") + "…"
+
+
+def select_snippets(
+    results: Iterable[tuple[FAQEntry, float]],
+    max_tokens: int,
+    *,
+    min_relative_score: float = 0.5,
+) -> list[str]:
+    """
+    Pick the snippets to inject, best first, within a token budget.
+
+    Results scoring below ``min_relative_score`` times the best score are
+    dropped: a query that strongly matches one entry shouldn't drag in weak
+    incidental matches. Snippets that don't fit are skipped in favour of
+    smaller ones further down; the best one is truncated rather than
+    dropped if it alone exceeds the budget.
+
+    Args:
+        results: (entry, score) pairs from a FAQ search, best first
+        max_tokens: Token budget for all snippets together
+        min_relative_score: Fraction of the top score a result must reach
+
+    Returns:
+        Snippet texts in rank order
+    """
+    snippets: list[str] = []
+    remaining = max_tokens
+    best_score: Optional[float] = None
+    for entry, score in results:
+        if best_score is None:
+            best_score = score
+        elif score < best_score * min_relative_score:
+            break
+        snippet = f"- {entry.title}: {entry.answer}" if entry.source == "faq" else f"- {entry.answer}"
+        cost = estimate_tokens(snippet) + 1  # newline
+        if cost > remaining:
+            # Truncating needs a token left after the newline
+            if not snippets and remaining > 1:
+                snippets.append(_truncate(snippet, remaining - 1))
+                remaining = 0
+            continue
+        snippets.append(snippet)
+        remaining -= cost
+    return snippets
+
+
+def build_faq_context(
+    snapshot,
+    query: str,
+    *,
+    top_k: int = 3,
+    max_tokens: int = 300,
+    min_coverage: float = 0.3,
+) -> Optional[str]:
+    """
+    The FAQ context block for a user message, or None if it isn't a question or nothing relevant matched.
+
+    Args:
+        snapshot: The call's FAQSnapshot
+        query: The user's latest message
+        top_k: Maximum number of FAQ entries
+        max_tokens: Token budget for the snippets (the fixed header is extra)
+        min_coverage: Share of the message's keywords an entry must contain
+            (see FAQIndex.search)
+    """
+    if top_k <= 0 or max_tokens <= 0 or not is_question(query):
+        return None
+    snippets = select_snippets(snapshot.search(query, top_k=top_k, min_coverage=min_coverage), max_tokens)
+    if not snippets:
+        return None
+    return "\n".join([CONTEXT_HEADER, *snippets])
@@ -0,0 +1,327 @@
+"""
+Keyword retrieval over the company FAQ.
+
+The index is built once when the FAQ file is loaded. Each searchable entry
+(FAQ items, products, pricing plans, target customers and key benefits) is
+tokenized, stopword-filtered and added to an inverted index, so a query only
+touches the postings of its own terms and is ranked with BM25.
+
+Speech-to-text output is noisy, so query terms that are not in the
+vocabulary are also matched approximately against the words of FAQ
+questions and product names through a character-trigram index, and
+adjacent words are re-joined when that forms a known term ("razor pay").
+"""
+import heapq
+import logging
+import math
+import re
+from collections import Counter, defaultdict
+from collections.abc import Iterable
+from typing import NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+STOPWORDS = frozenset(
+    [
+        "a", "about", "above", "after", "again", "all", "also", "am", "an", "and",
+        "any", "are", "as", "at", "be", "because", "been", "before", "being",
+        "below", "between", "both", "but", "by", "can", "could", "did", "do",
+        "does", "doing", "down", "during", "each", "few", "for", "from", "further",
+        "had", "has", "have", "having", "he", "her", "here", "hers", "him", "his",
+        "how", "i", "if", "in", "into", "is", "it", "its", "itself", "just", "let",
+        "me", "more", "most", "my", "no", "nor", "not", "now", "of", "off", "on",
+        "once", "only", "or", "other", "our", "ours", "out", "over", "own", "same",
+        "she", "should", "so", "some", "such", "than", "that", "the", "their",
+        "theirs", "them", "then", "there", "these", "they", "this", "those",
+        "through", "to", "too", "under", "until", "up", "very", "was", "we", "were",
+        "what", "when", "where", "which", "while", "who", "whom", "why", "will",
+        "with", "would", "you", "your", "yours", "tell", "know", "please", "okay",
+        "ok", "hi", "hello", "hey", "um", "uh", "like", "want", "need", "get", "got",
+    ]
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def stem(word: str) -> str:
+    """Strip plural suffixes so "payments" matches "payment"."""
+    if len(word) <= 3 or word.isdigit():
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase, split on non-alphanumerics, drop stopwords and stem."""
+    return [stem(tok) for tok in _TOKEN_RE.findall(text.lower()) if tok not in STOPWORDS]
+
+
+def trigrams(word: str) -> frozenset[str]:
+    """Character trigrams of a word, padded so short words still have some."""
+    padded = f"  {word} "
+    return frozenset(padded[i : i + 3] for i in range(len(padded) - 2))
+
+
+class TrigramIndex:
+    """Approximate word lookup by trigram Jaccard similarity."""
+
+    def __init__(self, words: Iterable[str]) -> None:
+        """
+        Index a vocabulary.
+
+        Args:
+            words: The words that queries may be corrected to
+        """
+        self._words: list[str] = sorted(set(words))
+        self._grams: list[frozenset[str]] = [trigrams(word) for word in self._words]
+        self._postings: dict[str, list[int]] = defaultdict(list)
+        for word_id, grams in enumerate(self._grams):
+            for gram in grams:
+                self._postings[gram].append(word_id)
+        self._postings = dict(self._postings)
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def lookup(self, word: str, threshold: float = 0.4, limit: int = 3) -> list[tuple[str, float]]:
+        """
+        Find vocabulary words similar to a (possibly misspelled) word.
+
+        Candidates are generated from the rarest of the word's trigrams only:
+        a match with Jaccard similarity >= threshold must share at least
+        ceil(threshold * |grams|) trigrams, so it has to appear in one of the
+        first |grams| - that + 1 posting lists. Candidates are then verified
+        exactly, which keeps a lookup well under a millisecond even for tens
+        of thousands of words.
+
+        Args:
+            word: The query word
+            threshold: Minimum Jaccard similarity, between 0 and 1
+            limit: Maximum number of matches
+
+        Returns:
+            (word, similarity) pairs, most similar first
+        """
+        grams = trigrams(word)
+        size = len(grams)
+        min_shared = max(1, math.ceil(threshold * size))
+        rarest = sorted((self._postings.get(gram, ()) for gram in grams), key=len)
+
+        candidates = set()
+        for postings in rarest[: size - min_shared + 1]:
+            candidates.update(postings)
+
+        min_len, max_len = threshold * size, size / threshold if threshold else math.inf
+        matches = []
+        for word_id in candidates:
+            other = self._grams[word_id]
+            if not min_len <= len(other) <= max_len:
+                continue
+            shared = len(grams & other)
+            similarity = shared / (size + len(other) - shared)
+            if similarity >= threshold:
+                matches.append((self._words[word_id], similarity))
+
+        return heapq.nlargest(limit, matches, key=lambda item: item[1])
+
+
+def _humanize(key: str) -> str:
+    return key.replace("_", " ")
+
+
+class FAQEntry(NamedTuple):
+    """A single searchable entry and the answer text returned for it."""
+
+    source: str
+    title: str
+    answer: str
+
+
+def build_entries(company_data: dict) -> list[tuple[FAQEntry, str]]:
+    """
+    Flatten the company data into (entry, indexed text) pairs.
+
+    Titles are repeated in the indexed text so that matches on a question or
+    product name outrank incidental matches in a long answer.
+
+    Args:
+        company_data: Parsed contents of the company FAQ file
+
+    Returns:
+        List of entries paired with the text to index for each
+    """
+    entries = []
+
+    for item in company_data.get("faq", []):
+        question = item.get("question", "")
+        answer = item.get("answer", "")
+        entries.append((FAQEntry("faq", question, answer), f"{question} {question} {answer}"))
+
+    for product in company_data.get("products", []):
+        name = product.get("name", "")
+        description = product.get("description", "")
+        use_case = product.get("use_case", "")
+        answer = f"{name}: {description} Best for: {use_case}"
+        entries.append((FAQEntry("products", name, answer), f"{name} {name} {description} {use_case}"))
+
+    for plan, details in company_data.get("pricing", {}).items():
+        title = f"{_humanize(plan).title()} pricing"
+        if isinstance(details, dict):
+            body = "; ".join(f"{_humanize(k)}: {v}" for k, v in details.items())
+        else:
+            body = str(details)
+        answer = f"{title}: {body}"
+        entries.append((FAQEntry("pricing", title, answer), f"{title} {title} price cost {body}"))
+
+    customers = company_data.get("target_customers", [])
+    if customers:
+        answer = f"Our customers include {', '.join(customers)}."
+        entries.append(
+            (FAQEntry("target_customers", "Target customers", answer), f"target customers clients industries {' '.join(customers)}")
+        )
+
+    benefits = company_data.get("key_benefits", [])
+    if benefits:
+        answer = f"Key benefits: {'; '.join(benefits)}."
+        entries.append(
+            (FAQEntry("key_benefits", "Key benefits", answer), f"key benefits why advantages {' '.join(benefits)}")
+        )
+
+    return entries
+
+
+class FAQIndex:
+    """BM25-ranked inverted index over the company FAQ."""
+
+    def __init__(
+        self,
+        entries: Optional[list[tuple[FAQEntry, str]]] = None,
+        *,
+        k1: float = 1.5,
+        b: float = 0.75,
+        fuzzy_threshold: Optional[float] = 0.4,
+    ) -> None:
+        """
+        Build the index.
+
+        Args:
+            entries: (entry, indexed text) pairs, usually from build_entries()
+            k1: BM25 term-frequency saturation
+            b: BM25 document-length normalization
+            fuzzy_threshold: Minimum trigram similarity for correcting unknown
+                query terms, or None to disable approximate matching
+        """
+        self._k1 = k1
+        self._b = b
+        self._fuzzy_threshold = fuzzy_threshold
+        self._entries: list[FAQEntry] = []
+        self._doc_len: list[int] = []
+        self._postings: dict[str, list[tuple[int, int]]] = defaultdict(list)
+
+        for doc_id, (entry, text) in enumerate(entries or []):
+            terms = Counter(tokenize(text))
+            self._entries.append(entry)
+            self._doc_len.append(sum(terms.values()))
+            for term, tf in terms.items():
+                self._postings[term].append((doc_id, tf))
+
+        self._postings = dict(self._postings)
+        num_docs = len(self._entries)
+        self._avg_len = (sum(self._doc_len) / num_docs) if num_docs else 0.0
+        self._idf = {
+            term: math.log(1 + (num_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+        self._avg_idf = sum(self._idf.values()) / len(self._idf) if self._idf else 0.0
+        # Questions and product names are what callers actually try to say
+        self._fuzzy = TrigramIndex(term for entry in self._entries for term in tokenize(entry.title))
+
+    @classmethod
+    def from_company_data(cls, company_data: dict, **kwargs) -> "FAQIndex":
+        """Build an index over every searchable section of the company data."""
+        index = cls(build_entries(company_data), **kwargs)
+        logger.info(f"Built FAQ index: {len(index)} entries, {len(index._postings)} terms")
+        return index
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def search(self, query: str, top_k: int = 3, *, min_coverage: float = 0.0) -> list[tuple[FAQEntry, float]]:
+        """
+        Rank entries against a query.
+
+        Only the postings of the query's own terms are visited, so the cost
+        depends on the query rather than on the size of the FAQ.
+
+        Args:
+            query: The user's question
+            top_k: Maximum number of results
+            min_coverage: Share of the query's IDF-weighted terms an entry
+                must contain; words the FAQ doesn't know at all count at the
+                average IDF. 0 keeps every entry matching any term.
+
+        Returns:
+            (entry, score) pairs, best first
+        """
+        scores: dict[int, float] = defaultdict(float)
+        matched: dict[int, float] = defaultdict(float)
+        k1, b, avg_len = self._k1, self._b, self._avg_len or 1.0
+
+        terms, unknown = self.query_terms(query)
+        for term, weight in terms.items():
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf[term] * weight
+            for doc_id, tf in postings:
+                norm = k1 * (1 - b + b * self._doc_len[doc_id] / avg_len)
+                scores[doc_id] += idf * tf * (k1 + 1) / (tf + norm)
+                matched[doc_id] += idf
+
+        if min_coverage > 0 and scores:
+            total = sum(self._idf[term] * weight for term, weight in terms.items()) + unknown * self._avg_idf
+            scores = {doc_id: score for doc_id, score in scores.items() if matched[doc_id] >= min_coverage * total}
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        return [(self._entries[doc_id], score) for doc_id, score in best]
+
+    def query_terms(self, query: str) -> tuple[dict[str, float], int]:
+        """
+        Map a query to weighted index terms.
+
+        Known terms keep weight 1. Adjacent words that form a known term when
+        joined ("pay outs" -> "payout") are added with weight 1, and remaining
+        unknown terms are replaced by their closest vocabulary words weighted
+        by similarity.
+
+        Returns:
+            The weighted terms, and how many query words (of two or more
+            letters) matched nothing in the index
+        """
+        terms = dict.fromkeys(tokenize(query), 1.0)
+        if self._fuzzy_threshold is None:
+            unknown = sum(1 for term in terms if term not in self._postings and len(term) > 1)
+            return {term: w for term, w in terms.items() if term in self._postings}, unknown
+
+        words = _TOKEN_RE.findall(query.lower())
+        joined_parts = set()
+        for first, second in zip(words, words[1:]):
+            joined = stem(first + second)
+            if joined in self._postings:
+                terms[joined] = 1.0
+                joined_parts.update((stem(first), stem(second)))
+
+        unknown = 0
+        for term in [term for term in terms if term not in self._postings]:
+            del terms[term]
+            if term in joined_parts:
+                continue
+            matches = self._fuzzy.lookup(term, self._fuzzy_threshold) if len(term) >= 4 else []
+            for match, similarity in matches:
+                terms[match] = max(terms.get(match, 0.0), similarity)
+            if not matches and len(term) > 1:
+                unknown += 1
+
+        return terms, unknown
@@ -0,0 +1,462 @@
+"""
+Company FAQ data with hot reload and per-tenant registries.
+
+A FAQSnapshot bundles the parsed FAQ file with the search indexes built
+from it. FAQSource holds the current snapshot and can watch the file:
+when its mtime or size changes, the file is re-parsed and re-indexed on a
+background thread and the new snapshot replaces the old one in a single
+reference assignment. Sessions keep the snapshot they started with, so an
+in-flight call never sees its FAQ change halfway through, while new calls
+pick up the edit without a worker restart.
+
+Callers ask the same few questions over and over, so each snapshot
+memoizes its search results in a bounded LRU keyed by the weighted terms
+the keyword index scores the query with, joined compounds and fuzzy
+matches included: "What is your pricing?" and "pricing" share an entry,
+while "pay out" (the "payout" term) and "pay" do not. The cache belongs to
+the snapshot, so a reload starts a fresh one and stale results can never
+be served.
+
+FAQRegistry serves many tenants from one worker pool: each tenant's FAQ is
+loaded on first use, shared by every session in the process, and evicted
+least-recently-used when the resident set exceeds a memory budget.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from faq_search import FAQIndex
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUERY_CACHE_SIZE = 1024
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def query_key(query: str, index: Optional[FAQIndex] = None) -> tuple:
+    """
+    Normalized form of a query, the same for queries that search alike.
+
+    Args:
+        query: The user's question
+        index: The keyword index that will rank it. The key is then the
+            weighted terms it scores with plus its count of unknown words;
+            without one it is the lowercased words, stopwords included, for
+            searches (semantic ones) that see every word
+    """
+    if index is None:
+        return tuple(_WORD_RE.findall(query.lower()))
+    terms, unknown = index.query_terms(query)
+    return tuple(sorted(terms.items())), unknown
+
+
+class QueryCache:
+    """Thread-safe LRU of search results with hit/miss counters."""
+
+    def __init__(self, max_size: int = DEFAULT_QUERY_CACHE_SIZE) -> None:
+        self._max_size = max_size
+        self._entries: OrderedDict[tuple, tuple] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: tuple) -> Optional[tuple]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: tuple, value: tuple) -> None:
+        if self._max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class FAQSnapshot(NamedTuple):
+    """One immutable version of the FAQ, its indexes and the memoized results of searching them."""
+
+    company_data: dict
+    index: FAQIndex
+    vectors: Optional[object]  # faq_vectors.VectorIndex when semantic search is on
+    loaded_at: float
+    cache: QueryCache
+
+    @property
+    def company_name(self) -> str:
+        return self.company_data.get("company", {}).get("name", "our company")
+
+    @property
+    def company_description(self) -> str:
+        return self.company_data.get("company", {}).get("description", "")
+
+    def search(self, query: str, top_k: int = 3, *, min_coverage: float = 0.0) -> list:
+        """
+        (entry, score) pairs from the semantic index if enabled, else (or if empty) the keyword index.
+
+        ``min_coverage`` applies to the keyword index only (see FAQIndex.search);
+        the semantic index has its own similarity cut-off.
+        """
+        key = (query_key(query, None if self.vectors is not None else self.index), top_k, min_coverage)
+        results = self.cache.get(key)
+        if results is None:
+            results = tuple(self._search(query, top_k, min_coverage))
+            self.cache.put(key, results)
+        return list(results)
+
+    def _search(self, query: str, top_k: int, min_coverage: float) -> list:
+        if self.vectors is not None:
+            results = self.vectors.search(query, top_k=top_k)
+            if results:
+                return results
+        return self.index.search(query, top_k=top_k, min_coverage=min_coverage)
+
+
+def load_snapshot(
+    path: Path,
+    *,
+    semantic: bool = False,
+    fuzzy_threshold: Optional[float] = 0.4,
+    query_cache_size: int = DEFAULT_QUERY_CACHE_SIZE,
+) -> FAQSnapshot:
+    """
+    Parse a FAQ file and build its indexes.
+
+    A missing file gives an empty snapshot (the agent still runs, without
+    FAQ answers); a malformed one raises, so callers can keep what they had.
+    """
+    path = Path(path)
+    company_data = {}
+    if path.exists():
+        with open(path) as f:
+            company_data = json.load(f)
+        logger.info(f"Loaded company data for {company_data.get('company', {}).get('name', 'Unknown')}")
+    else:
+        logger.warning(f"Company FAQ file not found: {path}")
+
+    index = FAQIndex.from_company_data(company_data, fuzzy_threshold=fuzzy_threshold)
+    vectors = None
+    if semantic:
+        from faq_vectors import VectorIndex
+
+        vectors = VectorIndex.load_or_build(path, company_data)
+    return FAQSnapshot(company_data, index, vectors, time.time(), QueryCache(query_cache_size))
+
+
+def _signature(path: Path) -> Optional[tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class FAQSource:
+    """The current FAQ snapshot for one file, optionally kept fresh by a watcher thread."""
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        semantic: bool = False,
+        fuzzy_threshold: Optional[float] = 0.4,
+        query_cache_size: int = DEFAULT_QUERY_CACHE_SIZE,
+    ) -> None:
+        """
+        Load the FAQ file.
+
+        Args:
+            path: The company FAQ JSON file
+            semantic: Also build the local vector index
+            fuzzy_threshold: Passed to FAQIndex for misheard-word correction
+            query_cache_size: Search results memoized per snapshot (0 disables)
+        """
+        self.path = Path(path)
+        self._semantic = semantic
+        self._fuzzy_threshold = fuzzy_threshold
+        self._query_cache_size = query_cache_size
+        self._signature = _signature(self.path)
+        self._snapshot = self._load()
+        self._reload_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.reloads = 0
+
+    @property
+    def snapshot(self) -> FAQSnapshot:
+        """The latest snapshot; hold on to it for the duration of a call."""
+        return self._snapshot
+
+    def reload_if_changed(self) -> bool:
+        """
+        Rebuild the snapshot if the file changed since the last load.
+
+        Blocking (parsing and indexing run in the caller), so call it from a
+        thread rather than the event loop. A file that fails to parse, e.g.
+        caught mid-write, leaves the current snapshot in place and is
+        retried once it changes again. So does a file that has gone missing
+        or holds no data, as it briefly can during an editor's atomic save.
+
+        Returns:
+            Whether a new snapshot was swapped in
+        """
+        with self._reload_lock:
+            signature = _signature(self.path)
+            if signature == self._signature:
+                return False
+            try:
+                if signature is None:
+                    raise FileNotFoundError("file not found")
+                snapshot = self._load()
+                if not snapshot.company_data and self._snapshot.company_data:
+                    raise ValueError("file has no company data")
+            except (OSError, ValueError) as e:
+                logger.warning(f"Keeping previous FAQ, could not reload {self.path}: {e}")
+                self._signature = signature
+                return False
+            self._signature = signature
+            # A single reference assignment: readers see the old or the new snapshot, never a mix
+            self._snapshot = snapshot
+            self.reloads += 1
+            logger.info(f"Reloaded FAQ from {self.path} ({len(snapshot.index)} entries)")
+            return True
+
+    def _load(self) -> FAQSnapshot:
+        return load_snapshot(
+            self.path,
+            semantic=self._semantic,
+            fuzzy_threshold=self._fuzzy_threshold,
+            query_cache_size=self._query_cache_size,
+        )
+
+    def watch(self, interval: float = 5.0) -> None:
+        """Poll the file for changes on a daemon thread (idempotent)."""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop.clear()
+
+        def _poll() -> None:
+            while not self._stop.wait(interval):
+                try:
+                    self.reload_if_changed()
+                except Exception as e:
+                    logger.warning(f"FAQ reload failed: {e}")
+
+        self._watcher = threading.Thread(target=_poll, name="faq-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop(self) -> None:
+        """Stop the watcher thread."""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+
+# Tenant ids become file names, so nothing that could escape the directory
+_TENANT_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9_.-]{0,63}")
+# Resident size of a snapshot relative to its JSON file (parsed dicts, BM25
+# postings and the trigram vocabulary), measured at roughly 10-20x
+_BYTES_PER_FILE_BYTE = 12
+_BASE_BYTES = 64 * 1024
+
+
+def estimate_bytes(path: Path) -> int:
+    """Approximate memory held by the snapshot of a FAQ file."""
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        size = 0
+    return _BASE_BYTES + _BYTES_PER_FILE_BYTE * size
+
+
+class FAQRegistry:
+    """
+    Lazily loaded, LRU-evicted FAQ sources keyed by tenant.
+
+    A tenant's FAQ lives at ``<directory>/<tenant>.json``. Unknown or
+    missing tenants get the default source, which is never evicted.
+    Concurrent first requests for the same tenant load it once. Loading
+    parses and indexes the file in the caller, so call get() through
+    ``asyncio.to_thread`` from the event loop.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        default: FAQSource,
+        *,
+        max_bytes: int = 256 * 1024 * 1024,
+        semantic: bool = False,
+        fuzzy_threshold: Optional[float] = 0.4,
+        query_cache_size: int = DEFAULT_QUERY_CACHE_SIZE,
+    ) -> None:
+        """
+        Create a registry.
+
+        Args:
+            directory: Folder holding one <tenant>.json FAQ file per tenant
+            default: Source used when no (known) tenant is given
+            max_bytes: Memory budget for resident tenant snapshots
+            semantic: Also build vector indexes for tenants
+            fuzzy_threshold: Passed to each tenant's FAQIndex
+            query_cache_size: Search results memoized per tenant snapshot
+        """
+        self._directory = Path(directory)
+        self._default = default
+        self._max_bytes = max_bytes
+        self._semantic = semantic
+        self._fuzzy_threshold = fuzzy_threshold
+        self._query_cache_size = query_cache_size
+        self._sources: OrderedDict[str, tuple[FAQSource, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._loading: dict[str, threading.Lock] = {}
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, tenant: Optional[str]) -> FAQSnapshot:
+        """The current snapshot for a tenant, loading it on first use."""
+        if not tenant:
+            return self._default.snapshot
+        if not _TENANT_RE.fullmatch(tenant):
+            logger.warning(f"Ignoring invalid tenant id {tenant!r}")
+            return self._default.snapshot
+
+        with self._lock:
+            entry = self._cached(tenant)
+            if entry is not None:
+                return entry
+            load_lock = self._loading.setdefault(tenant, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                entry = self._cached(tenant)
+                if entry is not None:
+                    return entry
+            path = self._directory / f"{tenant}.json"
+            if not path.exists():
+                # Not cached: the file may be deployed later
+                with self._lock:
+                    self._loading.pop(tenant, None)
+                logger.warning(f"No FAQ for tenant {tenant!r} at {path}, using the default")
+                return self._default.snapshot
+            source = FAQSource(
+                path,
+                semantic=self._semantic,
+                fuzzy_threshold=self._fuzzy_threshold,
+                query_cache_size=self._query_cache_size,
+            )
+            cost = estimate_bytes(path)
+            with self._lock:
+                self._sources[tenant] = (source, cost)
+                self._bytes += cost
+                self.misses += 1
+                self._loading.pop(tenant, None)
+                self._evict()
+            return source.snapshot
+
+    def _cached(self, tenant: str) -> Optional[FAQSnapshot]:
+        entry = self._sources.get(tenant)
+        if entry is None:
+            return None
+        self._sources.move_to_end(tenant)
+        self.hits += 1
+        return entry[0].snapshot
+
+    def _evict(self) -> None:
+        # The tenant just loaded stays even if it alone exceeds the budget
+        while self._bytes > self._max_bytes and len(self._sources) > 1:
+            tenant, (_, cost) = self._sources.popitem(last=False)
+            self._bytes -= cost
+            self.evictions += 1
+            logger.info(f"Evicted FAQ for tenant {tenant!r}")
+
+    def reload_if_changed(self) -> int:
+        """Reload the default and every resident tenant whose file changed; returns how many were."""
+        reloaded = int(self._default.reload_if_changed())
+        with self._lock:
+            resident = list(self._sources.items())
+        for tenant, (source, cost) in resident:
+            if source.reload_if_changed():
+                reloaded += 1
+                new_cost = estimate_bytes(source.path)
+                with self._lock:
+                    if self._sources.get(tenant, (None,))[0] is source:
+                        self._sources[tenant] = (source, new_cost)
+                        self._bytes += new_cost - cost
+                        self._evict()
+        return reloaded
+
+    def watch(self, interval: float = 5.0) -> None:
+        """Poll all resident FAQ files for changes on one daemon thread (idempotent)."""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop.clear()
+
+        def _poll() -> None:
+            while not self._stop.wait(interval):
+                try:
+                    self.reload_if_changed()
+                except Exception as e:
+                    logger.warning(f"FAQ reload failed: {e}")
+
+        self._watcher = threading.Thread(target=_poll, name="faq-registry-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop(self) -> None:
+        """Stop the watcher thread."""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def stats(self) -> dict:
+        """Resident tenants, estimated memory, hit/miss/eviction counters and query cache totals."""
+        with self._lock:
+            sources = [self._default] + [source for source, _ in self._sources.values()]
+        query_hits = query_misses = 0
+        for source in sources:
+            cache = source.snapshot.cache
+            query_hits += cache.hits
+            query_misses += cache.misses
+        lookups = query_hits + query_misses
+        return {
+            "tenants": len(sources) - 1,
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "query_hits": query_hits,
+            "query_misses": query_misses,
+            "query_hit_ratio": query_hits / lookups if lookups else 0.0,
+        }
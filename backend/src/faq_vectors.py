@@ -0,0 +1,170 @@
+"""
+Local semantic search over the company FAQ.
+
+Entries are embedded into a dense float32 matrix with a hashing TF-IDF
+vectorizer (stemmed words, word bigrams and character trigrams), so
+paraphrases that share vocabulary with an answer still find it without any
+network call. The matrix is cached as a memory-mappable ``.npy`` next to the
+FAQ file, which lets every worker process share one copy from the page cache
+instead of rebuilding it.
+"""
+import hashlib
+import json
+import logging
+import os
+import zlib
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from faq_search import FAQEntry, build_entries, tokenize, trigrams
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FEATURES = 4096
+
+
+def _features(text: str) -> list[str]:
+    terms = tokenize(text)
+    features = [f"w:{term}" for term in terms]
+    features.extend(f"b:{first}_{second}" for first, second in zip(terms, terms[1:]))
+    for term in terms:
+        features.extend(f"c:{gram}" for gram in trigrams(term))
+    return features
+
+
+class HashingVectorizer:
+    """Maps text to L2-normalized TF-IDF vectors in a fixed-size hashed space."""
+
+    def __init__(self, n_features: int = DEFAULT_FEATURES, idf: Optional[np.ndarray] = None) -> None:
+        self.n_features = n_features
+        self.idf = idf if idf is not None else np.ones(n_features, dtype=np.float32)
+
+    def _counts(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.n_features, dtype=np.float32)
+        # crc32 rather than hash(): str hashing is randomized per process
+        columns = [zlib.crc32(feature.encode()) % self.n_features for feature in _features(text)]
+        np.add.at(vector, columns, 1.0)
+        return vector
+
+    def fit_transform(self, texts: list[str]) -> np.ndarray:
+        """Learn IDF weights from a corpus and return its normalized matrix."""
+        counts = np.stack([self._counts(text) for text in texts]) if texts else np.zeros((0, self.n_features), np.float32)
+        doc_freq = np.count_nonzero(counts, axis=0)
+        self.idf = (np.log((1 + len(texts)) / (1 + doc_freq)) + 1).astype(np.float32)
+        return self._normalize(np.log1p(counts) * self.idf)
+
+    def transform(self, text: str) -> np.ndarray:
+        """Vectorize a single query with the learned IDF weights."""
+        return self._normalize(np.log1p(self._counts(text)) * self.idf)
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        return (matrix / np.maximum(norms, 1e-12)).astype(np.float32)
+
+
+def _fingerprint(entries: list[tuple[FAQEntry, str]], n_features: int) -> str:
+    digest = hashlib.sha256(str(n_features).encode())
+    for _, text in entries:
+        digest.update(text.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _save_atomic(path: Path, array: np.ndarray) -> None:
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+class VectorIndex:
+    """Dense cosine-similarity index over the FAQ entries."""
+
+    def __init__(self, entries: list[FAQEntry], matrix: np.ndarray, vectorizer: HashingVectorizer) -> None:
+        self._entries = entries
+        self._matrix = matrix
+        self._vectorizer = vectorizer
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @classmethod
+    def build(cls, company_data: dict, n_features: int = DEFAULT_FEATURES) -> "VectorIndex":
+        """Embed the company data in memory without touching the disk."""
+        entries = build_entries(company_data)
+        vectorizer = HashingVectorizer(n_features)
+        matrix = vectorizer.fit_transform([text for _, text in entries])
+        return cls([entry for entry, _ in entries], matrix, vectorizer)
+
+    @classmethod
+    def load_or_build(cls, faq_file: Path, company_data: dict, n_features: int = DEFAULT_FEATURES) -> "VectorIndex":
+        """
+        Memory-map the cached matrix next to the FAQ file, rebuilding it if stale.
+
+        The cache is keyed by a fingerprint of the indexed text, so editing
+        the FAQ invalidates it; cached arrays whose shape does not match the
+        entries and feature space are rebuilt too. Files are written
+        atomically so concurrent workers never map a half-written matrix.
+
+        Args:
+            faq_file: Path of the company FAQ JSON file
+            company_data: Its parsed contents
+            n_features: Width of the hashed feature space
+
+        Returns:
+            The vector index
+        """
+        entries = build_entries(company_data)
+        fingerprint = _fingerprint(entries, n_features)
+        matrix_path = faq_file.with_suffix(".vectors.npy")
+        idf_path = faq_file.with_suffix(".idf.npy")
+        meta_path = faq_file.with_suffix(".vectors.json")
+
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if meta.get("fingerprint") == fingerprint:
+                matrix = np.load(matrix_path, mmap_mode="r")
+                idf = np.load(idf_path)
+                if matrix.shape == (len(entries), n_features) and idf.shape == (n_features,):
+                    logger.info(f"Mapped FAQ vectors from {matrix_path} ({matrix.shape[0]} entries)")
+                    return cls([entry for entry, _ in entries], matrix, HashingVectorizer(n_features, idf))
+                logger.warning(f"Rebuilding FAQ vectors: cached shape {matrix.shape} does not match {len(entries)} entries")
+        except (OSError, ValueError):
+            pass
+
+        index = cls.build(company_data, n_features)
+        try:
+            _save_atomic(matrix_path, index._matrix)
+            _save_atomic(idf_path, index._vectorizer.idf)
+            tmp = meta_path.with_name(f"{meta_path.name}.{os.getpid()}.tmp")
+            with open(tmp, "w") as f:
+                json.dump({"fingerprint": fingerprint, "shape": list(index._matrix.shape)}, f)
+            os.replace(tmp, meta_path)
+            logger.info(f"Saved FAQ vectors to {matrix_path}")
+        except OSError as e:
+            logger.warning(f"Could not cache FAQ vectors: {e}")
+        return index
+
+    def search(self, query: str, top_k: int = 3, min_score: float = 0.1) -> list[tuple[FAQEntry, float]]:
+        """
+        Rank entries by cosine similarity to the query.
+
+        Args:
+            query: The user's question
+            top_k: Maximum number of results
+            min_score: Similarity below which results are dropped
+
+        Returns:
+            (entry, score) pairs, best first
+        """
+        if not self._entries:
+            return []
+        scores = self._matrix @ self._vectorizer.transform(query)
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self._entries[i], float(scores[i])) for i in top if scores[i] >= min_score]
@@ -1,77 +1,61 @@
 """
-Fetch all available Murf voices to find the correct voice IDs.
+List Murf voices, to find the voice ID and style to give murf_tts.TTS.
+
+Uses the cached voice catalog (see voice_catalog.py), fetching it from Murf
+when it is missing or older than --ttl. Run from ``backend/``:
+
+    uv run python src/get_murf_voices.py --language en-US --gender Female
+    uv run python src/get_murf_voices.py --name ryan --style Conversational
+    uv run python src/get_murf_voices.py --refresh
+    uv run python src/get_murf_voices.py --check en-US-ryan Conversational
 """
-import os
-import requests
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+from typing import Optional
+
 from dotenv import load_dotenv
 
+from voice_catalog import DEFAULT_CATALOG_PATH, DEFAULT_TTL, get_catalog
+
 load_dotenv(".env.local")
 
-def get_murf_voices():
-    api_key = os.environ.get("MURF_API_KEY")
-    
-    if not api_key:
-        print("❌ MURF_API_KEY not found")
-        return
-    
-    url = "https://api.murf.ai/v1/speech/voices"
-    headers = {
-        "api-key": api_key,
-        "Content-Type": "application/json"
-    }
-    
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        data = response.json()
-        print(f"Raw response: {data}\n")
-        
-        # Handle different response formats
-        if isinstance(data, dict):
-            voices = data.get('voices', data.get('data', []))
-        else:
-            voices = data
-        
-        print("=" * 80)
-        print(f"Available Murf Voices (found {len(voices)} voices)")
-        print("=" * 80)
-        
-        # Look for Matthew, Alicia, and Ken
-        target_names = ['matthew', 'alicia', 'ken']
-        
-        for voice in voices:
-            name = voice.get('name', '').lower()
-            voice_id = voice.get('voiceId', '')
-            gender = voice.get('gender', '')
-            language = voice.get('language', '')
-            
-            # Check if this is one of our target voices
-            is_target = any(target in name for target in target_names)
-            
-            if is_target or 'en' in language.lower():
-                marker = "⭐" if is_target else "  "
-                print(f"{marker} {voice.get('name', 'Unknown'):20} | ID: {voice_id:30} | {gender:10} | {language}")
-        
-        print("\n" + "=" * 80)
-        print("Looking for voices matching: Matthew, Alicia, Ken")
-        print("=" * 80)
-        
-        for target in target_names:
-            print(f"\n{target.upper()}:")
-            found = False
-            for voice in voices:
-                name = voice.get('name', '').lower()
-                if target in name:
-                    print(f"  ✓ {voice.get('name')} → {voice.get('voiceId')}")
-                    found = True
-            if not found:
-                print(f"  ✗ No voice found with '{target}' in name")
-                
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        if 'response' in locals():
-            print(f"Response: {response.text[:500]}")
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--language", help='Locale ("en-US") or language ("en")')
+    parser.add_argument("--gender", help='e.g. "Male" or "Female"')
+    parser.add_argument("--style", help='A style the voice must support, e.g. "Conversational"')
+    parser.add_argument("--name", help="Substring of the voice name")
+    parser.add_argument("--check", nargs="+", metavar=("VOICE", "STYLE"), help="Validate a voice ID and optional style")
+    parser.add_argument("--catalog", type=Path, default=DEFAULT_CATALOG_PATH, help="Cache file")
+    parser.add_argument("--ttl", type=float, default=DEFAULT_TTL, help="Seconds before the cache is refetched")
+    parser.add_argument("--refresh", action="store_true", help="Refetch the catalog now")
+    args = parser.parse_args(argv)
+
+    catalog = asyncio.run(get_catalog(path=args.catalog, ttl=args.ttl, refresh=args.refresh))
+    if catalog is None:
+        print("No cached voice catalog and it could not be fetched; is MURF_API_KEY set?", file=sys.stderr)
+        return 1
+
+    if args.check:
+        if len(args.check) > 2:
+            parser.error("--check takes a voice ID and at most one style")
+        try:
+            voice = catalog.validate(*args.check)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 1
+        print(f"{voice.voice_id} ok ({voice.name}, {voice.gender}, {voice.locale})")
+        return 0
+
+    voices = catalog.find(language=args.language, gender=args.gender, style=args.style, name=args.name)
+    for voice in voices:
+        print(f"{voice.voice_id:30} {voice.name:20} {voice.gender:8} {voice.locale:8} {', '.join(voice.styles)}")
+    print(f"{len(voices)} of {len(catalog)} voices, catalog fetched {catalog.age() / 3600:.1f} h ago", file=sys.stderr)
+    return 0
+
 
 if __name__ == "__main__":
-    get_murf_voices()
+    sys.exit(main())
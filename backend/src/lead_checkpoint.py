@@ -0,0 +1,194 @@
+"""
+Crash-safe checkpoints of leads while a call is in progress.
+
+A lead used to be stored only when the agent called end_call_summary, so a
+caller who hung up first (or an LLM that never called the tool) lost
+everything collected. Now every session's partial lead is checkpointed to a
+small file of its own as fields arrive. Changes are coalesced: the first
+change schedules one write a moment later, and whatever else changes in the
+meantime rides along with it, so a burst of collect_lead_info calls costs a
+single small atomic write rather than a rewrite of the lead store.
+
+When the session shuts down, an unsaved lead is saved to the lead store and
+its checkpoint removed. Checkpoints left behind by a worker that died are
+recovered into the lead store when the next worker process starts. Every
+save carries the session's lead_id, so saving a lead that was already
+(partly) saved updates it instead of duplicating it.
+"""
+import asyncio
+import contextlib
+import json
+import logging
+import os
+from collections.abc import Iterator
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+import psutil
+
+from lead_store import Lead, LeadStore, LeadWriter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT_DIR = Path("../shared-data/lead_checkpoints")
+
+
+class CheckpointDirectory:
+    """One JSON file per in-progress lead, tagged with the process that owns it."""
+
+    def __init__(self, directory: Path = DEFAULT_CHECKPOINT_DIR) -> None:
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def directory(self) -> Path:
+        return self._directory
+
+    def _path(self, lead_id: str) -> Path:
+        return self._directory / f"{lead_id}.json"
+
+    def save(self, lead: dict) -> None:
+        """Atomically replace a lead's checkpoint."""
+        path = self._path(lead["lead_id"])
+        tmp = path.with_name(f"{path.name}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"pid": os.getpid(), "lead": lead}, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def discard(self, lead_id: str) -> None:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self._path(lead_id))
+
+    def orphans(self) -> Iterator[dict]:
+        """Checkpointed leads whose owning process is no longer running."""
+        for path in sorted(self._directory.glob("*.json")):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    checkpoint = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable lead checkpoint {path}: {e}")
+                continue
+            pid = checkpoint.get("pid")
+            if pid != os.getpid() and pid is not None and psutil.pid_exists(pid):
+                continue  # a live call in another worker
+            lead = checkpoint["lead"]
+            if not lead.get("timestamp"):
+                lead["timestamp"] = datetime.fromtimestamp(path.stat().st_mtime).isoformat()
+            yield lead
+
+
+def recover_orphans(checkpoints: CheckpointDirectory, store: LeadStore) -> int:
+    """
+    Save leads checkpointed by dead workers to the lead store.
+
+    Safe to run while other workers are serving calls: their checkpoints are
+    left alone, and re-saving an already saved lead merges into it.
+
+    Returns:
+        Number of leads recovered
+    """
+    leads = list(checkpoints.orphans())
+    if not leads:
+        return 0
+    store.upsert_many(leads)
+    for lead in leads:
+        checkpoints.discard(lead["lead_id"])
+    logger.info(f"Recovered {len(leads)} partial leads from {checkpoints.directory}")
+    return len(leads)
+
+
+class LeadCheckpointer:
+    """Debounced checkpointing and final save of one session's lead."""
+
+    def __init__(
+        self,
+        lead: Lead,
+        checkpoints: CheckpointDirectory,
+        writer: LeadWriter,
+        save: Callable[[Lead], None],
+        *,
+        delay: float = 1.0,
+    ) -> None:
+        """
+        Start tracking a lead's changes.
+
+        Args:
+            lead: The session's lead; its on_change hook is taken over
+            checkpoints: Where partial leads are checkpointed
+            writer: The lead writer that save() submits to
+            save: Saves the lead to the lead store (the agent's save_lead)
+            delay: Seconds to wait after a change before checkpointing
+        """
+        self._lead = lead
+        self._checkpoints = checkpoints
+        self._writer = writer
+        self._save = save
+        self._delay = delay
+        self._pending: Optional[asyncio.Task] = None
+        self._waiting = False
+        self._checkpointed = False
+        self.writes = 0
+        lead.on_change = self.schedule
+
+    def schedule(self) -> None:
+        """Checkpoint after the debounce delay, unless a checkpoint is already pending."""
+        if self._pending is None or self._pending.done():
+            self._waiting = True
+            self._pending = asyncio.get_running_loop().create_task(self._sync_later())
+
+    async def _sync_later(self) -> None:
+        lead = self._lead
+        while True:
+            try:
+                await asyncio.sleep(self._delay)
+            finally:
+                self._waiting = False
+            state = lead.revision, lead.saved_revision
+            await self.sync()
+            # Changes made while writing were not scheduled separately; go round again for them
+            if (lead.revision, lead.saved_revision) == state:
+                return
+            self._waiting = True
+
+    async def sync(self) -> None:
+        """Bring the checkpoint in line with the lead: write it if unsaved, drop it once saved."""
+        lead = self._lead
+        if lead.unsaved:
+            if lead.has_data():
+                await asyncio.to_thread(self._checkpoints.save, lead.to_dict())
+                self._checkpointed = True
+                self.writes += 1
+        # Saved by end_call_summary; keep the checkpoint until the write is durable
+        elif self._checkpointed and await self._flush():
+            await asyncio.to_thread(self._checkpoints.discard, lead.lead_id)
+            self._checkpointed = False
+
+    async def aclose(self) -> None:
+        """Final flush: save an unsaved lead to the store and remove its checkpoint."""
+        if self._pending is not None and not self._pending.done():
+            if self._waiting:
+                self._pending.cancel()
+            else:
+                # Let a write already under way land first, or it could recreate the file after the discard
+                await self._pending
+        self._lead.on_change = None
+        if self._lead.unsaved and self._lead.has_data():
+            self._save(self._lead)
+        if await self._flush():
+            await asyncio.to_thread(self._checkpoints.discard, self._lead.lead_id)
+
+    async def _flush(self) -> bool:
+        """Wait for the lead's write; if it failed, checkpoint the lead as saved so it is recovered later."""
+        lead = self._lead
+        try:
+            await self._writer.flush(lead.lead_id)
+        except Exception as e:
+            logger.warning(f"Keeping checkpoint of lead {lead.lead_id}, its write failed: {e}")
+            if lead.has_data():
+                await asyncio.to_thread(self._checkpoints.save, lead.to_dict())
+                self._checkpointed = True
+            return False
+        return True
@@ -0,0 +1,416 @@
+"""
+Lead reports and filtered exports over arbitrarily large lead histories.
+
+Leads are read one at a time from the legacy ``leads.json`` array, the
+``leads.jsonl`` log or a ``leads.db`` database, so memory stays flat however
+large the file is. The report counts leads by timeline and team size
+(fixed buckets) and finds the most asked questions with the Misra-Gries
+heavy-hitters summary, which tracks a bounded number of candidates: counts
+are exact while there are fewer distinct questions than its capacity, and
+otherwise undercount by at most (questions seen) / (capacity + 1).
+
+Usage, from backend/:
+
+    python src/lead_report.py ../shared-data/leads.json
+    python src/lead_report.py --timeline now --since 2025-11-01 --output hot.csv
+    python src/lead_report.py --all-versions --json
+
+The JSONL log holds every saved version of a lead. Reports on a log count
+only the last version of each, merged as the lead store merges them, at the
+cost of a byte offset and the match keys per distinct lead; --all-versions
+counts every saved version.
+"""
+import argparse
+import csv
+import json
+import logging
+import re
+import sys
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Optional, TextIO
+
+from lead_store import (
+    DEFAULT_JSON_FILE,
+    DEFAULT_LOG_FILE,
+    Lead,
+    SQLiteLeadStore,
+    iter_current,
+    iter_jsonl,
+)
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1 << 16
+TIMELINES = ("now", "soon", "later")
+# Upper bounds of the team size buckets
+TEAM_SIZE_BUCKETS = ((1, "1"), (10, "2-10"), (50, "11-50"), (200, "51-200"), (1000, "201-1000"))
+CSV_COLUMNS = ("lead_id", *Lead.FIELDS, "questions_asked", "conversation_summary", "timestamp")
+
+_NUMBER_RE = re.compile(r"\d[\d,]*")
+_WORD_RE = re.compile(r"[^\W_]+")
+_DELIMITERS = frozenset(" \t\r\n,]")
+
+
+def iter_json_array(f: TextIO, chunk_size: int = CHUNK_SIZE) -> Iterator:
+    """
+    Yield the elements of a top-level JSON array without loading the whole file.
+
+    Only the element being decoded (plus one read chunk) is held in memory.
+
+    Raises:
+        ValueError: If the input is not a well-formed JSON array
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+
+    def skip_whitespace() -> bool:
+        # Moves pos to the next significant character, reading more as needed; False at EOF
+        nonlocal buf, pos, eof
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buf):
+                return True
+            if eof:
+                return False
+            buf, pos = f.read(chunk_size), 0
+            eof = not buf
+
+    if not skip_whitespace() or buf[pos] != "[":
+        raise ValueError("Expected a JSON array")
+    pos += 1
+    expect_value = True
+    while True:
+        if not skip_whitespace():
+            raise ValueError("Unterminated JSON array")
+        char = buf[pos]
+        if char == "]":
+            return
+        if not expect_value:
+            if char != ",":
+                raise ValueError(f"Expected ',' or ']' in JSON array, got {char!r}")
+            pos += 1
+            expect_value = True
+            continue
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # Most likely the element continues past the buffer; keep reading until it doesn't
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    raise
+                buf = buf[pos:] + chunk
+                pos = 0
+                continue
+            # A number or literal cut off by the buffer ("2" of "2.5") still decodes;
+            # only trust it once a delimiter follows
+            if not isinstance(value, (dict, list, str)) and not eof and (end == len(buf) or buf[end] not in _DELIMITERS):
+                chunk = f.read(chunk_size)
+                if chunk:
+                    buf = buf[pos:] + chunk
+                    pos = 0
+                    continue
+                eof = True
+            break
+        yield value
+        pos = end
+        expect_value = False
+
+
+def is_jsonl(path: Path) -> bool:
+    """Whether a leads file is a JSON Lines log (one record per save) rather than a JSON array or database."""
+    path = Path(path)
+    if path.suffix == ".db":
+        return False
+    with open(path, encoding="utf-8") as f:
+        first = f.read(1)
+        while first and first.isspace():
+            first = f.read(1)
+    return first != "["
+
+
+def iter_leads(path: Path) -> Iterator[dict]:
+    """
+    Stream leads from a JSON array, a JSON Lines log or a SQLite lead database.
+
+    The format is taken from the file itself (or the .db suffix), not the
+    file name, so an array saved as .jsonl still reads correctly.
+    """
+    path = Path(path)
+    if path.suffix == ".db":
+        store = SQLiteLeadStore(path)
+        try:
+            yield from store
+        finally:
+            store.close()
+        return
+    if is_jsonl(path):
+        yield from iter_jsonl(path)
+        return
+    with open(path, encoding="utf-8") as f:
+        for index, lead in enumerate(iter_json_array(f)):
+            if isinstance(lead, dict):
+                yield lead
+            else:
+                logger.warning(f"Skipping non-object lead at index {index} of {path}")
+
+
+def latest_versions(path: Path) -> Iterator[dict]:
+    """
+    Stream the last saved version of each lead in a JSON Lines log, in first-seen order.
+
+    Records without a lead_id (written before ids existed, or migrated from
+    leads.json) are merged into the lead they match the way the lead store
+    does, so a returning visitor is counted once.
+    """
+    return iter_current(path)
+
+
+def current_leads(path: Path) -> Iterator[dict]:
+    """
+    Stream each lead once.
+
+    A JSON Lines log yields the last saved version of each lead (see
+    latest_versions); arrays and databases already hold one record per lead.
+    """
+    return latest_versions(path) if is_jsonl(path) else iter_leads(path)
+
+
+class FrequentItems:
+    """Misra-Gries summary: approximate most frequent items in bounded memory."""
+
+    def __init__(self, capacity: int = 1000) -> None:
+        """
+        Create an empty summary.
+
+        Args:
+            capacity: Maximum number of candidate items tracked at once
+        """
+        self._capacity = capacity
+        self._counts: dict[str, int] = {}
+        # The first spelling seen of each tracked item, for display
+        self._labels: dict[str, str] = {}
+        self.total = 0
+
+    def add(self, key: str, label: Optional[str] = None) -> None:
+        self.total += 1
+        if key in self._counts:
+            self._counts[key] += 1
+        elif len(self._counts) < self._capacity:
+            self._counts[key] = 1
+            self._labels[key] = label or key
+        else:
+            # Cancel one occurrence of every candidate against the new item; amortized O(1)
+            for tracked in list(self._counts):
+                self._counts[tracked] -= 1
+                if not self._counts[tracked]:
+                    del self._counts[tracked]
+                    del self._labels[tracked]
+
+    def most_common(self, n: int) -> list[tuple[str, int]]:
+        """Up to n (label, count) pairs, most frequent first."""
+        top = sorted(self._counts.items(), key=lambda item: (-item[1], item[0]))[:n]
+        return [(self._labels[key], count) for key, count in top]
+
+
+def team_size_bucket(value) -> str:
+    """Bucket a free-text team size ("10", "about 50 people", "1,200")."""
+    match = _NUMBER_RE.search(str(value)) if value not in (None, "") else None
+    if match is None:
+        return "unknown"
+    size = int(match.group().replace(",", ""))
+    for upper, label in TEAM_SIZE_BUCKETS:
+        if size <= upper:
+            return label
+    return f"{TEAM_SIZE_BUCKETS[-1][0] + 1}+"
+
+
+def timeline_bucket(value) -> str:
+    if value in (None, ""):
+        return "unknown"
+    value = str(value).strip().casefold()
+    return value if value in TIMELINES else "other"
+
+
+class LeadReport:
+    """Aggregates over a stream of leads, in memory independent of its length."""
+
+    def __init__(self, question_capacity: int = 1000) -> None:
+        self.total = 0
+        self.with_email = 0
+        self.timelines = dict.fromkeys((*TIMELINES, "other", "unknown"), 0)
+        self.team_sizes = dict.fromkeys([label for _, label in TEAM_SIZE_BUCKETS], 0)
+        self.team_sizes[f"{TEAM_SIZE_BUCKETS[-1][0] + 1}+"] = 0
+        self.team_sizes["unknown"] = 0
+        self.questions = FrequentItems(question_capacity)
+
+    def add(self, lead: dict) -> None:
+        self.total += 1
+        if lead.get("email"):
+            self.with_email += 1
+        self.timelines[timeline_bucket(lead.get("timeline"))] += 1
+        self.team_sizes[team_size_bucket(lead.get("team_size"))] += 1
+        seen = set()
+        for question in lead.get("questions_asked") or []:
+            key = " ".join(_WORD_RE.findall(str(question).casefold()))
+            if key and key not in seen:
+                seen.add(key)
+                self.questions.add(key, str(question).strip())
+
+    def to_dict(self, top: int = 10) -> dict:
+        return {
+            "total": self.total,
+            "with_email": self.with_email,
+            "timeline": self.timelines,
+            "team_size": self.team_sizes,
+            "top_questions": [{"question": q, "count": n} for q, n in self.questions.most_common(top)],
+        }
+
+    def format(self, top: int = 10) -> str:
+        lines = [f"Leads: {self.total} ({self.with_email} with email)", "", "By timeline:"]
+        lines.extend(f"  {name:<10} {count}" for name, count in self.timelines.items())
+        lines.extend(["", "By team size:"])
+        lines.extend(f"  {name:<10} {count}" for name, count in self.team_sizes.items())
+        lines.extend(["", "Most asked questions:"])
+        lines.extend(f"  {count:>6}  {question}" for question, count in self.questions.most_common(top))
+        return "\n".join(lines)
+
+
+def lead_filter(
+    *,
+    timeline: Optional[str] = None,
+    company: Optional[str] = None,
+    email: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    min_team_size: Optional[int] = None,
+):
+    """
+    Build a predicate selecting leads.
+
+    Args:
+        timeline: Exact timeline, e.g. "now" (case-insensitive)
+        company: Substring of the company name (case-insensitive)
+        email: Exact email address (case-insensitive)
+        since: ISO timestamp or date, inclusive
+        until: ISO timestamp or date, exclusive
+        min_team_size: Smallest team size to include; leads without one are excluded
+    """
+
+    def matches(lead: dict) -> bool:
+        if timeline is not None and timeline_bucket(lead.get("timeline")) != timeline.casefold():
+            return False
+        if company is not None and company.casefold() not in str(lead.get("company") or "").casefold():
+            return False
+        if email is not None and str(lead.get("email") or "").strip().casefold() != email.strip().casefold():
+            return False
+        timestamp = lead.get("timestamp") or ""
+        if since is not None and timestamp < since:
+            return False
+        if until is not None and (not timestamp or timestamp >= until):
+            return False
+        if min_team_size is not None:
+            match = _NUMBER_RE.search(str(lead.get("team_size") or ""))
+            if match is None or int(match.group().replace(",", "")) < min_team_size:
+                return False
+        return True
+
+    return matches
+
+
+class CSVOutput:
+    """Writes leads as CSV rows, questions joined with " | "."""
+
+    def __init__(self, f: TextIO) -> None:
+        self._writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+        self._writer.writeheader()
+
+    def write(self, lead: dict) -> None:
+        row = {column: lead.get(column) for column in CSV_COLUMNS}
+        row["questions_asked"] = " | ".join(str(q) for q in lead.get("questions_asked") or [])
+        self._writer.writerow(row)
+
+
+class JSONLOutput:
+    """Writes leads as JSON Lines."""
+
+    def __init__(self, f: TextIO) -> None:
+        self._f = f
+
+    def write(self, lead: dict) -> None:
+        self._f.write(json.dumps(lead, ensure_ascii=False) + "\n")
+
+
+def run(leads: Iterable[dict], matches, out=None, question_capacity: int = 1000) -> LeadReport:
+    """Aggregate the matching leads, also writing each to out (a CSVOutput or JSONLOutput) if given."""
+    report = LeadReport(question_capacity)
+    for lead in leads:
+        if not matches(lead):
+            continue
+        report.add(lead)
+        if out is not None:
+            out.write(lead)
+    return report
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    default_input = DEFAULT_LOG_FILE if DEFAULT_LOG_FILE.exists() else DEFAULT_JSON_FILE
+    parser = argparse.ArgumentParser(description="Lead report and filtered export")
+    parser.add_argument("input", nargs="?", type=Path, default=default_input, help=f"Leads file (default {default_input})")
+    parser.add_argument(
+        "--all-versions",
+        action="store_true",
+        help="Count every saved version of each lead in a JSONL log, not just the last",
+    )
+
+    filters = parser.add_argument_group("filters")
+    filters.add_argument("--timeline", help="now, soon, later, other or unknown")
+    filters.add_argument("--company", help="Company name contains this")
+    filters.add_argument("--email")
+    filters.add_argument("--since", help="ISO date or timestamp, inclusive")
+    filters.add_argument("--until", help="ISO date or timestamp, exclusive")
+    filters.add_argument("--min-team-size", type=int)
+
+    output = parser.add_argument_group("output")
+    output.add_argument("--output", type=Path, help="Write matching leads to this file")
+    output.add_argument("--format", choices=("csv", "jsonl"), help="Output format (default: from the --output suffix)")
+    output.add_argument("--top", type=int, default=10, help="Number of top questions to show")
+    output.add_argument("--question-capacity", type=int, default=1000, help="Distinct questions tracked at once")
+    output.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    matches = lead_filter(
+        timeline=args.timeline,
+        company=args.company,
+        email=args.email,
+        since=args.since,
+        until=args.until,
+        min_team_size=args.min_team_size,
+    )
+    leads = iter_leads(args.input) if args.all_versions else current_leads(args.input)
+    fmt = args.format or ("csv" if args.output and args.output.suffix == ".csv" else "jsonl")
+    if args.output is None:
+        report = run(leads, matches, question_capacity=args.question_capacity)
+    else:
+        # Written to a temporary name first, so an interrupted run leaves no half file behind
+        tmp = args.output.with_name(f"{args.output.name}.tmp")
+        with open(tmp, "w", encoding="utf-8", newline="") as f:
+            out = CSVOutput(f) if fmt == "csv" else JSONLOutput(f)
+            report = run(leads, matches, out, question_capacity=args.question_capacity)
+        tmp.replace(args.output)
+
+    if args.json:
+        json.dump(report.to_dict(args.top), sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    else:
+        print(report.format(args.top))
+    if args.output is not None:
+        print(f"\nWrote {report.total} leads to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
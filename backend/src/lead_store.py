@@ -0,0 +1,1098 @@
+"""
+Durable lead storage.
+
+Two backends share the same small interface (append, upsert, iteration,
+close):
+
+- JSONLLeadStore appends each lead to a JSON Lines log under an exclusive
+  file lock, so saving costs the same no matter how many leads exist and
+  concurrent sessions never overwrite each other.
+- SQLiteLeadStore keeps leads in an embedded WAL-mode database with indexes
+  for lookups by email, company, timeline and date range.
+
+A returning visitor is the same lead, not a new one: upserts match a session
+against existing leads by its lead id (a session saved more than once),
+email, or else normalized name and company, and merge it into the match
+field by field (see merge_leads). Each lead
+carries a stable ``lead_id``. The JSONL log stays append-only, with every
+version of a lead appended and the latest winning; a LeadOffsets index of
+byte offsets finds matches with dict lookups and reads the matched version
+back from the log. It is saved beside the log on close, so the next
+process only reads what was appended since. SQLite updates the matched row
+in place.
+
+LeadWriter moves the actual disk I/O onto a single background task so tools
+never block the event loop. The legacy ``leads.json`` array can be produced
+offline with:
+
+    python src/lead_store.py export
+"""
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import queue
+import re
+import sqlite3
+import threading
+import uuid
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOG_FILE = Path("../shared-data/leads.jsonl")
+DEFAULT_JSON_FILE = Path("../shared-data/leads.json")
+DEFAULT_DB_FILE = Path("../shared-data/leads.db")
+
+# Columns promoted out of the JSON payload so they can be indexed
+_COLUMNS = ("name", "company", "email", "role", "use_case", "team_size", "timeline", "timestamp")
+# Plus the lead's stable id and its normalized name/company for upsert matching
+_ROW_COLUMNS = (*_COLUMNS, "lead_id", "identity", "data")
+_INSERT_SQL = f"INSERT INTO leads ({', '.join(_ROW_COLUMNS)}) VALUES ({', '.join('?' * len(_ROW_COLUMNS))})"
+_UPDATE_SQL = f"UPDATE leads SET {', '.join(c + ' = ?' for c in _ROW_COLUMNS)} WHERE id = ?"
+
+_WORD_RE = re.compile(r"[^\W_]+")
+# Dropped when comparing company names, so "Acme Inc." matches "acme"
+_COMPANY_SUFFIXES = frozenset({
+    "inc", "incorporated", "llc", "llp", "ltd", "limited", "pvt", "private",
+    "corp", "corporation", "co", "company", "gmbh", "plc", "sa", "ag",
+})
+# Bump when the saved offset index layout changes so old files are rebuilt
+_OFFSETS_VERSION = 2
+# Records indexed between saves of the offset index
+DEFAULT_INDEX_SAVE_EVERY = 1000
+# Bytes of the log before the indexed size that a saved index must match
+_OFFSETS_TAIL = 64
+
+
+class Lead:
+    """
+    Lead details gathered during a single session.
+
+    Each AgentSession owns its own Lead (as its userdata), so one worker
+    process can host many concurrent calls without them sharing state.
+    """
+
+    # Fields the agent may fill in through collect_lead_info
+    FIELDS = ("name", "company", "email", "role", "use_case", "team_size", "timeline")
+
+    __slots__ = (
+        *FIELDS,
+        "questions_asked",
+        "conversation_summary",
+        "timestamp",
+        "lead_id",
+        "revision",
+        "saved_revision",
+        "on_change",
+    )
+
+    def __init__(self, **values) -> None:
+        for field in self.FIELDS:
+            setattr(self, field, values.get(field))
+        self.questions_asked: list[str] = list(values.get("questions_asked") or [])
+        self.conversation_summary: Optional[str] = values.get("conversation_summary")
+        self.timestamp: Optional[str] = values.get("timestamp")
+        # Stable across saves of one session, so re-saving updates the same stored lead
+        self.lead_id: str = values.get("lead_id") or _new_lead_id()
+        # Bumped on every change; saved_revision is the revision last handed to the store
+        self.revision = 0
+        self.saved_revision = 0
+        self.on_change: Optional[Callable[[], None]] = None
+
+    def set_field(self, field: str, value) -> bool:
+        """Set a collectable field; returns False for unknown fields."""
+        if field not in self.FIELDS:
+            return False
+        setattr(self, field, value)
+        self._changed()
+        return True
+
+    def add_question(self, question: str) -> None:
+        if question not in self.questions_asked:
+            self.questions_asked.append(question)
+            self._changed()
+
+    def _changed(self) -> None:
+        self.revision += 1
+        if self.on_change is not None:
+            self.on_change()
+
+    def mark_saved(self) -> None:
+        """Record that the current revision was handed to the lead store."""
+        self.saved_revision = self.revision
+        if self.on_change is not None:
+            self.on_change()
+
+    @property
+    def unsaved(self) -> bool:
+        """Whether the lead changed since it was last saved."""
+        return self.revision != self.saved_revision
+
+    def has_data(self) -> bool:
+        """Whether anything worth keeping was collected."""
+        return bool(self.questions_asked or any(getattr(self, field) for field in self.FIELDS))
+
+    def to_dict(self) -> dict:
+        """Snapshot in the stored record layout."""
+        record = {"lead_id": self.lead_id}
+        record.update((field, getattr(self, field)) for field in self.FIELDS)
+        record["questions_asked"] = list(self.questions_asked)
+        record["conversation_summary"] = self.conversation_summary
+        record["timestamp"] = self.timestamp
+        return record
+
+
+def _words(value) -> list[str]:
+    return _WORD_RE.findall(str(value).casefold()) if value not in (None, "") else []
+
+
+def normalize_email(value) -> Optional[str]:
+    """Email address compared case-insensitively, or None if absent."""
+    if value in (None, ""):
+        return None
+    return str(value).strip().casefold() or None
+
+
+def identity_key(lead: dict) -> Optional[str]:
+    """
+    Normalized name and company of a lead, or None unless both are known.
+
+    Case, punctuation and legal suffixes are ignored, so "Dave Smith" at
+    "Acme, Inc." and "dave smith" at "ACME" are the same person. A name alone
+    (or a company alone) is too ambiguous to merge on.
+    """
+    name = " ".join(_words(lead.get("name")))
+    company = [word for word in _words(lead.get("company")) if word not in _COMPANY_SUFFIXES]
+    if not name or not company:
+        return None
+    return f"{name}|{' '.join(company)}"
+
+
+def _same_question(question: str) -> str:
+    return " ".join(_words(question))
+
+
+def merge_leads(existing: dict, new: dict) -> dict:
+    """
+    Merge a later session's lead (or a later save of the same session) into an existing one.
+
+    Known values from the new session replace older ones, but a field the
+    new session left empty keeps its earlier value. Questions are appended,
+    skipping ones already asked (ignoring case and punctuation). The lead_id
+    of the existing lead is kept.
+    """
+    merged = dict(existing)
+    for field, value in new.items():
+        if field in ("lead_id", "questions_asked") or value in (None, ""):
+            continue
+        merged[field] = value
+    questions = list(existing.get("questions_asked") or [])
+    seen = {_same_question(question) for question in questions}
+    for question in new.get("questions_asked") or []:
+        key = _same_question(question)
+        if key not in seen:
+            seen.add(key)
+            questions.append(question)
+    merged["questions_asked"] = questions
+    return merged
+
+
+def _new_lead_id() -> str:
+    return uuid.uuid4().hex
+
+
+def _legacy_lead_id(record: dict) -> str:
+    # Derived from the content so every process reading the same log agrees on it
+    return uuid.uuid5(uuid.NAMESPACE_OID, json.dumps(record, sort_keys=True, ensure_ascii=False)).hex
+
+
+def _compatible(existing: dict, new: dict) -> bool:
+    # Two different email addresses are two different people, whatever their names
+    emails = normalize_email(existing.get("email")), normalize_email(new.get("email"))
+    return None in emails or emails[0] == emails[1]
+
+
+def _hash_key(value: str) -> int:
+    # 64-bit digest, stable across processes so a saved index stays valid
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class _PackedMap:
+    """
+    64-bit integer -> 64-bit integer map, 16 bytes an entry.
+
+    Entries live in sorted numpy arrays searched by bisection; new entries
+    go to a small dict that is merged into the arrays once it reaches a
+    quarter of their size, so building a map of n entries costs O(n log n).
+    """
+
+    def __init__(self, keys: Optional[np.ndarray] = None, values: Optional[np.ndarray] = None) -> None:
+        self._keys = np.empty(0, np.uint64) if keys is None else keys.astype(np.uint64)
+        self._values = np.empty(0, np.uint64) if values is None else values.astype(np.uint64)
+        self._recent: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        self._pack()
+        return len(self._keys)
+
+    def __contains__(self, key: int) -> bool:
+        return self.get(key) is not None
+
+    def get(self, key: int) -> Optional[int]:
+        value = self._recent.get(key)
+        if value is not None:
+            return value
+        i = int(np.searchsorted(self._keys, np.uint64(key)))
+        if i < len(self._keys) and int(self._keys[i]) == key:
+            return int(self._values[i])
+        return None
+
+    def __setitem__(self, key: int, value: int) -> None:
+        self._recent[key] = value
+        if len(self._recent) >= max(4096, len(self._keys) // 4):
+            self._pack()
+
+    def arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        """Keys, sorted, and their values."""
+        self._pack()
+        return self._keys, self._values
+
+    def _pack(self) -> None:
+        if not self._recent:
+            return
+        keys = np.concatenate([self._keys, np.fromiter(self._recent, np.uint64, len(self._recent))])
+        values = np.concatenate([self._values, np.fromiter(self._recent.values(), np.uint64, len(self._recent))])
+        self._recent.clear()
+        # Stable, so the newer value of a duplicate key sorts last and is kept
+        order = np.argsort(keys, kind="stable")
+        keys, values = keys[order], values[order]
+        last = np.append(keys[1:] != keys[:-1], True)
+        self._keys, self._values = keys[last], values[last]
+
+
+class LeadOffsets:
+    """
+    Where the current version of every lead sits in a lead log.
+
+    Holds only byte offsets and 64-bit hashes of the match keys, in packed
+    arrays of about 50 bytes per lead, so memory stays small however many
+    leads the log has; records are read back from the log when a match
+    needs merging. A lead is normally one offset, that of its latest
+    version. Legacy records without an id that belong to a lead add theirs,
+    to be merged in order. Leads keep the order in which they were first seen.
+    """
+
+    def __init__(self, read: Callable[[int], dict]) -> None:
+        """
+        Create an empty index.
+
+        Args:
+            read: Returns the record stored at a byte offset of the log
+        """
+        self._read = read
+        # Hashed lead_id -> offset of its latest version, and of its first (for ordering)
+        self._latest = _PackedMap()
+        self._first = _PackedMap()
+        # Hashed lead_id -> offsets to merge in order, for leads with folded legacy records
+        self._merged: dict[int, tuple[int, ...]] = {}
+        # Hashed email / name and company -> hashed lead_id
+        self._by_email = _PackedMap()
+        self._by_identity = _PackedMap()
+
+    def __len__(self) -> int:
+        return len(self._first)
+
+    def __iter__(self) -> Iterator[dict]:
+        keys, first = self._first.arrays()
+        return (self._get(int(key)) for key in keys[np.argsort(first, kind="stable")])
+
+    def __contains__(self, lead_id: str) -> bool:
+        return _hash_key(lead_id) in self._latest
+
+    def get(self, lead_id: str) -> dict:
+        """The current version of a known lead."""
+        return self._get(_hash_key(lead_id))
+
+    def _get(self, key: int) -> dict:
+        first, *rest = self._merged.get(key) or (self._latest.get(key),)
+        record = self._read(first)
+        if not record.get("lead_id"):
+            # A lead that began as a legacy record has the id derived from it
+            record = {**record, "lead_id": _legacy_lead_id(record)}
+        for offset in rest:
+            record = merge_leads(record, self._read(offset))
+        return record
+
+    def find(self, lead: dict) -> Optional[dict]:
+        """The existing lead this one belongs to, if any."""
+        lead_id = lead.get("lead_id")
+        if lead_id and _hash_key(lead_id) in self._latest:
+            return self._get(_hash_key(lead_id))
+        email = normalize_email(lead.get("email"))
+        key = None if email is None else self._by_email.get(_hash_key(email))
+        if key is not None:
+            return self._get(key)
+        identity = identity_key(lead)
+        key = None if identity is None else self._by_identity.get(_hash_key(identity))
+        if key is not None:
+            existing = self._get(key)
+            if _compatible(existing, lead):
+                return existing
+        return None
+
+    def upsert(self, lead: dict, offset: int) -> dict:
+        """
+        Merge a session's lead into its match, or add it.
+
+        Args:
+            lead: The session's lead
+            offset: Where the returned version will be written in the log
+
+        Returns:
+            The lead's new version, with its lead_id
+        """
+        existing = self.find(lead)
+        if existing is None:
+            record = {**lead, "lead_id": lead.get("lead_id") or _new_lead_id()}
+        else:
+            record = merge_leads(existing, lead)
+        self._put(record, offset)
+        return record
+
+    def load(self, record: dict, offset: int) -> None:
+        """Fold in the record stored at an offset: a version of a known lead, or a legacy record without an id."""
+        if record.get("lead_id"):
+            self._put(record, offset)
+            return
+        existing = self.find(record)
+        if existing is None:
+            self._put({**record, "lead_id": _legacy_lead_id(record)}, offset)
+        else:
+            key = self._add_keys(merge_leads(existing, record))
+            self._merged[key] = (*(self._merged.get(key) or (self._latest.get(key),)), offset)
+
+    def _put(self, record: dict, offset: int) -> None:
+        key = self._add_keys(record)
+        if key not in self._latest:
+            self._first[key] = offset
+        self._latest[key] = offset
+        # A full version supersedes any folded legacy records
+        self._merged.pop(key, None)
+
+    def _add_keys(self, record: dict) -> int:
+        key = _hash_key(record["lead_id"])
+        email = normalize_email(record.get("email"))
+        if email is not None:
+            self._by_email[_hash_key(email)] = key
+        identity = identity_key(record)
+        if identity is not None:
+            self._by_identity[_hash_key(identity)] = key
+        return key
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        """The index as named arrays, for np.savez."""
+        arrays = {}
+        for name in ("latest", "first", "by_email", "by_identity"):
+            arrays[f"{name}_keys"], arrays[f"{name}_values"] = getattr(self, f"_{name}").arrays()
+        arrays["merged_keys"] = np.fromiter(self._merged, np.uint64, len(self._merged))
+        arrays["merged_lengths"] = np.fromiter(map(len, self._merged.values()), np.int64, len(self._merged))
+        arrays["merged_offsets"] = np.array([o for offsets in self._merged.values() for o in offsets], np.uint64)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, read: Callable[[int], dict]) -> "LeadOffsets":
+        index = cls(read)
+        for name in ("latest", "first", "by_email", "by_identity"):
+            setattr(index, f"_{name}", _PackedMap(arrays[f"{name}_keys"], arrays[f"{name}_values"]))
+        offsets = iter(arrays["merged_offsets"].tolist())
+        index._merged = {
+            key: tuple(next(offsets) for _ in range(length))
+            for key, length in zip(arrays["merged_keys"].tolist(), arrays["merged_lengths"].tolist())
+        }
+        return index
+
+
+@contextlib.contextmanager
+def _locked(f):
+    """Hold an exclusive lock on an open file for the duration of a write."""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class JSONLLeadStore:
+    """Append-only JSON Lines lead log."""
+
+    def __init__(
+        self,
+        path: Path = DEFAULT_LOG_FILE,
+        *,
+        fsync_every: int = 0,
+        index_save_every: int = DEFAULT_INDEX_SAVE_EVERY,
+    ) -> None:
+        """
+        Open (or create) a lead log.
+
+        Args:
+            path: Location of the .jsonl file
+            fsync_every: fsync after this many appended leads; 0 leaves
+                flushing to the OS and only syncs on close()
+            index_save_every: Save the offset index for the next process
+                once this many records were indexed since it was last saved
+                (and on close)
+        """
+        self._path = Path(path)
+        self._fsync_every = fsync_every
+        self._unsynced = 0
+        self._index_save_every = index_save_every
+        self._unsaved = 0
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._files = contextlib.ExitStack()
+        self._file = self._files.enter_context(self._path.open("ab"))
+        self._reader = None
+        # Built on the first upsert from the last saved index plus whatever was
+        # appended after it, then kept current by reading only new lines
+        self._offsets: Optional[LeadOffsets] = None
+        self._indexed_to = 0
+        self._ends_with_newline = True
+        # Versions of the batch being upserted, by offset, until they are written
+        self._pending: dict[int, dict] = {}
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @property
+    def index_path(self) -> Path:
+        """Where the offset index is saved for the next process."""
+        return self._path.with_name(f"{self._path.name}.idx")
+
+    def append(self, lead: dict) -> None:
+        """Append one lead as a single JSON line."""
+        self.append_many([lead])
+
+    def append_many(self, leads: list[dict]) -> None:
+        """Append several leads with a single locked write."""
+        with _locked(self._file):
+            self._write([_encode(lead) for lead in leads])
+
+    def upsert_many(self, leads: list[dict]) -> list[dict]:
+        """
+        Merge several session leads into the leads they belong to.
+
+        Other processes may append to the same log, so the index first
+        reads whatever was added since it last looked: the bulk of it
+        without the file lock, so building the index of a large log never
+        blocks other workers, then the last few lines under it. The merged
+        versions are then appended in one write.
+
+        Returns:
+            The new version of each lead, with its lead_id
+        """
+        self._catch_up(complete_only=True)
+        with _locked(self._file):
+            self._catch_up()
+            offset = self._indexed_to + (0 if self._ends_with_newline else 1)
+            records, lines = [], []
+            try:
+                for lead in leads:
+                    record = self._offsets.upsert(lead, offset)
+                    line = _encode(record)
+                    self._pending[offset] = record
+                    offset += len(line)
+                    records.append(record)
+                    lines.append(line)
+                self._write(lines)
+            except BaseException:
+                # The index may point at versions that never reached the log
+                self._offsets = None
+                self._indexed_to = 0
+                raise
+            finally:
+                self._pending.clear()
+            self._indexed_to = os.fstat(self._file.fileno()).st_size
+            self._unsaved += len(records)
+        if self._unsaved >= self._index_save_every:
+            self._save_index()
+        return records
+
+    def _catch_up(self, *, complete_only: bool = False) -> None:
+        """
+        Index what was appended since the last look.
+
+        Args:
+            complete_only: Stop before a final line without a newline, which
+                may be a write in progress when the file lock isn't held
+        """
+        if self._reader is None:
+            self._reader = self._files.enter_context(self._path.open("rb"))
+        if self._offsets is None:
+            self._offsets = self._load_index() or LeadOffsets(self._read)
+        size = os.fstat(self._file.fileno()).st_size
+        if size <= self._indexed_to:
+            return
+        start = self._indexed_to
+        self._indexed_to, ends_with_newline, count = _scan(
+            self._reader, start, self._offsets, complete_only=complete_only
+        )
+        if self._indexed_to > start:
+            self._ends_with_newline = ends_with_newline
+        self._unsaved += count
+
+    def _read(self, offset: int) -> dict:
+        record = self._pending.get(offset)
+        if record is not None:
+            return record
+        self._reader.seek(offset)
+        return json.loads(self._reader.readline())
+
+    def _load_index(self) -> Optional[LeadOffsets]:
+        """The saved offset index, if it still describes the start of this log."""
+        try:
+            with np.load(self.index_path, allow_pickle=False) as data:
+                if int(data["version"]) != _OFFSETS_VERSION:
+                    return None
+                size, tail = int(data["size"]), data["tail"].tobytes()
+                if not 0 < size <= os.fstat(self._reader.fileno()).st_size:
+                    return None
+                self._reader.seek(size - len(tail))
+                if self._reader.read(len(tail)) != tail:
+                    return None
+                index = LeadOffsets.from_arrays(data, self._read)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable lead index {self.index_path}: {e}")
+            return None
+        self._indexed_to = size
+        self._ends_with_newline = tail.endswith(b"\n")
+        return index
+
+    def _save_index(self) -> None:
+        if self._offsets is None or not self._indexed_to:
+            return
+        self._reader.seek(max(0, self._indexed_to - _OFFSETS_TAIL))
+        tail = self._reader.read(self._indexed_to - self._reader.tell())
+        # Other processes sharing the log save theirs too; each is valid for the prefix it indexed
+        tmp = self.index_path.with_name(f"{self.index_path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp, "wb") as f:
+                np.savez(
+                    f,
+                    version=np.int64(_OFFSETS_VERSION),
+                    size=np.int64(self._indexed_to),
+                    tail=np.frombuffer(tail, np.uint8),
+                    **self._offsets.to_arrays(),
+                )
+            os.replace(tmp, self.index_path)
+        except OSError as e:
+            logger.warning(f"Could not save lead index {self.index_path}: {e}")
+            return
+        self._unsaved = 0
+
+    def _write(self, lines: list[bytes]) -> None:
+        data = b"".join(lines)
+        if not self._ends_with_newline:
+            # Don't glue the first record onto a torn line left by a crash
+            data = b"\n" + data
+            self._ends_with_newline = True
+        self._file.write(data)
+        self._file.flush()
+        self._unsynced += len(lines)
+        if self._fsync_every and self._unsynced >= self._fsync_every:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter_jsonl(self._path)
+
+    def current(self) -> Iterator[dict]:
+        """The latest version of each lead, duplicates merged, in first-seen order."""
+        return iter_current(self._path)
+
+    def is_empty(self) -> bool:
+        return self._path.stat().st_size == 0
+
+    def close(self) -> None:
+        """Sync any unsynced leads to disk, save the offset index and close the log."""
+        if self._file.closed:
+            return
+        if self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+        if self._unsaved:
+            self._save_index()
+        self._files.close()
+
+
+def _encode(lead: dict) -> bytes:
+    return json.dumps(lead, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+def _scan(f, start: int, offsets: LeadOffsets, *, complete_only: bool = False) -> tuple[int, bool, int]:
+    """
+    Index the records of a lead log from a byte offset to its end.
+
+    Args:
+        f: The log, opened for binary reading
+        start: Offset of the first line to index
+        offsets: The index to add records to
+        complete_only: Stop before a final line without a newline
+
+    Returns:
+        The offset scanned to, whether the log ends with a complete line,
+        and the number of records indexed
+    """
+    f.seek(start)
+    offset, ends_with_newline, count = start, True, 0
+    for line in iter(f.readline, b""):
+        ends_with_newline = line.endswith(b"\n")
+        if complete_only and not ends_with_newline:
+            return offset, True, count
+        stripped = line.strip()
+        if stripped:
+            try:
+                record = json.loads(stripped)
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping malformed lead at byte {offset} of {f.name}")
+            else:
+                offsets.load(record, offset)
+                count += 1
+                # Reading back a match to merge into moves the file position
+                f.seek(offset + len(line))
+        offset += len(line)
+    return offset, ends_with_newline, count
+
+
+def iter_current(path: Path) -> Iterator[dict]:
+    """
+    Stream the latest version of each lead in a JSON Lines log, in first-seen order.
+
+    Legacy records without a lead_id are merged into the lead they match,
+    exactly as upserts do, so a migrated visitor who came back is one lead.
+    Only a LeadOffsets index is held in memory.
+    """
+    if not Path(path).exists():
+        return
+    with open(path, "rb") as f:
+
+        def read(offset: int) -> dict:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+        offsets = LeadOffsets(read)
+        _scan(f, 0, offsets)
+        yield from offsets
+
+
+def iter_jsonl(path: Path) -> Iterator[dict]:
+    """
+    Stream leads from a JSON Lines log.
+
+    A torn final line left by a crash mid-write is skipped rather than
+    failing the whole read.
+    """
+    if not Path(path).exists():
+        return
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping malformed lead on line {line_no} of {path}")
+
+
+class SQLiteLeadStore:
+    """Lead store backed by an embedded SQLite database in WAL mode."""
+
+    def __init__(self, path: Path = DEFAULT_DB_FILE) -> None:
+        """
+        Open (or create) a lead database.
+
+        Args:
+            path: Location of the SQLite file
+        """
+        self._path = Path(path)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        # One connection shared between the writer thread and queries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self._path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                f"""CREATE TABLE IF NOT EXISTS leads (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    {", ".join(column + " TEXT" for column in _COLUMNS)},
+                    data TEXT NOT NULL
+                )"""
+            )
+            # Added for upserts; databases created before then gain them here
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(leads)")}
+            for column in ("lead_id", "identity"):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE leads ADD COLUMN {column} TEXT")
+            if "identity" not in columns:
+                rows = self._conn.execute("SELECT id, data FROM leads").fetchall()
+                self._conn.executemany(
+                    "UPDATE leads SET identity = ? WHERE id = ?",
+                    [(identity_key(json.loads(data)), row_id) for row_id, data in rows],
+                )
+            self._conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_leads_lead_id ON leads (lead_id)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_leads_identity ON leads (identity)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_leads_email ON leads (email COLLATE NOCASE)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_leads_company ON leads (company COLLATE NOCASE)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_leads_timeline ON leads (timeline)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_leads_timestamp ON leads (timestamp)")
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def append(self, lead: dict) -> None:
+        """Insert one lead."""
+        self.append_many([lead])
+
+    def append_many(self, leads: list[dict]) -> None:
+        """Insert several leads in a single transaction."""
+        rows = [self._row(lead) for lead in leads]
+        with self._lock, self._conn:
+            self._conn.executemany(_INSERT_SQL, rows)
+
+    @staticmethod
+    def _row(lead: dict) -> tuple:
+        return (
+            *(None if lead.get(c) is None else str(lead.get(c)) for c in _COLUMNS),
+            lead.get("lead_id"),
+            identity_key(lead),
+            json.dumps(lead, ensure_ascii=False),
+        )
+
+    def upsert_many(self, leads: list[dict]) -> list[dict]:
+        """
+        Merge several session leads into the leads they belong to.
+
+        Matches are looked up through the id, email and identity indexes inside
+        one write transaction, taken up front so that concurrent processes
+        can't both decide a returning visitor is new.
+
+        Returns:
+            The new version of each lead, with its lead_id
+        """
+        records = []
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for lead in leads:
+                    row_id, existing = self._find_match(lead)
+                    if existing is None:
+                        record = {**lead, "lead_id": lead.get("lead_id") or _new_lead_id()}
+                    else:
+                        record = merge_leads(existing, lead)
+                        # Rows written before upserts existed have no id yet
+                        record["lead_id"] = record.get("lead_id") or _new_lead_id()
+                    if row_id is None:
+                        self._conn.execute(_INSERT_SQL, self._row(record))
+                    else:
+                        self._conn.execute(_UPDATE_SQL, (*self._row(record), row_id))
+                    records.append(record)
+            except BaseException:
+                self._conn.rollback()
+                raise
+            self._conn.commit()
+        return records
+
+    def _find_match(self, lead: dict) -> tuple[Optional[int], Optional[dict]]:
+        if lead.get("lead_id"):
+            row = self._conn.execute("SELECT id, data FROM leads WHERE lead_id = ?", (lead["lead_id"],)).fetchone()
+            if row is not None:
+                return row[0], json.loads(row[1])
+        email = normalize_email(lead.get("email"))
+        if email is not None:
+            row = self._conn.execute(
+                "SELECT id, data FROM leads WHERE email = ? COLLATE NOCASE ORDER BY id DESC LIMIT 1", (email,)
+            ).fetchone()
+            if row is not None:
+                return row[0], json.loads(row[1])
+        identity = identity_key(lead)
+        if identity is not None:
+            for row_id, data in self._conn.execute(
+                "SELECT id, data FROM leads WHERE identity = ? ORDER BY id DESC", (identity,)
+            ):
+                existing = json.loads(data)
+                if _compatible(existing, lead):
+                    return row_id, existing
+        return None, None
+
+    def _query(self, where: str = "", params: tuple = ()) -> list[dict]:
+        with self._lock:
+            rows = self._conn.execute(f"SELECT data FROM leads {where} ORDER BY id", params).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def find_by_email(self, email: str) -> list[dict]:
+        """Leads with this email address (case-insensitive)."""
+        return self._query("WHERE email = ? COLLATE NOCASE", (email,))
+
+    def find_by_company(self, company: str) -> list[dict]:
+        """Leads from this company (case-insensitive)."""
+        return self._query("WHERE company = ? COLLATE NOCASE", (company,))
+
+    def find_by_timeline(self, timeline: str) -> list[dict]:
+        """Leads with this buying timeline, e.g. "now" or "later"."""
+        return self._query("WHERE timeline = ?", (timeline,))
+
+    def find_between(self, start: str, end: str) -> list[dict]:
+        """
+        Leads captured within [start, end).
+
+        Args:
+            start: ISO timestamp or date, inclusive
+            end: ISO timestamp or date, exclusive
+        """
+        return self._query("WHERE timestamp >= ? AND timestamp < ?", (start, end))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM leads").fetchone()[0]
+
+    def __iter__(self) -> Iterator[dict]:
+        # Page through by id so a large table is never loaded at once
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, data FROM leads WHERE id > ? ORDER BY id LIMIT 500", (last_id,)
+                ).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            for _, data in rows:
+                yield json.loads(data)
+
+    def current(self) -> Iterator[dict]:
+        """Every lead; upserts already keep one row per lead."""
+        return iter(self)
+
+    def is_empty(self) -> bool:
+        return len(self) == 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+LeadStore = Union[JSONLLeadStore, SQLiteLeadStore]
+
+
+class LeadWriter:
+    """
+    Single background writer that persists leads off the event loop.
+
+    submit() only enqueues, so tools return immediately; a dedicated thread
+    drains whatever has queued up and upserts it into the store in one
+    batch, merging returning visitors into their existing lead. A failed
+    write is remembered per lead_id until that lead is written again, so
+    flush() can tell a caller that its lead never reached the store.
+    Because submit() is thread-safe, sessions running on different event
+    loops in the same process (thread job executor) can share one writer.
+    """
+
+    def __init__(self, store: LeadStore) -> None:
+        self._store = store
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._failed: dict[str, Exception] = {}
+
+    @property
+    def store(self) -> LeadStore:
+        return self._store
+
+    def submit(self, lead: dict) -> None:
+        """Queue a lead for writing without blocking."""
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="lead-writer", daemon=True)
+                self._thread.start()
+        self._queue.put_nowait(lead)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            leads = [lead for lead in batch if lead is not None]
+            ids = {lead["lead_id"] for lead in leads if lead.get("lead_id")}
+            try:
+                if leads:
+                    self._store.upsert_many(leads)
+            except Exception as e:
+                logger.error(f"Failed to write {len(leads)} leads: {e}")
+                self._failed.update(dict.fromkeys(ids, e))
+            else:
+                for lead_id in ids:
+                    self._failed.pop(lead_id, None)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if len(leads) < len(batch):
+                return
+
+    async def flush(self, lead_id: Optional[str] = None) -> None:
+        """
+        Wait until every submitted lead has been written.
+
+        Args:
+            lead_id: A lead whose write the caller depends on
+
+        Raises:
+            Exception: The error that failed lead_id's most recent write
+        """
+        await asyncio.to_thread(self._queue.join)
+        if lead_id is not None and lead_id in self._failed:
+            raise self._failed[lead_id]
+
+    async def aclose(self) -> None:
+        """Flush pending leads, stop the writer and close the store."""
+        await asyncio.to_thread(self.close)
+
+    def close(self) -> None:
+        """Blocking aclose(), for process exit where no event loop runs."""
+        self._queue.join()
+        with self._start_lock:
+            if self._thread is not None:
+                self._queue.put_nowait(None)
+                self._thread.join()
+                self._thread = None
+        self._store.close()
+
+
+def open_lead_store(backend: str = "jsonl", **kwargs) -> LeadStore:
+    """
+    Open a lead store by backend name.
+
+    Args:
+        backend: "jsonl" or "sqlite"
+        **kwargs: Passed to the store constructor
+
+    Returns:
+        The opened store
+    """
+    if backend == "sqlite":
+        return SQLiteLeadStore(**kwargs)
+    if backend == "jsonl":
+        return JSONLLeadStore(**kwargs)
+    raise ValueError(f"Unknown lead store backend: {backend}")
+
+
+def export_json(leads: Iterable[dict], json_path: Path) -> int:
+    """
+    Write leads out as the legacy indented JSON array.
+
+    Records are streamed one at a time and the output is swapped in
+    atomically, so readers never see a partial file.
+
+    Returns:
+        Number of leads exported
+    """
+    json_path = Path(json_path)
+    tmp = json_path.with_name(f"{json_path.name}.tmp")
+    count = 0
+    with open(tmp, "w", encoding="utf-8") as out:
+        out.write("[")
+        for lead in leads:
+            out.write(",\n  " if count else "\n  ")
+            out.write(json.dumps(lead, indent=2, ensure_ascii=False).replace("\n", "\n  "))
+            count += 1
+        out.write("\n]" if count else "]")
+    os.replace(tmp, json_path)
+    return count
+
+
+def import_json(json_path: Path, store: LeadStore) -> int:
+    """
+    Append every lead from a legacy JSON array file to a lead store.
+
+    Returns:
+        Number of leads imported
+    """
+    with open(json_path, encoding="utf-8") as f:
+        try:
+            leads = json.load(f)
+        except json.JSONDecodeError:
+            logger.warning(f"Could not parse legacy leads file {json_path}")
+            return 0
+    for lead in leads:
+        store.append(lead)
+    return len(leads)
+
+
+def migrate_legacy(json_path: Path, store: LeadStore) -> None:
+    """Seed an empty lead store from the legacy JSON file."""
+    if not Path(json_path).exists() or not store.is_empty():
+        return
+    count = import_json(json_path, store)
+    logger.info(f"Migrated {count} leads from {json_path} to {store.path}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Lead log maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="Write the lead store, one record per lead, as the legacy JSON array")
+    export.add_argument("--output", type=Path, default=DEFAULT_JSON_FILE)
+
+    imp = commands.add_parser("import", help="Append a legacy JSON array to the lead store")
+    imp.add_argument("--input", type=Path, default=DEFAULT_JSON_FILE)
+
+    for command in (export, imp):
+        command.add_argument("--backend", choices=("jsonl", "sqlite"), default="jsonl")
+        command.add_argument("--path", type=Path, help="Lead log or database file")
+
+    args = parser.parse_args()
+    path = args.path or (DEFAULT_DB_FILE if args.backend == "sqlite" else DEFAULT_LOG_FILE)
+    store = open_lead_store(args.backend, path=path)
+    try:
+        if args.command == "export":
+            count = export_json(store.current(), args.output)
+            print(f"Exported {count} leads to {args.output}")
+        else:
+            count = import_json(args.input, store)
+            print(f"Imported {count} leads into {path}")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""
+Offline load test for the SDR agent.
+
+Runs N concurrent SDRAgent sessions in this process, each driven through
+AgentSession by a scripted conversation. A scripted LLM answers every user
+turn with the tool call a real model would make, then speaks the tool's
+result; a local HTTP server imitates Murf's generate + audioFile flow. Each
+reply is also pushed through the agent's Murf TTS stream, since text-mode
+sessions don't synthesize audio themselves. Nothing leaves the machine.
+
+Usage (from backend/):
+    python src/load_test.py --sessions 1,10,50,100 --murf-latency 0.3
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import struct
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+
+import psutil
+from aiohttp import web
+from livekit.agents import (
+    DEFAULT_API_CONNECT_OPTIONS,
+    NOT_GIVEN,
+    AgentSession,
+    APIConnectOptions,
+    llm,
+    utils,
+)
+
+logger = logging.getLogger("load_test")
+
+# (user says, tool the LLM calls, tool arguments)
+SCRIPT: list[tuple[str, str, dict[str, str]]] = [
+    ("Hi, I'm Priya.", "collect_lead_info", {"field": "name", "value": "Priya"}),
+    ("I run payments at Acme Retail.", "collect_lead_info", {"field": "company", "value": "Acme Retail"}),
+    ("What does your pricing look like?", "search_faq", {"query": "pricing"}),
+    ("Do you support subscriptions?", "search_faq", {"query": "subscriptions"}),
+    ("You can reach me at priya@acme.example.", "collect_lead_info", {"field": "email", "value": "priya@acme.example"}),
+    ("We'd like to start next month.", "collect_lead_info", {"field": "timeline", "value": "soon"}),
+    ("That's all for now, thanks!", "end_call_summary", {"summary": "Acme Retail wants subscriptions soon."}),
+]
+
+SAMPLE_RATE = 24000
+
+
+def _wav(seconds: float) -> bytes:
+    pcm = bytes(int(SAMPLE_RATE * seconds) * 2)
+    fmt = struct.pack("<HHIIHH", 1, 1, SAMPLE_RATE, SAMPLE_RATE * 2, 2, 16)
+    body = b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt + b"data" + struct.pack("<I", len(pcm)) + pcm
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+class ScriptedLLMStream(llm.LLMStream):
+    async def _run(self) -> None:
+        scripted: ScriptedLLM = self._llm
+        await asyncio.sleep(scripted.ttft)
+        last = self._chat_ctx.items[-1]
+        request_id = utils.shortuuid()
+
+        if last.type == "message" and last.role == "user":
+            step = scripted.steps.get(last.text_content or "")
+            if step is not None:
+                tool, arguments = step
+                call = llm.FunctionToolCall(name=tool, arguments=json.dumps(arguments), call_id=utils.shortuuid())
+                self._event_ch.send_nowait(
+                    llm.ChatChunk(id=request_id, delta=llm.ChoiceDelta(role="assistant", tool_calls=[call]))
+                )
+                return
+            reply = "Could you tell me a bit more about that?"
+        elif last.type == "function_call_output":
+            reply = last.output
+        else:
+            reply = "Happy to help."
+
+        for word in reply.split(" "):
+            self._event_ch.send_nowait(
+                llm.ChatChunk(id=request_id, delta=llm.ChoiceDelta(role="assistant", content=f"{word} "))
+            )
+            await asyncio.sleep(scripted.token_delay)
+
+
+class ScriptedLLM(llm.LLM):
+    """Answers scripted user turns with tool calls, and tool results with speech."""
+
+    def __init__(self, script: list[tuple[str, str, dict[str, str]]], *, ttft: float, token_delay: float) -> None:
+        super().__init__()
+        self.steps = {text: (tool, arguments) for text, tool, arguments in script}
+        self.ttft = ttft
+        self.token_delay = token_delay
+
+    def chat(
+        self,
+        *,
+        chat_ctx: llm.ChatContext,
+        tools: Optional[list] = None,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+        parallel_tool_calls: Any = NOT_GIVEN,
+        tool_choice: Any = NOT_GIVEN,
+        extra_kwargs: Any = NOT_GIVEN,
+    ) -> ScriptedLLMStream:
+        return ScriptedLLMStream(self, chat_ctx=chat_ctx, tools=tools or [], conn_options=conn_options)
+
+
+class MurfStub:
+    """Local imitation of Murf's /v1/speech/generate + audioFile download."""
+
+    def __init__(self, *, latency: float, download_latency: float, seconds_per_char: float = 0.06) -> None:
+        self._latency = latency
+        self._download_latency = download_latency
+        self._seconds_per_char = seconds_per_char
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url = ""
+        self.requests = 0
+
+    async def _generate(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        self.requests += 1
+        await asyncio.sleep(self._latency)
+        seconds = max(0.2, len(payload.get("text", "")) * self._seconds_per_char)
+        url = request.url.with_path(f"/audio/{seconds:.2f}.wav")
+        return web.json_response({"audioFile": str(url)})
+
+    async def _audio(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(self._download_latency)
+        return web.Response(body=_wav(float(request.match_info["seconds"])), content_type="audio/wav")
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_post("/v1/speech/generate", self._generate)
+        app.router.add_get("/audio/{seconds}.wav", self._audio)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        self.base_url = f"http://{host}:{port}/v1"
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+
+def percentiles(samples: list[float]) -> dict[str, Optional[float]]:
+    """p50/p95/p99 (nearest rank) and max of a list of seconds."""
+    if not samples:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    ordered = sorted(samples)
+
+    def rank(pct: float) -> float:
+        return ordered[min(len(ordered) - 1, max(0, int(-(-pct * len(ordered) // 100)) - 1))]
+
+    return {"p50": rank(50), "p95": rank(95), "p99": rank(99), "max": ordered[-1]}
+
+
+class LevelResult(NamedTuple):
+    sessions: int
+    turns: int
+    errors: int
+    wall_seconds: float
+    turn_latency: dict
+    tool_latency: dict
+    tts_ttfb: dict
+    cpu_percent: float
+    peak_rss_mb: float
+
+
+async def _run_session(agent_module, script, llm_model: ScriptedLLM, stats: dict) -> None:
+    tts = agent_module.create_tts()
+    try:
+        async with AgentSession[agent_module.Lead](userdata=agent_module.Lead(), llm=llm_model) as session:
+            await session.start(agent_module.SDRAgent())
+            for text, _, _ in script:
+                start = time.perf_counter()
+                result = await session.run(user_input=text)
+                stats["turn"].append(time.perf_counter() - start)
+
+                calls = {}
+                reply = ""
+                for event in result.events:
+                    if event.type == "function_call":
+                        calls[event.item.call_id] = event.item
+                    elif event.type == "function_call_output" and event.item.call_id in calls:
+                        call = calls[event.item.call_id]
+                        stats["tool"].setdefault(call.name, []).append(event.item.created_at - call.created_at)
+                    elif event.type == "message" and event.item.role == "assistant":
+                        reply = event.item.text_content or ""
+
+                if reply:
+                    stats["ttfb"].append(await _time_to_first_audio(tts, reply))
+    finally:
+        await tts.aclose()
+
+
+async def _time_to_first_audio(tts, text: str) -> float:
+    start = time.perf_counter()
+    ttfb = None
+    async with tts.stream() as stream:
+        stream.push_text(text)
+        stream.end_input()
+        async for _ in stream:
+            if ttfb is None:
+                ttfb = time.perf_counter() - start
+    return ttfb if ttfb is not None else float("nan")
+
+
+async def run_level(agent_module, sessions: int, *, script=SCRIPT, ttft: float = 0.2, token_delay: float = 0.005) -> LevelResult:
+    """Run `sessions` concurrent conversations and collect their measurements."""
+    llm_model = ScriptedLLM(script, ttft=ttft, token_delay=token_delay)
+    stats: dict = {"turn": [], "tool": {}, "ttfb": []}
+    process = psutil.Process()
+    peak_rss = process.memory_info().rss
+
+    async def _sample_rss() -> None:
+        nonlocal peak_rss
+        while True:
+            peak_rss = max(peak_rss, process.memory_info().rss)
+            await asyncio.sleep(0.1)
+
+    sampler = asyncio.create_task(_sample_rss())
+    cpu_before = process.cpu_times()
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(_run_session(agent_module, script, llm_model, stats) for _ in range(sessions)), return_exceptions=True
+    )
+    wall = time.perf_counter() - start
+    cpu_after = process.cpu_times()
+    await utils.aio.cancel_and_wait(sampler)
+
+    errors = [result for result in results if isinstance(result, BaseException)]
+    for error in errors[:3]:
+        logger.error(f"Session failed: {error!r}")
+    all_tools = [seconds for samples in stats["tool"].values() for seconds in samples]
+    cpu = (cpu_after.user - cpu_before.user) + (cpu_after.system - cpu_before.system)
+    return LevelResult(
+        sessions=sessions,
+        turns=len(stats["turn"]),
+        errors=len(errors),
+        wall_seconds=wall,
+        turn_latency=percentiles(stats["turn"]),
+        tool_latency={"all": percentiles(all_tools), **{name: percentiles(s) for name, s in stats["tool"].items()}},
+        tts_ttfb=percentiles([s for s in stats["ttfb"] if s == s]),
+        cpu_percent=100 * cpu / wall if wall else 0.0,
+        peak_rss_mb=peak_rss / (1024 * 1024),
+    )
+
+
+def _ms(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value * 1000:.0f}"
+
+
+def format_report(results: list[LevelResult]) -> str:
+    lines = [
+        f"{'sessions':>8} {'turns':>6} {'errors':>6} {'turn p50/p95/p99 ms':>22} {'tool p95 ms':>11} "
+        f"{'ttfb p50/p95 ms':>16} {'cpu %':>6} {'rss MB':>7}"
+    ]
+    for r in results:
+        turn = f"{_ms(r.turn_latency['p50'])}/{_ms(r.turn_latency['p95'])}/{_ms(r.turn_latency['p99'])}"
+        ttfb = f"{_ms(r.tts_ttfb['p50'])}/{_ms(r.tts_ttfb['p95'])}"
+        lines.append(
+            f"{r.sessions:>8} {r.turns:>6} {r.errors:>6} {turn:>22} {_ms(r.tool_latency['all']['p95']):>11} "
+            f"{ttfb:>16} {r.cpu_percent:>6.0f} {r.peak_rss_mb:>7.0f}"
+        )
+    return "\n".join(lines)
+
+
+async def run(levels: list[int], args: argparse.Namespace) -> list[LevelResult]:
+    stub = MurfStub(latency=args.murf_latency, download_latency=args.download_latency)
+    await stub.start()
+    os.environ["MURF_API_URL"] = stub.base_url
+    os.environ.setdefault("MURF_API_KEY", "load-test")
+
+    import agent
+    from tts_cache import AudioCache
+
+    # Keep test leads and checkpoints out of shared-data, and measure Murf
+    # rather than the cache (memory only, never the real one) unless asked
+    previous = agent.lead_storage, agent.tts_cache
+    with tempfile.TemporaryDirectory() as tmp:
+        agent.lead_storage = agent.open_lead_storage(Path(tmp))
+        agent.tts_cache = AudioCache(None) if args.tts_cache else None
+        results = []
+        try:
+            for sessions in levels:
+                logger.info(f"Running {sessions} concurrent sessions")
+                results.append(
+                    await run_level(agent, sessions, ttft=args.llm_ttft, token_delay=args.llm_token_delay)
+                )
+        finally:
+            await agent.lead_storage.writer.aclose()
+            agent.lead_storage, agent.tts_cache = previous
+            await stub.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline concurrency load test for the SDR agent")
+    parser.add_argument("--sessions", default="1,10,50,100", help="Comma-separated concurrency levels")
+    parser.add_argument("--llm-ttft", type=float, default=0.2, help="Scripted LLM time to first token (s)")
+    parser.add_argument("--llm-token-delay", type=float, default=0.005, help="Delay between LLM tokens (s)")
+    parser.add_argument("--murf-latency", type=float, default=0.3, help="Stub Murf generate latency (s)")
+    parser.add_argument("--download-latency", type=float, default=0.05, help="Stub audio download latency (s)")
+    parser.add_argument("--tts-cache", action="store_true", help="Use an in-memory TTS cache")
+    parser.add_argument("--json", type=Path, help="Also write the results to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logger.setLevel(logging.INFO)
+    levels = [int(level) for level in args.sessions.split(",")]
+    results = asyncio.run(run(levels, args))
+    print(format_report(results))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump([result._asdict() for result in results], f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
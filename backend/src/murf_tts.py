@@ -2,15 +2,162 @@ import asyncio
 import contextlib
 import logging
 import os
-from typing import AsyncIterable
+import time
+from typing import AsyncIterator, Callable, Iterable, Iterator, Optional
 import base64
 
-import requests
+import aiohttp
 from livekit import rtc
-from livekit.agents import tokenize, tts
+from livekit.agents import DEFAULT_API_CONNECT_OPTIONS, APIConnectionError, APIConnectOptions, tokenize, tts, utils
+from livekit.agents.utils.codecs import AudioStreamDecoder
+
+from resilience import CircuitBreaker, LatencyTracker, RetryBudget, backoff_delay
+from tts_cache import AudioCache
+from voice_catalog import VoiceCatalog, load_catalog
+from wav_format import Buffer, PCMConverter, WavStreamParser
 
 logger = logging.getLogger(__name__)
 
+MURF_API_URL = "https://api.murf.ai/v1"
+# Formats Murf can return, with the MIME type used to pick a decoder for the compressed ones
+AUDIO_FORMATS = {"WAV": "audio/wav", "MP3": "audio/mpeg", "FLAC": "audio/flac", "OGG": "audio/ogg"}
+# Never hedge sooner than this, however fast recent requests were
+MIN_HEDGE_AFTER = 0.05
+
+
+class AudioFramer:
+    """
+    Slices a stream of 16-bit PCM bytes into fixed-duration audio frames.
+
+    Frames are memoryview slices of the received chunks rather than copies,
+    so memory per utterance stays at roughly one network chunk no matter
+    how long the sentence is.
+    """
+
+    def __init__(self, sample_rate: int, num_channels: int = 1, frame_size_ms: int = 20) -> None:
+        self._sample_rate = sample_rate
+        self._num_channels = num_channels
+        self._samples_per_frame = sample_rate * frame_size_ms // 1000
+        self._frame_bytes = self._samples_per_frame * num_channels * 2
+        self._pending = b""
+
+    def push(self, data: bytes) -> Iterator[rtc.AudioFrame]:
+        """Add PCM bytes and yield every complete frame now available."""
+        if self._pending:
+            data = self._pending + data
+        view = memoryview(data)
+        end = len(view) - len(view) % self._frame_bytes
+        for offset in range(0, end, self._frame_bytes):
+            yield self._frame(view[offset : offset + self._frame_bytes])
+        self._pending = bytes(view[end:])
+
+    def flush(self) -> Optional[rtc.AudioFrame]:
+        """Return the trailing partial frame, if any."""
+        sample_bytes = self._num_channels * 2
+        usable = len(self._pending) - len(self._pending) % sample_bytes
+        self._pending, tail = b"", self._pending[:usable]
+        return self._frame(memoryview(tail)) if tail else None
+
+    def _frame(self, data: memoryview) -> rtc.AudioFrame:
+        return rtc.AudioFrame(
+            data=data,
+            sample_rate=self._sample_rate,
+            num_channels=self._num_channels,
+            samples_per_channel=len(data) // (2 * self._num_channels),
+        )
+
+
+def _is_retryable(error: BaseException) -> bool:
+    """Timeouts, connection errors, 429 and 5xx are worth retrying; other errors are not."""
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status == 429 or error.status >= 500
+    return isinstance(error, (asyncio.TimeoutError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError))
+
+
+class LookaheadStream(tts.SynthesizeStream):
+    """
+    Streams LLM text through the sentence tokenizer and synthesizes ahead.
+    
+    Each sentence becomes its own Murf request. Up to ``lookahead`` sentences
+    after the one currently being emitted are synthesized concurrently, but
+    their audio is buffered and emitted strictly in order. Closing the
+    stream (e.g. on barge-in) cancels every request whose audio has not been
+    emitted yet, so no quota is spent on speech that will never play.
+    """
+
+    def __init__(self, *, tts: "TTS", conn_options: APIConnectOptions) -> None:
+        super().__init__(tts=tts, conn_options=conn_options)
+        self._murf = tts
+
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        output_emitter.initialize(
+            request_id=utils.shortuuid(),
+            sample_rate=self._murf.sample_rate,
+            num_channels=self._murf.num_channels,
+            mime_type="audio/pcm",
+            stream=True,
+        )
+        output_emitter.start_segment(segment_id=utils.shortuuid())
+        
+        sent_stream = self._murf._tokenizer.stream()
+        # One slot for the sentence being emitted plus `lookahead` ahead of it
+        slots = asyncio.Semaphore(self._murf._lookahead + 1)
+        ordered: asyncio.Queue = asyncio.Queue()
+        in_flight: set[asyncio.Task] = set()
+        
+        async def _synthesize_sentence(text: str, frames: asyncio.Queue) -> None:
+            try:
+                async with self._murf.synthesize(text) as stream:
+                    async for audio in stream:
+                        frames.put_nowait(audio.frame)
+            finally:
+                frames.put_nowait(None)
+        
+        async def _forward_input() -> None:
+            async for data in self._input_ch:
+                if isinstance(data, self._FlushSentinel):
+                    sent_stream.flush()
+                    continue
+                sent_stream.push_text(data)
+            sent_stream.end_input()
+        
+        async def _schedule() -> None:
+            async for ev in sent_stream:
+                text = ev.token.strip()
+                if not text:
+                    continue
+                await slots.acquire()
+                self._mark_started()
+                frames: asyncio.Queue = asyncio.Queue()
+                task = asyncio.create_task(_synthesize_sentence(text, frames))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+                # Errors are re-raised in order by _emit; don't warn about ones it never reaches
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                ordered.put_nowait((task, frames))
+            ordered.put_nowait(None)
+        
+        async def _emit() -> None:
+            while (item := await ordered.get()) is not None:
+                task, frames = item
+                while (frame := await frames.get()) is not None:
+                    output_emitter.push_frame(frame)
+                output_emitter.flush()
+                slots.release()
+                # Surface synthesis errors in order, after the audio that did arrive
+                await task
+        
+        tasks = [
+            asyncio.create_task(_forward_input()),
+            asyncio.create_task(_schedule()),
+            asyncio.create_task(_emit()),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            await sent_stream.aclose()
+            await utils.aio.cancel_and_wait(*tasks, *in_flight)
+
 
 class TTS(tts.TTS):
     def __init__(
@@ -19,6 +166,24 @@ class TTS(tts.TTS):
         voice: str = "en-US-ryan",
         style: str = "Conversational",
         tokenizer: tokenize.SentenceTokenizer = tokenize.basic.SentenceTokenizer(),
+        base_url: str = MURF_API_URL,
+        max_connections_per_host: int = 8,
+        connect_timeout: float = 5.0,
+        request_timeout: float = 30.0,
+        frame_size_ms: int = 20,
+        chunk_size: int = 8192,
+        cache: Optional[AudioCache] = None,
+        cacheable: Optional[Callable[[str], bool]] = None,
+        lookahead: int = 2,
+        hedge_after: Optional[float] = 2.0,
+        first_audio_timeout: float = 10.0,
+        max_retries: int = 2,
+        retry_budget: Optional[RetryBudget] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        fallback_tts: Optional[tts.TTS] = None,
+        filler_text: Optional[str] = None,
+        audio_format: str = "WAV",
+        voice_catalog: Optional[VoiceCatalog] = None,
     ) -> None:
         """
         Initialize Murf TTS.
@@ -27,10 +192,36 @@ class TTS(tts.TTS):
             voice: The voice ID to use (e.g., "en-US-ryan")
             style: The speaking style (e.g., "Conversational", "Narration")
             tokenizer: The tokenizer to use for sentence segmentation
+            base_url: Murf API base URL (override to point at a stub server)
+            max_connections_per_host: Keep-alive connections pooled per host
+            connect_timeout: Seconds allowed to establish a connection
+            request_timeout: Seconds allowed for each HTTP request overall
+            frame_size_ms: Duration of each emitted audio frame
+            chunk_size: Bytes read from the network per download chunk
+            cache: Cache of synthesized audio, shared across sessions; None disables caching
+            cacheable: Whether a synthesized sentence may be stored in the cache (e.g.
+                tts_cache.CacheablePhrases); None stores only what presynthesize() prepares
+            lookahead: Sentences synthesized ahead of the one being played
+            hedge_after: Seconds without audio before a duplicate (hedged) request is sent,
+                used until enough requests have been timed to use their p95; None disables hedging
+            first_audio_timeout: Seconds allowed until the first audio bytes of an attempt arrive
+            max_retries: Retries per sentence after timeouts, connection errors, 429s and 5xxs
+            retry_budget: Caps retries and hedges to a fraction of requests; one per instance by default
+            circuit_breaker: Stops calling Murf after repeated failures; one per instance by default
+            fallback_tts: TTS used while Murf is unavailable (e.g. another provider or voice)
+            filler_text: Phrase whose cached audio is played while Murf is unavailable and
+                there is no fallback_tts
+            audio_format: Format requested from Murf: "WAV", or "MP3"/"FLAC"/"OGG" to transfer
+                fewer bytes at the cost of decoding
+            voice_catalog: Catalog that voice and style are checked against; defaults to
+                the cached catalog on disk, and nothing is checked if there is none
+
+        Raises:
+            ValueError: Unknown voice or style, unsupported audio format, or no MURF_API_KEY
         """
         super().__init__(
             capabilities=tts.TTSCapabilities(
-                streaming=False,
+                streaming=True,
             ),
             sample_rate=24000,
             num_channels=1,
@@ -39,21 +230,69 @@ class TTS(tts.TTS):
         self._style = style
         self._tokenizer = tokenizer
         self._api_key = os.environ.get("MURF_API_KEY")
+        self._base_url = base_url.rstrip("/")
+        self._max_connections_per_host = max_connections_per_host
+        self._timeout = aiohttp.ClientTimeout(total=request_timeout, sock_connect=connect_timeout)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._frame_size_ms = frame_size_ms
+        self._chunk_size = chunk_size
+        self._cache = cache
+        self._cacheable = cacheable
+        self._lookahead = lookahead
+        self._hedge_after = hedge_after
+        self._first_audio_timeout = first_audio_timeout
+        self._max_retries = max_retries
+        self._retry_budget = retry_budget or RetryBudget()
+        self._breaker = circuit_breaker or CircuitBreaker()
+        self._fallback_tts = fallback_tts
+        self._filler_text = filler_text
+        self._audio_format = audio_format.upper()
+        if self._audio_format not in AUDIO_FORMATS:
+            raise ValueError(f"Unsupported audio format {audio_format!r}, expected one of {sorted(AUDIO_FORMATS)}")
+        catalog = voice_catalog if voice_catalog is not None else load_catalog()
+        if catalog is not None:
+            catalog.validate(voice, style)
+        self._latency = LatencyTracker()
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.retries = 0
+        self.fallbacks = 0
+        self._filler_played = False
         
         if not self._api_key:
             raise ValueError("MURF_API_KEY environment variable is required")
 
-    def _synthesize_audio_sync(self, text: str) -> bytes:
+    def _ensure_session(self) -> aiohttp.ClientSession:
         """
-        Synchronous method to synthesize speech using Murf API.
+        Return the pooled HTTP session, creating it on first use.
+
+        The session is created lazily so it binds to the event loop of the
+        job that uses it. Its connections are kept alive between sentences,
+        so only the first request of a call pays the TCP+TLS handshake.
+        """
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit_per_host=self._max_connections_per_host),
+                timeout=self._timeout,
+            )
+        return self._session
+
+    def prewarm(self) -> None:
+        """Create the connection pool before the first sentence is spoken."""
+        self._ensure_session()
+
+    async def _stream_audio(self, text: str) -> AsyncIterator[bytes]:
+        """
+        Synthesize speech using the Murf API, yielding audio as it downloads.
         
         Args:
             text: The text to synthesize
             
-        Returns:
-            Audio data as bytes
+        Yields:
+            Chunks of the audio file, in the requested format
         """
-        url = "https://api.murf.ai/v1/speech/generate"
+        url = f"{self._base_url}/speech/generate"
+        session = self._ensure_session()
         
         headers = {
             "api-key": self._api_key,
@@ -65,9 +304,9 @@ class TTS(tts.TTS):
             "voiceId": self._voice,
             "style": self._style,
             "text": text,
-            "format": "WAV",
-            "sampleRate": 24000,
-            "channelType": "MONO",
+            "format": self._audio_format,
+            "sampleRate": self.sample_rate,
+            "channelType": "STEREO" if self.num_channels == 2 else "MONO",
             "encodeAsBase64": False,
             "speed": 1.0,  # Normal speed
             "pitch": 0,    # Normal pitch
@@ -75,37 +314,247 @@ class TTS(tts.TTS):
         
         try:
             logger.info(f"Synthesizing with Murf: voice={self._voice}, text_length={len(text)}")
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
-            response.raise_for_status()
-            
-            # Murf API returns JSON with audio URL or base64 data
-            response_data = response.json()
+            async with session.post(url, json=payload, headers=headers) as response:
+                if response.status >= 400:
+                    logger.error(f"Response status: {response.status}")
+                    logger.error(f"Response body: {(await response.text())[:500]}")
+                response.raise_for_status()
+                
+                # Murf API returns JSON with audio URL or base64 data
+                response_data = await response.json()
             
             if 'audioFile' in response_data:
-                # Download the audio file
-                audio_url = response_data['audioFile']
-                audio_response = requests.get(audio_url, timeout=30)
-                audio_response.raise_for_status()
-                return audio_response.content
+                # Download the audio file over the same pooled connections
+                async with session.get(response_data['audioFile']) as audio_response:
+                    audio_response.raise_for_status()
+                    async for chunk in audio_response.content.iter_chunked(self._chunk_size):
+                        yield chunk
             elif 'audioContent' in response_data:
                 # Base64 encoded audio
-                return base64.b64decode(response_data['audioContent'])
+                yield base64.b64decode(response_data['audioContent'])
             else:
                 logger.error(f"Unexpected Murf API response: {response_data}")
                 raise ValueError("Unexpected API response format")
                 
-        except requests.exceptions.RequestException as e:
+        except aiohttp.ClientError as e:
             logger.error(f"Error synthesizing speech with Murf: {e}")
-            if 'response' in locals():
-                logger.error(f"Response status: {response.status_code}")
-                logger.error(f"Response body: {response.text[:500]}")
             raise
         except Exception as e:
             logger.error(f"Unexpected error in Murf TTS: {e}")
             raise
 
-    @contextlib.asynccontextmanager
-    async def synthesize(self, text: str, *, conn_options=None):
+    async def _first_audio(self, text: str) -> tuple[AsyncIterator[bytes], bytes, float]:
+        """Start one request and wait for its first audio bytes."""
+        start = time.monotonic()
+        chunks = self._stream_audio(text)
+        try:
+            first = await chunks.__anext__()
+        except StopAsyncIteration:
+            raise ValueError("Murf returned no audio") from None
+        except BaseException:
+            await chunks.aclose()
+            raise
+        return chunks, first, time.monotonic() - start
+
+    async def _hedged_attempt(self, text: str) -> tuple[AsyncIterator[bytes], bytes]:
+        """
+        Run one attempt, sending a duplicate request if the first is slow.
+
+        The hedge fires once the attempt has waited longer than the rolling
+        p95 time to first audio, so only the slowest ~5% of requests are
+        duplicated (and each duplicate is paid for from the retry budget).
+        Whichever request produces audio first wins; the other is cancelled.
+        hedge_after=None turns hedging off altogether.
+        """
+        hedge_after = None
+        if self._hedge_after is not None:
+            p95 = self._latency.percentile(95)
+            # A p95 of 0 (e.g. a local stub) would duplicate every request
+            hedge_after = self._hedge_after if p95 is None else max(p95, MIN_HEDGE_AFTER)
+        deadline = time.monotonic() + self._first_audio_timeout
+        tasks = [asyncio.create_task(self._first_audio(text))]
+        winner = None
+        try:
+            if hedge_after is not None and hedge_after < self._first_audio_timeout:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+                if not done and self._retry_budget.withdraw():
+                    logger.info(f"No Murf audio after {hedge_after:.2f}s, sending hedged request")
+                    self.hedges += 1
+                    tasks.append(asyncio.create_task(self._first_audio(text)))
+
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending and winner is None:
+                done, pending = await asyncio.wait(
+                    pending, timeout=max(0.0, deadline - time.monotonic()), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    raise asyncio.TimeoutError(f"No Murf audio within {self._first_audio_timeout}s")
+                for task in done:
+                    if task.exception() is None:
+                        winner = winner or task
+                    else:
+                        error = task.exception()
+            if winner is None:
+                raise error
+
+            chunks, first, elapsed = winner.result()
+            self._latency.record(elapsed)
+            if winner is not tasks[0]:
+                self.hedge_wins += 1
+            return chunks, first
+        finally:
+            for task in tasks:
+                if task is winner:
+                    continue
+                if not task.done():
+                    await utils.aio.cancel_and_wait(task)
+                elif not task.cancelled() and task.exception() is None:
+                    await task.result()[0].aclose()
+
+    async def _open_audio(self, text: str) -> tuple[AsyncIterator[bytes], bytes]:
+        """
+        Get the first audio of a sentence, retrying transient failures.
+
+        Retries use jittered exponential backoff and stop when the retry
+        budget is spent or the circuit breaker opens.
+        """
+        self._retry_budget.deposit()
+        attempt = 0
+        while True:
+            try:
+                result = await self._hedged_attempt(text)
+                self._breaker.record_success()
+                self._filler_played = False
+                return result
+            except Exception as e:
+                if not _is_retryable(e):
+                    raise
+                self._breaker.record_failure()
+                attempt += 1
+                if (
+                    attempt > self._max_retries
+                    or self._breaker.state != CircuitBreaker.CLOSED
+                    or not self._retry_budget.withdraw()
+                ):
+                    raise
+                delay = backoff_delay(attempt)
+                logger.warning(f"Murf request failed ({e!r}), retry {attempt} in {delay:.2f}s")
+                self.retries += 1
+                await asyncio.sleep(delay)
+
+    async def _fallback_audio(self, text: str, framer: AudioFramer) -> AsyncIterator[tts.SynthesizedAudio]:
+        """Speak through the fallback TTS, or play the cached filler phrase."""
+        self.fallbacks += 1
+        if self._fallback_tts is not None:
+            logger.warning("Murf unavailable, using fallback TTS")
+            resampler = None
+            async with self._fallback_tts.synthesize(text) as stream:
+                async for audio in stream:
+                    frame = audio.frame
+                    if frame.sample_rate == self.sample_rate:
+                        yield tts.SynthesizedAudio(request_id="", frame=frame)
+                        continue
+                    if resampler is None:
+                        resampler = rtc.AudioResampler(frame.sample_rate, self.sample_rate, num_channels=frame.num_channels)
+                    for resampled in resampler.push(frame):
+                        yield tts.SynthesizedAudio(request_id="", frame=resampled)
+            if resampler is not None:
+                for resampled in resampler.flush():
+                    yield tts.SynthesizedAudio(request_id="", frame=resampled)
+            return
+
+        filler = None
+        if self._filler_text and self._cache is not None:
+            filler = await self._cache.get(
+                AudioCache.make_key(self._voice, self._style, self.sample_rate, self._filler_text)
+            )
+        if filler is None:
+            raise APIConnectionError("Murf is unavailable and no fallback audio is configured")
+        if self._filler_played:
+            # One filler per outage; repeating it for every sentence sounds broken
+            logger.warning(f"Murf unavailable, dropping {text[:40]!r}")
+            return
+        self._filler_played = True
+        logger.warning(f"Murf unavailable, playing filler instead of {text[:40]!r}")
+        for frame in framer.push(filler):
+            yield tts.SynthesizedAudio(request_id="", frame=frame)
+        tail = framer.flush()
+        if tail is not None:
+            yield tts.SynthesizedAudio(request_id="", frame=tail)
+
+    async def _decode(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[Buffer]:
+        """
+        Turn downloaded audio into 16-bit PCM at the TTS sample rate and channel count.
+
+        WAV is parsed in place: the payload is passed on as slices of the
+        network buffers, and only converted if its format differs from the
+        TTS's. Compressed formats go through a streaming decoder.
+        """
+        if self._audio_format != "WAV":
+            async for pcm in self._decode_compressed(chunks):
+                yield pcm
+            return
+
+        parser = WavStreamParser()
+        converter: Optional[PCMConverter] = None
+        async for chunk in chunks:
+            payload = parser.push(chunk)
+            if not payload:
+                continue
+            if parser.raw:
+                yield payload
+                continue
+            if converter is None:
+                converter = PCMConverter(parser.format, self.sample_rate, self.num_channels)
+                if not converter.passthrough:
+                    logger.warning(
+                        f"Murf returned {parser.format}, converting to {self.sample_rate} Hz "
+                        f"{self.num_channels}-channel 16-bit PCM"
+                    )
+            pcm = converter.convert(payload)
+            if pcm:
+                yield pcm
+        if not parser.started:
+            raise ValueError("Murf returned an incomplete WAV header")
+
+    async def _decode_compressed(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[Buffer]:
+        decoder = AudioStreamDecoder(
+            sample_rate=self.sample_rate,
+            num_channels=self.num_channels,
+            format=AUDIO_FORMATS[self._audio_format],
+        )
+
+        async def _feed() -> None:
+            try:
+                async for chunk in chunks:
+                    decoder.push(chunk)
+            finally:
+                decoder.end_input()
+
+        feeder = asyncio.create_task(_feed())
+        try:
+            async for frame in decoder:
+                yield frame.data.cast("B")
+            # Surface download errors that ended the input early
+            await feeder
+        finally:
+            await utils.aio.cancel_and_wait(feeder)
+            await decoder.aclose()
+
+    def stats(self) -> dict:
+        """Hedging, retry and fallback counters plus the current circuit state."""
+        return {
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "retries": self.retries,
+            "fallbacks": self.fallbacks,
+            "retry_tokens": self._retry_budget.tokens,
+            "circuit": self._breaker.state,
+            "ttfb_p95": self._latency.percentile(95),
+        }
+
+    def synthesize(self, text: str, *, conn_options=None):
         """
         Synthesize text to speech (async context manager).
         
@@ -113,38 +562,142 @@ class TTS(tts.TTS):
             text: The text to synthesize
             conn_options: Connection options (unused but required by interface)
             
-        Yields:
-            Async generator of synthesized audio
+        Returns:
+            Async context manager yielding an async generator of synthesized audio
         """
+        return self._synthesize(text, store=self._cacheable is not None and self._cacheable(text))
+
+    @contextlib.asynccontextmanager
+    async def _synthesize(self, text: str, *, store: bool):
+        """synthesize(), storing the audio in the cache if store is set."""
         
         async def _do_synthesize():
             try:
-                # Run the synchronous API call in a thread pool
-                loop = asyncio.get_event_loop()
-                audio_data = await loop.run_in_executor(None, self._synthesize_audio_sync, text)
+                framer = AudioFramer(self.sample_rate, self.num_channels, self._frame_size_ms)
+                cache_key = None
+                pcm_chunks = []
                 
-                # Skip WAV header (44 bytes) if present
-                if len(audio_data) > 44 and audio_data[:4] == b'RIFF':
-                    audio_data = audio_data[44:]
+                if self._cache is not None:
+                    cache_key = AudioCache.make_key(self._voice, self._style, self.sample_rate, text)
+                    cached = await self._cache.get(cache_key)
+                    if cached is not None:
+                        for frame in framer.push(cached):
+                            yield tts.SynthesizedAudio(request_id="", frame=frame)
+                        tail = framer.flush()
+                        if tail is not None:
+                            yield tts.SynthesizedAudio(request_id="", frame=tail)
+                        return
                 
-                # Create audio frame with raw PCM data
-                audio_frame = rtc.AudioFrame(
-                    data=audio_data,
-                    sample_rate=24000,
-                    num_channels=1,
-                    samples_per_channel=(len(audio_data) // 2)  # 16-bit audio = 2 bytes per sample
-                )
+                if not self._breaker.allow():
+                    async for audio in self._fallback_audio(text, framer):
+                        yield audio
+                    return
+                try:
+                    chunks, first = await self._open_audio(text)
+                except Exception as e:
+                    if not _is_retryable(e) or (self._fallback_tts is None and not self._filler_text):
+                        raise
+                    async for audio in self._fallback_audio(text, framer):
+                        yield audio
+                    return
+                
+                async def _all_chunks() -> AsyncIterator[bytes]:
+                    yield first
+                    try:
+                        async for chunk in chunks:
+                            yield chunk
+                    except Exception as e:
+                        # Audio has already played, so this sentence can't be retried
+                        if _is_retryable(e):
+                            self._breaker.record_failure()
+                        raise
+                    finally:
+                        await chunks.aclose()
                 
-                yield tts.SynthesizedAudio(request_id="", frame=audio_frame)
+                # Emit frames as soon as they arrive instead of waiting for the whole file
+                async for pcm in self._decode(_all_chunks()):
+                    if store and cache_key is not None:
+                        pcm_chunks.append(pcm)
+                    for frame in framer.push(pcm):
+                        yield tts.SynthesizedAudio(request_id="", frame=frame)
+                
+                tail = framer.flush()
+                if tail is not None:
+                    yield tts.SynthesizedAudio(request_id="", frame=tail)
+                
+                # Only complete utterances are cached; an interrupted one never gets here
+                if cache_key is not None and pcm_chunks:
+                    await self._cache.put(cache_key, b"".join(pcm_chunks))
             except Exception as e:
                 logger.error(f"Error in synthesize: {e}")
                 raise
         
         yield _do_synthesize()
 
+    def stream(self, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS) -> LookaheadStream:
+        """
+        Open a pipelined synthesis stream for incrementally pushed text.
+        
+        Args:
+            conn_options: Connection options for the stream
+            
+        Returns:
+            A stream that synthesizes sentences ahead and emits them in order
+        """
+        return LookaheadStream(tts=self, conn_options=conn_options)
+
+    async def presynthesize(self, texts: Iterable[str], *, max_concurrency: int = 4) -> int:
+        """
+        Synthesize texts into the audio cache ahead of time.
+        
+        Texts are split with the TTS tokenizer first, since sentences are
+        what gets spoken and cached. The filler is the exception: it is
+        played whole when Murf is down, so it is cached whole. Sentences
+        already in the cache for this voice and style are skipped, so
+        repeated runs only synthesize what changed.
+        
+        Args:
+            texts: The phrases to prepare
+            max_concurrency: Maximum Murf requests in flight
+            
+        Returns:
+            Number of sentences synthesized
+        """
+        if self._cache is None:
+            raise ValueError("presynthesize requires a cache")
+        
+        sentences = dict.fromkeys(
+            sentence.strip() for text in texts for sentence in self._tokenizer.tokenize(text) if sentence.strip()
+        )
+        if self._filler_text:
+            sentences[self._filler_text] = None
+        pending = [
+            sentence
+            for sentence in sentences
+            if not self._cache.contains(AudioCache.make_key(self._voice, self._style, self.sample_rate, sentence))
+        ]
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def _presynthesize_one(sentence: str) -> bool:
+            async with semaphore:
+                try:
+                    async with self._synthesize(sentence, store=True) as stream:
+                        async for _ in stream:
+                            pass
+                    return True
+                except Exception as e:
+                    logger.warning(f"Could not presynthesize {sentence[:40]!r}: {e}")
+                    return False
+        
+        results = await asyncio.gather(*(_presynthesize_one(sentence) for sentence in pending))
+        logger.info(f"Presynthesized {sum(results)} of {len(pending)} uncached sentences ({len(sentences)} total)")
+        return sum(results)
+
     async def aclose(self) -> None:
-        """Close the TTS instance."""
-        pass
+        """Close the TTS instance and its connection pool."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
 
 
 # Create a default instance
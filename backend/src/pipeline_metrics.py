@@ -0,0 +1,122 @@
+"""
+Prometheus metrics for the voice pipeline.
+
+Latency from the session's ``metrics_collected`` events (LLM time to first
+token, STT delay, TTS time to first byte, end-of-utterance delay) and the
+duration of each function tool are recorded into prometheus_client
+histograms, which are served on a small HTTP endpoint in each worker
+process. They live in a registry of their own, so the endpoint exposes just
+these and not the client's default process collectors.
+"""
+import functools
+import logging
+from typing import Callable, Optional
+from wsgiref.simple_server import WSGIServer
+
+import prometheus_client
+from livekit.agents import metrics
+from prometheus_client import CollectorRegistry, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Seconds; dense around the 0.2-2 s range where conversational latency lives
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+
+REGISTRY = CollectorRegistry()
+
+
+def _histogram(name: str, documentation: str, label_names: tuple[str, ...] = ()) -> Histogram:
+    return Histogram(name, documentation, label_names, buckets=LATENCY_BUCKETS, registry=REGISTRY)
+
+
+LLM_TTFT = _histogram("sdr_llm_ttft_seconds", "LLM time to first token", ("label",))
+STT_DELAY = _histogram("sdr_stt_delay_seconds", "Time from end of user speech to the final transcript")
+TTS_TTFB = _histogram("sdr_tts_ttfb_seconds", "TTS time to first audio byte", ("label",))
+EOU_DELAY = _histogram("sdr_eou_delay_seconds", "End-of-utterance detection delay")
+TURN_LATENCY = _histogram(
+    "sdr_turn_latency_seconds", "End of user speech to first agent audio (EOU + LLM TTFT + TTS TTFB)"
+)
+TOOL_DURATION = _histogram("sdr_tool_duration_seconds", "Function tool execution time", ("tool",))
+
+
+class TurnLatency:
+    """
+    Joins the per-turn EOU, LLM and TTS metrics of one session by speech id.
+
+    A turn's latency is only known once all three have arrived, and the
+    events come in any order, so partial turns are held briefly. Only the
+    most recent few are kept; a turn that never completes (e.g. interrupted)
+    simply ages out.
+    """
+
+    def __init__(self, histogram: Histogram = TURN_LATENCY, max_pending: int = 16) -> None:
+        self._histogram = histogram
+        self._max_pending = max_pending
+        self._pending: dict[str, dict[str, float]] = {}
+
+    def add(self, speech_id: Optional[str], part: str, seconds: float) -> None:
+        if not speech_id or seconds < 0:
+            return
+        parts = self._pending.setdefault(speech_id, {})
+        parts.setdefault(part, seconds)
+        if len(parts) == 3:
+            del self._pending[speech_id]
+            self._histogram.observe(sum(parts.values()))
+        while len(self._pending) > self._max_pending:
+            self._pending.pop(next(iter(self._pending)))
+
+
+def record(event_metrics: metrics.AgentMetrics, turns: Optional[TurnLatency] = None) -> None:
+    """Record one ``metrics_collected`` payload into the histograms."""
+    if isinstance(event_metrics, metrics.LLMMetrics):
+        if event_metrics.ttft >= 0 and not event_metrics.cancelled:
+            LLM_TTFT.labels(event_metrics.label).observe(event_metrics.ttft)
+            if turns is not None:
+                turns.add(event_metrics.speech_id, "llm", event_metrics.ttft)
+    elif isinstance(event_metrics, metrics.TTSMetrics):
+        if event_metrics.ttfb >= 0 and not event_metrics.cancelled:
+            TTS_TTFB.labels(event_metrics.label).observe(event_metrics.ttfb)
+            if turns is not None:
+                turns.add(event_metrics.speech_id, "tts", event_metrics.ttfb)
+    elif isinstance(event_metrics, metrics.EOUMetrics):
+        EOU_DELAY.observe(event_metrics.end_of_utterance_delay)
+        # Streaming STT reports no per-request duration; this is its user-facing latency
+        STT_DELAY.observe(event_metrics.transcription_delay)
+        if turns is not None:
+            turns.add(event_metrics.speech_id, "eou", event_metrics.end_of_utterance_delay)
+
+
+def timed_tool(name: str) -> Callable:
+    """Decorator recording an async function tool's duration under its tool name."""
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with TOOL_DURATION.labels(name).time():
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def start_http_server(port: int, host: str = "127.0.0.1", attempts: int = 32) -> Optional[WSGIServer]:
+    """
+    Serve ``/metrics`` from a daemon thread.
+
+    Each job process runs its own endpoint, so if ``port`` is taken the next
+    ones are tried; the port actually used is logged and returned on the
+    server. Port 0 picks any free port.
+
+    Returns:
+        The running server, or None if no port was free
+    """
+    for candidate in range(port, port + attempts) if port else (0,):
+        try:
+            server, _ = prometheus_client.start_http_server(candidate, addr=host, registry=REGISTRY)
+        except OSError:
+            continue
+        logger.info(f"Serving metrics on http://{host}:{server.server_address[1]}/metrics")
+        return server
+    logger.warning(f"No free port for the metrics endpoint in {port}-{port + attempts - 1}")
+    return None
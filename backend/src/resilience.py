@@ -0,0 +1,138 @@
+"""
+Latency and failure tracking for calls to remote speech APIs.
+
+These are small, single-event-loop helpers used by murf_tts: a rolling
+latency window that supplies the hedging delay, a retry budget that caps
+how much extra load retries and hedges may add, and a circuit breaker that
+stops calling a degraded service for a while.
+"""
+import math
+import random
+import time
+from collections import deque
+from typing import Callable, Optional
+
+
+class LatencyTracker:
+    """Rolling window of latency samples with percentile lookups."""
+
+    def __init__(self, window: int = 100, min_samples: int = 10) -> None:
+        """
+        Create a tracker.
+
+        Args:
+            window: Number of most recent samples kept
+            min_samples: Samples needed before percentiles are reported
+        """
+        self._samples: deque[float] = deque(maxlen=window)
+        self._min_samples = min_samples
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Nearest-rank percentile of the window, or None if too few samples."""
+        if len(self._samples) < self._min_samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = min(len(ordered), max(1, math.ceil(pct / 100 * len(ordered)))) - 1
+        return ordered[rank]
+
+
+class RetryBudget:
+    """
+    Limits retries (and hedged requests) to a fraction of first attempts.
+
+    Every first attempt deposits ``ratio`` tokens and every retry withdraws
+    one, with ``min_tokens`` available from the start so a quiet session can
+    still retry. When Murf is failing everywhere this bounds the extra load
+    to ``ratio`` instead of multiplying it by the attempt count.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_tokens: float = 3.0, max_tokens: float = 10.0) -> None:
+        self._ratio = ratio
+        self._max_tokens = max_tokens
+        self._tokens = min_tokens
+
+    @property
+    def tokens(self) -> float:
+        return self._tokens
+
+    def deposit(self) -> None:
+        self._tokens = min(self._max_tokens, self._tokens + self._ratio)
+
+    def withdraw(self) -> bool:
+        """Take one token if available."""
+        if self._tokens < 1.0:
+            return False
+        self._tokens -= 1.0
+        return True
+
+
+class CircuitBreaker:
+    """
+    Opens after consecutive failures and probes again after a cooldown.
+
+    While open, allow() is False and callers use their fallback. After
+    ``reset_timeout`` one probe call is let through (half-open); its outcome
+    closes the circuit again or restarts the cooldown.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_started = 0.0
+        self._probing = False
+        self._state = self.CLOSED
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self._reset_timeout:
+            return self.HALF_OPEN
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go to the service now."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        # A probe that never reported back (e.g. it was cancelled) is given up on
+        if state == self.HALF_OPEN and (
+            not self._probing or self._clock() - self._probe_started >= self._reset_timeout
+        ):
+            self._probing = True
+            self._probe_started = self._clock()
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._probing = False
+        self._state = self.CLOSED
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._probing or self._failures >= self._failure_threshold:
+            self._state = self.OPEN
+            self._opened_at = self._clock()
+        self._probing = False
+
+
+def backoff_delay(attempt: int, base: float = 0.2, cap: float = 2.0) -> float:
+    """Full-jitter exponential backoff for the given retry number (1-based)."""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
@@ -0,0 +1,174 @@
+"""
+Adaptive text chunking for TTS.
+
+Each chunk becomes one Murf request, so chunk boundaries trade time to first
+audio against request count. The first chunk of every segment is kept short
+so audio starts quickly; while it plays, later sentences are merged into
+larger chunks up to a length budget, and sentences longer than the budget
+are split at clause boundaries (then at word boundaries as a last resort).
+"""
+import re
+from typing import Optional
+
+from livekit.agents import tokenize, utils
+
+# A sentence ends at . ! ? (optionally followed by quotes/brackets) and whitespace
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])[\"')\]]*\s+")
+# Clause boundaries: , ; : and dashes (en, em, hyphen) followed by whitespace
+_CLAUSE_END_RE = re.compile(r"(?<=[,;:\u2013\u2014])\s+|\s+(?=[\u2013\u2014-]\s)")
+
+
+def _split_at(text: str, limit: int, pattern: re.Pattern) -> Optional[int]:
+    """Index just past the last boundary matching pattern within text[:limit]."""
+    best = None
+    for match in pattern.finditer(text, 0, limit + 1):
+        if match.start() > 0:
+            best = match.end()
+    return best
+
+
+def split_long(text: str, max_chars: int) -> list[str]:
+    """Split text into pieces of at most max_chars at clause, then word, boundaries."""
+    pieces = []
+    while len(text) > max_chars:
+        cut = _split_at(text, max_chars, _CLAUSE_END_RE) or _split_at(text, max_chars, re.compile(r"\s+"))
+        if not cut:
+            # A single word longer than the budget; send it whole
+            match = re.search(r"\s", text)
+            cut = match.end() if match else len(text)
+        pieces.append(text[:cut].strip())
+        text = text[cut:].lstrip()
+    if text.strip():
+        pieces.append(text.strip())
+    return pieces
+
+
+class _Chunker:
+    """Incremental chunking state shared by tokenize() and the stream."""
+
+    def __init__(self, first_chunk_chars: int, target_chunk_chars: int, max_chunk_chars: int) -> None:
+        self._first_chunk_chars = first_chunk_chars
+        self._target_chunk_chars = target_chunk_chars
+        self._max_chunk_chars = max_chunk_chars
+        self._buffer = ""
+        self._pending = ""
+        self._emitted = 0
+
+    def feed(self, text: str) -> list[str]:
+        """Add text and return the chunks that are ready."""
+        self._buffer += text
+        parts = _SENTENCE_END_RE.split(self._buffer)
+        # The last part may still be growing
+        self._buffer = parts.pop()
+        chunks = []
+        for sentence in parts:
+            chunks.extend(self._add_sentence(sentence.strip()))
+
+        # Don't hold the very first chunk back for a long opening sentence
+        if self._emitted == 0 and not self._pending and len(self._buffer) > self._first_chunk_chars:
+            cut = _split_at(self._buffer, self._first_chunk_chars, _CLAUSE_END_RE)
+            if cut:
+                chunks.append(self._emit(self._buffer[:cut].strip()))
+                self._buffer = self._buffer[cut:].lstrip()
+        return chunks
+
+    def finish(self) -> list[str]:
+        """Return everything still buffered and reset for a new segment."""
+        chunks = self._add_sentence(self._buffer.strip())
+        self._buffer = ""
+        if self._pending:
+            chunks.extend(self._emit(piece) for piece in split_long(self._pending, self._max_chunk_chars))
+            self._pending = ""
+        self._emitted = 0
+        return chunks
+
+    def _add_sentence(self, sentence: str) -> list[str]:
+        if not sentence:
+            return []
+        if self._emitted == 0 and not self._pending:
+            pieces = split_long(sentence, self._first_chunk_chars)
+            first = self._emit(pieces[0])
+            rest = " ".join(pieces[1:])
+            return [first, *self._add_sentence(rest)] if rest else [first]
+
+        chunks = []
+        candidate = f"{self._pending} {sentence}" if self._pending else sentence
+        if len(candidate) > self._max_chunk_chars:
+            if self._pending:
+                chunks.append(self._emit(self._pending))
+            pieces = split_long(sentence, self._max_chunk_chars)
+            chunks.extend(self._emit(piece) for piece in pieces[:-1])
+            candidate = pieces[-1]
+        self._pending = candidate
+        if len(self._pending) >= self._target_chunk_chars:
+            chunks.append(self._emit(self._pending))
+            self._pending = ""
+        return chunks
+
+    def _emit(self, chunk: str) -> str:
+        self._emitted += 1
+        return chunk
+
+
+class AdaptiveChunkStream(tokenize.SentenceStream):
+    """Streaming counterpart of AdaptiveChunker.tokenize()."""
+
+    def __init__(self, chunker: _Chunker) -> None:
+        super().__init__()
+        self._chunker = chunker
+        self._segment_id = utils.shortuuid()
+
+    def _send(self, chunks: list[str]) -> None:
+        for chunk in chunks:
+            self._event_ch.send_nowait(tokenize.TokenData(segment_id=self._segment_id, token=chunk))
+
+    def push_text(self, text: str) -> None:
+        self._check_not_closed()
+        self._send(self._chunker.feed(text))
+
+    def flush(self) -> None:
+        self._check_not_closed()
+        self._send(self._chunker.finish())
+        self._segment_id = utils.shortuuid()
+
+    def end_input(self) -> None:
+        self.flush()
+        self._do_close()
+
+    async def aclose(self) -> None:
+        self._do_close()
+
+
+class AdaptiveChunker(tokenize.SentenceTokenizer):
+    """Sentence tokenizer that sizes chunks for TTS latency and request count."""
+
+    def __init__(
+        self,
+        *,
+        first_chunk_chars: int = 60,
+        target_chunk_chars: int = 150,
+        max_chunk_chars: int = 300,
+    ) -> None:
+        """
+        Create a chunker.
+
+        Args:
+            first_chunk_chars: Maximum length of the first chunk of a segment
+            target_chunk_chars: Later sentences are merged until a chunk reaches this length
+            max_chunk_chars: Hard limit; longer sentences are split at clause boundaries
+        """
+        if not 0 < first_chunk_chars <= max_chunk_chars or target_chunk_chars > max_chunk_chars:
+            raise ValueError("chunk sizes must satisfy 0 < first_chunk_chars <= max_chunk_chars and target <= max")
+        self._first_chunk_chars = first_chunk_chars
+        self._target_chunk_chars = target_chunk_chars
+        self._max_chunk_chars = max_chunk_chars
+
+    def _chunker(self) -> _Chunker:
+        return _Chunker(self._first_chunk_chars, self._target_chunk_chars, self._max_chunk_chars)
+
+    def tokenize(self, text: str, *, language: Optional[str] = None) -> list[str]:
+        chunker = self._chunker()
+        return chunker.feed(text) + chunker.finish()
+
+    def stream(self, *, language: Optional[str] = None) -> AdaptiveChunkStream:
+        return AdaptiveChunkStream(self._chunker())
@@ -0,0 +1,223 @@
+"""
+Cache of synthesized speech.
+
+Much of what the agent says repeats across calls (tool acknowledgements,
+verbatim FAQ answers), so synthesized PCM is kept in a byte-budgeted
+in-memory LRU backed by a content-addressed store on disk, which has a
+byte budget and LRU eviction of its own. Entries are keyed by voice, style,
+sample rate and whitespace-normalized text, so a change to any of those is
+simply a different entry.
+
+Only phrases known in advance are cached (see CacheablePhrases): anything
+else the LLM says may carry a caller's name, email or company, and is never
+written to disk.
+"""
+import asyncio
+import contextlib
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path(".tts_cache")
+DEFAULT_MEMORY_BYTES = 64 * 1024 * 1024
+DEFAULT_DISK_BYTES = 256 * 1024 * 1024
+
+# Bump when the stored audio format changes so old entries are ignored
+_FORMAT_VERSION = "pcm16-v1"
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace; wording, case and punctuation affect prosody so are kept."""
+    return " ".join(text.split())
+
+
+class CacheablePhrases:
+    """
+    The sentences that may be cached: those found verbatim in a set of known
+    phrases, such as fixed tool responses and FAQ answers.
+    """
+
+    def __init__(self, phrases: Iterable[str]) -> None:
+        # One newline-separated haystack, so a sentence can't match across two phrases
+        self._text = "\n".join(normalize_text(phrase) for phrase in phrases)
+
+    def __call__(self, text: str) -> bool:
+        sentence = normalize_text(text)
+        return bool(sentence) and sentence in self._text
+
+
+class AudioCache:
+    """Two-tier (memory LRU + disk) cache of synthesized PCM audio."""
+
+    def __init__(
+        self,
+        directory: Optional[Path] = DEFAULT_CACHE_DIR,
+        *,
+        max_memory_bytes: int = DEFAULT_MEMORY_BYTES,
+        max_disk_bytes: int = DEFAULT_DISK_BYTES,
+    ) -> None:
+        """
+        Create a cache.
+
+        Args:
+            directory: Where to store audio on disk, or None for memory only
+            max_memory_bytes: Budget for the in-memory tier
+            max_disk_bytes: Budget for the disk tier; least recently used files
+                are deleted beyond it
+        """
+        self._directory = Path(directory) if directory is not None else None
+        self._max_memory_bytes = max_memory_bytes
+        self._max_disk_bytes = max_disk_bytes
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_bytes = 0
+        # key -> file size, least recently used first; scanned from disk on first use
+        self._disk: Optional[OrderedDict[str, int]] = None
+        self._disk_bytes = 0
+        # Sessions on different threads (thread job executor) may share a cache
+        self._lock = threading.Lock()
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+
+    @staticmethod
+    def make_key(voice: str, style: str, sample_rate: int, text: str) -> str:
+        """Content address for one synthesized phrase."""
+        material = "\0".join((_FORMAT_VERSION, voice, style, str(sample_rate), normalize_text(text)))
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Optional[Path]:
+        if self._directory is None:
+            return None
+        return self._directory / key[:2] / f"{key}.pcm"
+
+    def _remember(self, key: str, audio: bytes) -> None:
+        if len(audio) > self._max_memory_bytes:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= len(previous)
+            self._memory[key] = audio
+            self._memory_bytes += len(audio)
+            while self._memory_bytes > self._max_memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+                self.evictions += 1
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Look up audio in memory, then on disk (promoting it to memory)."""
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.hits_memory += 1
+                return audio
+
+        if self._directory is not None:
+            audio = await asyncio.to_thread(self._read, key)
+            if audio is not None:
+                self._remember(key, audio)
+                self.hits_disk += 1
+                return audio
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, audio: bytes) -> None:
+        """Store audio in both tiers."""
+        self._remember(key, audio)
+        if self._directory is not None:
+            try:
+                await asyncio.to_thread(self._write, key, audio)
+            except OSError as e:
+                logger.warning(f"Could not write TTS cache entry {key}: {e}")
+
+    def _load_disk_index(self) -> None:
+        """Scan the directory for existing files, once; the lock isn't held meanwhile."""
+        if self._disk is not None:
+            return
+        files = []
+        for path in self._directory.glob("*/*.pcm"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, path.stem, stat.st_size))
+        with self._lock:
+            if self._disk is None:
+                self._disk = OrderedDict((key, size) for _, key, size in sorted(files))
+                self._disk_bytes = sum(self._disk.values())
+
+    def _read(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            audio = path.read_bytes()
+            # The mtime is the recency that eviction goes by, in this and other processes
+            os.utime(path)
+        except OSError:
+            return None
+        self._load_disk_index()
+        with self._lock:
+            disk = self._disk
+            if key not in disk:
+                # Written by another process sharing the directory
+                disk[key] = len(audio)
+                self._disk_bytes += len(audio)
+            disk.move_to_end(key)
+        return audio
+
+    def _write(self, key: str, audio: bytes) -> None:
+        if len(audio) > self._max_disk_bytes:
+            return
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(audio)
+        os.replace(tmp, path)
+        self._load_disk_index()
+        with self._lock:
+            disk = self._disk
+            self._disk_bytes += len(audio) - disk.pop(key, 0)
+            disk[key] = len(audio)
+            evicted = []
+            while self._disk_bytes > self._max_disk_bytes:
+                old_key, size = disk.popitem(last=False)
+                self._disk_bytes -= size
+                evicted.append(old_key)
+            self.disk_evictions += len(evicted)
+        for old_key in evicted:
+            # Another process may have evicted it already
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self._path(old_key))
+
+    def contains(self, key: str) -> bool:
+        """Whether audio for this key is cached in either tier."""
+        with self._lock:
+            if key in self._memory:
+                return True
+        path = self._path(key)
+        return path is not None and path.exists()
+
+    def stats(self) -> dict:
+        """Hit, miss and eviction counters plus current memory usage."""
+        lookups = self.hits_memory + self.hits_disk + self.misses
+        return {
+            "hits_memory": self.hits_memory,
+            "hits_disk": self.hits_disk,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": (self.hits_memory + self.hits_disk) / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "disk_evictions": self.disk_evictions,
+            "disk_bytes": self._disk_bytes,
+        }
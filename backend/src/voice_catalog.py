@@ -0,0 +1,309 @@
+"""
+Murf voice catalog, cached on disk and indexed for lookups.
+
+Murf's voice list is fetched once and kept in a small JSON file, refreshed
+when it is older than a TTL. Loading it needs no network access, so the TTS
+can check its voice and style when it is constructed: a typo in a voice id
+fails at startup with suggestions, instead of as an HTTP error on the first
+sentence of a live call. Without a cached catalog nothing is checked.
+
+Run from ``backend/`` to refresh the cache and list voices::
+
+    uv run python src/get_murf_voices.py --refresh --language en-US
+"""
+import asyncio
+import difflib
+import json
+import logging
+import os
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+MURF_API_URL = "https://api.murf.ai/v1"
+DEFAULT_CATALOG_PATH = Path(".voice_catalog.json")
+DEFAULT_TTL = 24 * 60 * 60
+
+# Bump when the cached layout changes so old files are refetched
+_FORMAT_VERSION = 1
+
+
+def _key(value: str) -> str:
+    return value.strip().lower()
+
+
+@dataclass(frozen=True)
+class Voice:
+    """One Murf voice."""
+
+    voice_id: str
+    name: str
+    gender: str
+    locale: str
+    locales: tuple[str, ...] = ()
+    styles: tuple[str, ...] = ()
+
+    @property
+    def languages(self) -> set[str]:
+        """Lower-cased locales the voice speaks plus their bare languages ("en-us" and "en")."""
+        keys = set()
+        for locale in (self.locale, *self.locales):
+            if locale:
+                keys.add(_key(locale))
+                keys.add(_key(locale.split("-")[0]))
+        return keys
+
+    @classmethod
+    def from_api(cls, data: dict) -> "Voice":
+        """Build a voice from an entry of Murf's /speech/voices response."""
+        supported = data.get("supportedLocales") or {}
+        styles = list(data.get("availableStyles") or [])
+        for detail in supported.values():
+            if isinstance(detail, dict):
+                styles.extend(detail.get("availableStyles") or [])
+        return cls(
+            voice_id=data["voiceId"],
+            name=data.get("displayName") or data.get("name") or data["voiceId"],
+            gender=data.get("gender") or "",
+            locale=data.get("locale") or data.get("language") or "",
+            locales=tuple(supported),
+            styles=tuple(dict.fromkeys(styles)),
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "voice_id": self.voice_id,
+            "name": self.name,
+            "gender": self.gender,
+            "locale": self.locale,
+            "locales": list(self.locales),
+            "styles": list(self.styles),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Voice":
+        return cls(
+            voice_id=data["voice_id"],
+            name=data["name"],
+            gender=data["gender"],
+            locale=data["locale"],
+            locales=tuple(data.get("locales", ())),
+            styles=tuple(data.get("styles", ())),
+        )
+
+
+class VoiceCatalog:
+    """Voices indexed by id, language, gender and style."""
+
+    def __init__(self, voices: Iterable[Voice], *, fetched_at: Optional[float] = None) -> None:
+        """
+        Index a list of voices.
+
+        Args:
+            voices: The voices; later duplicates of an id replace earlier ones
+            fetched_at: When the list was fetched from Murf (epoch seconds), defaults to now
+        """
+        self.fetched_at = time.time() if fetched_at is None else fetched_at
+        self._by_id: dict[str, Voice] = {}
+        for voice in voices:
+            self._by_id[_key(voice.voice_id)] = voice
+        self._by_language: dict[str, set[str]] = {}
+        self._by_gender: dict[str, set[str]] = {}
+        self._by_style: dict[str, set[str]] = {}
+        for key, voice in self._by_id.items():
+            for language in voice.languages:
+                self._by_language.setdefault(language, set()).add(key)
+            if voice.gender:
+                self._by_gender.setdefault(_key(voice.gender), set()).add(key)
+            for style in voice.styles:
+                self._by_style.setdefault(_key(style), set()).add(key)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __iter__(self) -> Iterator[Voice]:
+        return iter(self._by_id.values())
+
+    def __contains__(self, voice_id: str) -> bool:
+        return _key(voice_id) in self._by_id
+
+    def get(self, voice_id: str) -> Optional[Voice]:
+        """The voice with this id (case-insensitive), or None."""
+        return self._by_id.get(_key(voice_id))
+
+    def age(self) -> float:
+        """Seconds since the catalog was fetched."""
+        return time.time() - self.fetched_at
+
+    def find(
+        self,
+        *,
+        language: Optional[str] = None,
+        gender: Optional[str] = None,
+        style: Optional[str] = None,
+        name: Optional[str] = None,
+    ) -> list[Voice]:
+        """
+        Voices matching every given filter, sorted by locale and name.
+
+        Args:
+            language: Locale ("en-US") or bare language ("en")
+            gender: e.g. "Male" or "Female"
+            style: A style the voice supports, e.g. "Conversational"
+            name: Substring of the voice's name
+        """
+        keys: Optional[set[str]] = None
+        for index, value in (
+            (self._by_language, language),
+            (self._by_gender, gender),
+            (self._by_style, style),
+        ):
+            if value is None:
+                continue
+            matches = index.get(_key(value), set())
+            keys = matches if keys is None else keys & matches
+        voices = self._by_id.values() if keys is None else (self._by_id[key] for key in keys)
+        if name is not None:
+            needle = _key(name)
+            voices = (voice for voice in voices if needle in voice.name.lower())
+        return sorted(voices, key=lambda voice: (voice.locale, voice.name, voice.voice_id))
+
+    def validate(self, voice_id: str, style: Optional[str] = None) -> Voice:
+        """
+        Check that a voice exists and supports a style.
+
+        Raises:
+            ValueError: The voice is unknown, or doesn't offer the style;
+                the message suggests close matches
+        """
+        voice = self.get(voice_id)
+        if voice is None:
+            close = difflib.get_close_matches(_key(voice_id), list(self._by_id), n=3)
+            hint = f"; did you mean {', '.join(self._by_id[key].voice_id for key in close)}?" if close else ""
+            raise ValueError(f"Unknown Murf voice {voice_id!r}{hint}")
+        # A voice listed without styles gives nothing to check against
+        if style is not None and voice.styles and _key(style) not in {_key(s) for s in voice.styles}:
+            raise ValueError(
+                f"Murf voice {voice.voice_id!r} has no style {style!r}, expected one of {sorted(voice.styles)}"
+            )
+        return voice
+
+    def to_dict(self) -> dict:
+        return {
+            "version": _FORMAT_VERSION,
+            "fetched_at": self.fetched_at,
+            "voices": [voice.to_dict() for voice in self],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "VoiceCatalog":
+        if data.get("version") != _FORMAT_VERSION:
+            raise ValueError(f"unsupported voice catalog version {data.get('version')!r}")
+        return cls((Voice.from_dict(v) for v in data["voices"]), fetched_at=data["fetched_at"])
+
+    @classmethod
+    def from_api(cls, data) -> "VoiceCatalog":
+        """Build a catalog from Murf's /speech/voices response (a list, or a dict wrapping one)."""
+        if isinstance(data, dict):
+            data = data.get("voices", data.get("data", []))
+        return cls(Voice.from_api(entry) for entry in data if entry.get("voiceId"))
+
+
+def save_catalog(catalog: VoiceCatalog, path: Path = DEFAULT_CATALOG_PATH) -> None:
+    """Atomically write the catalog to disk."""
+    path = Path(path)
+    tmp = path.with_name(f"{path.name}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(catalog.to_dict(), f, ensure_ascii=False)
+    os.replace(tmp, path)
+    _loaded.pop(path, None)
+
+
+# path -> (mtime_ns, catalog); every TTS instance checks its voice, so parse each file once
+_loaded: dict[Path, tuple[int, VoiceCatalog]] = {}
+
+
+def load_catalog(path: Path = DEFAULT_CATALOG_PATH) -> Optional[VoiceCatalog]:
+    """
+    The cached catalog, however old, or None if there is no usable cache.
+
+    Never touches the network.
+    """
+    path = Path(path)
+    try:
+        mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    cached = _loaded.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    try:
+        with open(path, encoding="utf-8") as f:
+            catalog = VoiceCatalog.from_dict(json.load(f))
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Ignoring unreadable voice catalog {path}: {e}")
+        return None
+    _loaded[path] = (mtime, catalog)
+    return catalog
+
+
+async def fetch_catalog(
+    api_key: str,
+    *,
+    base_url: str = MURF_API_URL,
+    timeout: float = 10.0,
+) -> VoiceCatalog:
+    """
+    Fetch the voice list from Murf.
+
+    Raises:
+        aiohttp.ClientError: The request failed
+    """
+    url = f"{base_url.rstrip('/')}/speech/voices"
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    # One line: parenthesized context managers need Python 3.10
+    async with aiohttp.ClientSession(timeout=client_timeout) as session, session.get(url, headers={"api-key": api_key}) as response:
+        response.raise_for_status()
+        return VoiceCatalog.from_api(await response.json())
+
+
+async def get_catalog(
+    api_key: Optional[str] = None,
+    *,
+    path: Path = DEFAULT_CATALOG_PATH,
+    ttl: float = DEFAULT_TTL,
+    refresh: bool = False,
+    base_url: str = MURF_API_URL,
+) -> Optional[VoiceCatalog]:
+    """
+    The cached catalog, refetched from Murf when older than ``ttl``.
+
+    If fetching fails (or there is no API key) a stale cache is still
+    returned; None only when there is neither.
+
+    Args:
+        api_key: Murf API key, defaults to MURF_API_KEY
+        path: The cache file
+        ttl: Maximum age in seconds of a cache used without refetching
+        refresh: Refetch regardless of age
+        base_url: Murf API base URL
+    """
+    catalog = load_catalog(path)
+    if catalog is not None and not refresh and catalog.age() < ttl:
+        return catalog
+    api_key = api_key or os.environ.get("MURF_API_KEY")
+    if not api_key:
+        return catalog
+    try:
+        fresh = await fetch_catalog(api_key, base_url=base_url)
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+        logger.warning(f"Could not refresh the Murf voice catalog: {e}")
+        return catalog
+    save_catalog(fresh, path)
+    return fresh
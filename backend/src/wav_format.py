@@ -0,0 +1,199 @@
+"""
+Streaming WAV parsing and PCM format conversion.
+
+Murf returns RIFF/WAVE files whose header is not always 44 bytes: encoders
+may add LIST or fact chunks before the audio, and the format chunk decides
+the sample rate, channel count and bit depth. WavStreamParser walks the
+chunk list as bytes arrive and hands back the audio payload as memoryview
+slices of the received buffers, and PCMConverter turns whatever format was
+found into the 16-bit PCM the TTS emits, passing matching audio through
+untouched.
+"""
+import struct
+from typing import NamedTuple, Optional, Union
+
+import numpy as np
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+_CHUNK_HEADER = struct.Struct("<4sI")
+_FMT = struct.Struct("<HHIIHH")
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+class WavFormat(NamedTuple):
+    """Contents of a WAV ``fmt `` chunk."""
+
+    encoding: int
+    num_channels: int
+    sample_rate: int
+    bits_per_sample: int
+
+    @property
+    def block_align(self) -> int:
+        return self.num_channels * self.bits_per_sample // 8
+
+
+def _parse_fmt(body: memoryview) -> WavFormat:
+    if len(body) < _FMT.size:
+        raise ValueError("WAV fmt chunk is too short")
+    encoding, num_channels, sample_rate, _, _, bits = _FMT.unpack_from(body)
+    if encoding == WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+        # The real format is the first two bytes of the sub-format GUID
+        (encoding,) = struct.unpack_from("<H", body, 24)
+    wav_format = WavFormat(encoding, num_channels, sample_rate, bits)
+    supported = (encoding == WAVE_FORMAT_PCM and bits in (8, 16, 24, 32)) or (
+        encoding == WAVE_FORMAT_IEEE_FLOAT and bits in (32, 64)
+    )
+    if not supported or num_channels < 1 or sample_rate < 1:
+        raise ValueError(f"Unsupported WAV format: {wav_format}")
+    return wav_format
+
+
+class WavStreamParser:
+    """
+    Incremental RIFF/WAVE parser.
+
+    Header bytes are buffered until the ``data`` chunk starts; from then on
+    push() returns slices of the caller's buffers without copying. Chunks
+    after ``data`` are ignored. Input that does not start with ``RIFF`` is
+    treated as raw PCM in the expected format.
+    """
+
+    def __init__(self) -> None:
+        self._header = bytearray()
+        self._remaining: Optional[int] = None
+        self.format: Optional[WavFormat] = None
+        self.raw = False
+
+    @property
+    def started(self) -> bool:
+        """Whether the header has been parsed (or the input found to be raw PCM)."""
+        return self._remaining is not None or self.raw
+
+    def push(self, data: Buffer) -> memoryview:
+        """Add received bytes and return the audio payload they contain."""
+        view = memoryview(data).cast("B")
+        if self.raw:
+            return view
+        if self._remaining is None:
+            self._header += view
+            if len(self._header) < 4:
+                return memoryview(b"")
+            if self._header[:4] != b"RIFF":
+                self.raw = True
+                view, self._header = memoryview(bytes(self._header)), bytearray()
+                return view
+            offset = self._parse_header()
+            if offset is None:
+                return memoryview(b"")
+            # The payload starts inside the header buffer; only this one tail is copied
+            view = memoryview(bytes(self._header[offset:]))
+            self._header = bytearray()
+
+        payload = view[: self._remaining]
+        self._remaining -= len(payload)
+        return payload
+
+    def _parse_header(self) -> Optional[int]:
+        header = memoryview(bytes(self._header))
+        if len(header) < 12:
+            return None
+        if header[8:12] != b"WAVE":
+            raise ValueError("RIFF file is not WAVE audio")
+        offset = 12
+        while len(header) >= offset + _CHUNK_HEADER.size:
+            chunk_id, size = _CHUNK_HEADER.unpack_from(header, offset)
+            body_start = offset + _CHUNK_HEADER.size
+            if chunk_id == b"data":
+                if self.format is None:
+                    raise ValueError("WAV data chunk precedes its fmt chunk")
+                # Streaming encoders write 0 or 0xFFFFFFFF when the length is unknown
+                self._remaining = size if 0 < size < 0xFFFFFFFF else 1 << 62
+                return body_start
+            # Chunks are padded to an even size
+            next_offset = body_start + size + (size & 1)
+            if chunk_id == b"fmt ":
+                if len(header) < body_start + size:
+                    return None
+                self.format = _parse_fmt(header[body_start : body_start + size])
+            offset = next_offset
+        return None
+
+
+def _to_float(samples: memoryview, wav_format: WavFormat) -> np.ndarray:
+    bits = wav_format.bits_per_sample
+    if wav_format.encoding == WAVE_FORMAT_IEEE_FLOAT:
+        return np.frombuffer(samples, dtype="<f4" if bits == 32 else "<f8").astype(np.float32)
+    if bits == 8:
+        return (np.frombuffer(samples, dtype=np.uint8).astype(np.float32) - 128) / 128
+    if bits == 16:
+        return np.frombuffer(samples, dtype="<i2").astype(np.float32) / 32768
+    if bits == 24:
+        raw = np.frombuffer(samples, dtype=np.uint8).reshape(-1, 3)
+        values = raw[:, 0].astype(np.int32) | (raw[:, 1].astype(np.int32) << 8) | (raw[:, 2].astype(np.int32) << 16)
+        values = np.where(values & 0x800000, values - (1 << 24), values)
+        return values.astype(np.float32) / (1 << 23)
+    return np.frombuffer(samples, dtype="<i4").astype(np.float32) / (1 << 31)
+
+
+class PCMConverter:
+    """
+    Converts a stream of WAV samples to 16-bit PCM at a target rate and channel count.
+
+    Audio that already matches is returned as-is. Otherwise samples are
+    decoded with NumPy, downmixed by averaging (or upmixed by duplicating
+    mono), and linearly resampled. Resampling state carries across calls so
+    chunk boundaries don't click.
+    """
+
+    def __init__(self, wav_format: WavFormat, sample_rate: int, num_channels: int = 1) -> None:
+        self._format = wav_format
+        self._sample_rate = sample_rate
+        self._num_channels = num_channels
+        self.passthrough = (
+            wav_format.encoding == WAVE_FORMAT_PCM
+            and wav_format.bits_per_sample == 16
+            and wav_format.sample_rate == sample_rate
+            and wav_format.num_channels == num_channels
+        )
+        self._partial = b""
+        self._step = wav_format.sample_rate / sample_rate
+        # Position of the next output sample, relative to the last input sample kept
+        self._position = 0.0
+        self._last: Optional[np.ndarray] = None
+
+    def convert(self, data: memoryview) -> Buffer:
+        """Convert the next piece of the stream; partial samples are held until complete."""
+        if self.passthrough:
+            return data
+        block_align = self._format.block_align
+        if self._partial:
+            data = memoryview(self._partial + bytes(data))
+        usable = len(data) - len(data) % block_align
+        self._partial = bytes(data[usable:])
+        if not usable:
+            return b""
+
+        samples = _to_float(data[:usable], self._format).reshape(-1, self._format.num_channels)
+        if self._format.num_channels != self._num_channels:
+            mono = samples.mean(axis=1, keepdims=True)
+            samples = np.repeat(mono, self._num_channels, axis=1) if self._num_channels > 1 else mono
+        if self._format.sample_rate != self._sample_rate:
+            samples = self._resample(samples)
+        return np.clip(np.rint(samples * 32768), -32768, 32767).astype("<i2").tobytes()
+
+    def _resample(self, samples: np.ndarray) -> np.ndarray:
+        if self._last is not None:
+            samples = np.concatenate([self._last, samples])
+        end = len(samples) - 1
+        count = max(0, int(np.floor((end - self._position) / self._step)) + 1)
+        positions = self._position + self._step * np.arange(count)
+        index = np.arange(len(samples))
+        out = np.stack([np.interp(positions, index, samples[:, ch]) for ch in range(samples.shape[1])], axis=1)
+        self._position = self._position + self._step * count - end
+        self._last = samples[-1:]
+        return out.astype(np.float32)
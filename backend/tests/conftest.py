@@ -0,0 +1,96 @@
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+BENCHMARK_DIR = Path(__file__).resolve().parents[1] / ".benchmarks"
+BASELINE_FILE = BENCHMARK_DIR / "baseline.json"
+LATEST_FILE = BENCHMARK_DIR / "latest.json"
+
+
+def pytest_addoption(parser) -> None:
+    group = parser.getgroup("benchmark")
+    group.addoption("--benchmark", action="store_true", help="Run the microbenchmarks in test_benchmarks.py")
+    group.addoption("--benchmark-full", action="store_true", help="Include the largest (slow) benchmark sizes")
+    group.addoption("--benchmark-save", action="store_true", help=f"Save results as the baseline in {BASELINE_FILE}")
+    group.addoption(
+        "--benchmark-threshold",
+        type=float,
+        default=0.5,
+        help="Fail when a benchmark is this much slower than its baseline (0.5 = 50%%)",
+    )
+
+
+def pytest_configure(config) -> None:
+    config.addinivalue_line("markers", "benchmark: microbenchmark, only run with --benchmark")
+    config.addinivalue_line("markers", "benchmark_full: largest benchmark size, only run with --benchmark-full")
+    config._benchmark_results = {}
+
+
+def pytest_collection_modifyitems(config, items) -> None:
+    for item in items:
+        if "benchmark" in item.keywords and not config.getoption("--benchmark"):
+            item.add_marker(pytest.mark.skip(reason="benchmarks run with --benchmark"))
+        elif "benchmark_full" in item.keywords and not config.getoption("--benchmark-full"):
+            item.add_marker(pytest.mark.skip(reason="large benchmark sizes run with --benchmark-full"))
+
+
+def pytest_sessionfinish(session) -> None:
+    results = session.config._benchmark_results
+    if not results:
+        return
+    BENCHMARK_DIR.mkdir(exist_ok=True)
+    paths = [LATEST_FILE]
+    if session.config.getoption("--benchmark-save"):
+        baseline = json.loads(BASELINE_FILE.read_text()) if BASELINE_FILE.exists() else {}
+        results = {**baseline, **results}
+        paths = [LATEST_FILE, BASELINE_FILE]
+    for path in paths:
+        path.write_text(json.dumps(results, indent=2, sort_keys=True))
+
+
+class Benchmark:
+    """
+    Times a callable and compares it against the saved baseline.
+
+    Regressions are judged on the fastest round, which is far less
+    sensitive to scheduler and GC noise than the median.
+    """
+
+    def __init__(self, name: str, config) -> None:
+        self._name = name
+        self._config = config
+
+    def __call__(self, func: Callable[[], object], *, min_time: float = 0.5, max_rounds: int = 10_000) -> float:
+        func()  # warm up caches and lazy imports
+        timings = []
+        deadline = time.perf_counter() + min_time
+        while len(timings) < max_rounds and (len(timings) < 5 or time.perf_counter() < deadline):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        median = statistics.median(timings)
+        self._config._benchmark_results[self._name] = {
+            "median": median,
+            "min": min(timings),
+            "rounds": len(timings),
+        }
+
+        if not self._config.getoption("--benchmark-save") and BASELINE_FILE.exists():
+            baseline = json.loads(BASELINE_FILE.read_text()).get(self._name)
+            threshold = self._config.getoption("--benchmark-threshold")
+            fastest = min(timings)
+            if baseline and fastest > baseline["min"] * (1 + threshold):
+                pytest.fail(
+                    f"{self._name} regressed: {fastest * 1e6:.1f}us vs baseline "
+                    f"{baseline['min'] * 1e6:.1f}us (threshold {threshold:.0%})"
+                )
+        return median
+
+
+@pytest.fixture
+def benchmark(request) -> Benchmark:
+    return Benchmark(request.node.nodeid.split("::", 1)[-1], request.config)
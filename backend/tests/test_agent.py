@@ -1,7 +1,23 @@
+import os
+
 import pytest
 from livekit.agents import AgentSession, inference, llm
 
-from agent import Assistant
+import agent
+from agent import SDRAgent
+from lead_store import Lead
+
+# These are evaluations against a hosted model through LiveKit Inference
+pytestmark = pytest.mark.skipif(
+    not (os.environ.get("LIVEKIT_API_KEY") and os.environ.get("LIVEKIT_API_SECRET")),
+    reason="LiveKit Inference credentials are not configured",
+)
+
+
+@pytest.fixture(autouse=True)
+def lead_storage(monkeypatch, tmp_path):
+    """Any lead a session saves goes to a temporary store, not shared-data."""
+    monkeypatch.setattr(agent, "lead_storage", agent.open_lead_storage(tmp_path))
 
 
 def _llm() -> llm.LLM:
@@ -13,9 +29,9 @@ async def test_offers_assistance() -> None:
     """Evaluation of the agent's friendly nature."""
     async with (
         _llm() as llm,
-        AgentSession(llm=llm) as session,
+        AgentSession[Lead](userdata=Lead(), llm=llm) as session,
     ):
-        await session.start(Assistant())
+        await session.start(SDRAgent())
 
         # Run an agent turn following the user's greeting
         result = await session.run(user_input="Hello")
@@ -45,9 +61,9 @@ async def test_grounding() -> None:
     """Evaluation of the agent's ability to refuse to answer when it doesn't know something."""
     async with (
         _llm() as llm,
-        AgentSession(llm=llm) as session,
+        AgentSession[Lead](userdata=Lead(), llm=llm) as session,
     ):
-        await session.start(Assistant())
+        await session.start(SDRAgent())
 
         # Run an agent turn following the user's request for information about their birth city (not known by the agent)
         result = await session.run(user_input="What city was I born in?")
@@ -87,9 +103,9 @@ async def test_refuses_harmful_request() -> None:
     """Evaluation of the agent's ability to refuse inappropriate or harmful requests."""
     async with (
         _llm() as llm,
-        AgentSession(llm=llm) as session,
+        AgentSession[Lead](userdata=Lead(), llm=llm) as session,
     ):
-        await session.start(Assistant())
+        await session.start(SDRAgent())
 
         # Run an agent turn following an inappropriate request from the user
         result = await session.run(
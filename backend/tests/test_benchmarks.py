@@ -0,0 +1,114 @@
+"""
+Microbenchmarks for the per-turn hot paths.
+
+Run from backend/ with ``pytest tests/test_benchmarks.py --benchmark``
+(add ``--benchmark-full`` for the 100k FAQ / 1M lead / 60 s sizes).
+``--benchmark-save`` records the results as the baseline in
+``.benchmarks/baseline.json``; later runs fail when a benchmark's fastest
+round is more than ``--benchmark-threshold`` slower than the baseline's
+fastest round (the median is recorded too, but is noisier). Baselines are
+machine-specific, so save one on the machine that compares against it.
+"""
+import json
+import random
+import struct
+
+import pytest
+
+from faq_search import FAQIndex
+from lead_store import JSONLLeadStore, Lead, SQLiteLeadStore
+from murf_tts import AudioFramer
+from wav_format import WavStreamParser
+
+pytestmark = pytest.mark.benchmark
+
+SAMPLE_RATE = 24000
+WORDS = [
+    "payment", "gateway", "subscription", "refund", "settlement", "invoice",
+    "payout", "card", "upi", "wallet", "netbanking", "dashboard", "api",
+    "integration", "webhook", "dispute", "chargeback", "pricing", "fee", "merchant",
+    "onboarding", "kyc", "international", "currency", "recurring", "link",
+    "checkout", "plugin", "report", "analytics", "reconciliation",
+]
+
+
+def _full(size):
+    return pytest.param(size, marks=pytest.mark.benchmark_full)
+
+
+def _company_data(entries: int) -> dict:
+    rng = random.Random(entries)
+
+    def sentence(length: int) -> str:
+        return " ".join(rng.choice(WORDS) for _ in range(length))
+
+    faq = [{"question": f"{sentence(6)} {i}?", "answer": sentence(30)} for i in range(entries)]
+    return {"company": {"name": "Bench"}, "faq": faq}
+
+
+def _lead(i: int) -> dict:
+    return Lead(name=f"Lead {i}", company=f"Company {i % 997}", email=f"lead{i}@example.com", timeline="soon").to_dict()
+
+
+def _wav(seconds: int) -> bytes:
+    pcm = bytes(SAMPLE_RATE * seconds * 2)
+    fmt = struct.pack("<HHIIHH", 1, 1, SAMPLE_RATE, SAMPLE_RATE * 2, 2, 16)
+    body = b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt + b"data" + struct.pack("<I", len(pcm)) + pcm
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+@pytest.mark.parametrize("entries", [10, 1_000, _full(100_000)])
+def test_search_faq(benchmark, entries) -> None:
+    index = FAQIndex.from_company_data(_company_data(entries))
+    queries = iter(["how much is the payment gateway fee", "refund settlement time", "subscripshun pricing"] * 100_000)
+    benchmark(lambda: index.search(next(queries)))
+
+
+def _visits(records: int):
+    """Sessions to save after ``records`` leads: new leads alternating with returning visitors."""
+    for i in range(records, records + 1_000_000):
+        yield [_lead(i) if i % 2 else {"email": f"lead{i % records}@example.com", "timeline": "now"}]
+
+
+@pytest.mark.parametrize("records", [10, 10_000, _full(1_000_000)])
+def test_save_lead_jsonl(benchmark, tmp_path, records) -> None:
+    path = tmp_path / "leads.jsonl"
+    with open(path, "w") as f:
+        f.writelines(json.dumps(_lead(i)) + "\n" for i in range(records))
+    store = JSONLLeadStore(path)
+    visits = _visits(records)
+    # The first upsert indexes the log; time the saves after it
+    store.upsert_many(next(visits))
+    try:
+        benchmark(lambda: store.upsert_many(next(visits)))
+    finally:
+        store.close()
+
+
+@pytest.mark.parametrize("records", [10, 10_000, _full(1_000_000)])
+def test_save_lead_sqlite(benchmark, tmp_path, records) -> None:
+    store = SQLiteLeadStore(tmp_path / "leads.db")
+    store.append_many([_lead(i) for i in range(records)])
+    visits = _visits(records)
+    try:
+        benchmark(lambda: store.upsert_many(next(visits)))
+    finally:
+        store.close()
+
+
+@pytest.mark.parametrize("seconds", [1, 10, _full(60)])
+def test_frame_wav(benchmark, seconds) -> None:
+    wav = _wav(seconds)
+    chunks = [wav[i : i + 8192] for i in range(0, len(wav), 8192)]
+
+    def frame() -> int:
+        parser = WavStreamParser()
+        framer = AudioFramer(SAMPLE_RATE)
+        count = 0
+        for chunk in chunks:
+            for _ in framer.push(parser.push(chunk)):
+                count += 1
+        return count
+
+    assert frame() == seconds * 50
+    benchmark(frame)
@@ -0,0 +1,86 @@
+from pathlib import Path
+
+from faq_context import (
+    CONTEXT_HEADER,
+    build_faq_context,
+    estimate_tokens,
+    is_question,
+    select_snippets,
+)
+from faq_search import FAQEntry
+from faq_source import load_snapshot
+
+FAQ_FILE = Path(__file__).resolve().parents[2] / "shared-data" / "day5_company_faq.json"
+
+
+def _entry(title: str, answer: str) -> FAQEntry:
+    return FAQEntry("faq", title, answer)
+
+
+def test_context_contains_best_match_within_budget() -> None:
+    snapshot = load_snapshot(FAQ_FILE)
+    context = build_faq_context(snapshot, "How long does integration take?", max_tokens=200)
+    lines = context.splitlines()
+    assert lines[0] == CONTEXT_HEADER
+    assert lines[1].startswith("- How long does integration take?: ")
+    assert sum(estimate_tokens(line) + 1 for line in lines[1:]) <= 200
+
+
+def test_no_context_for_unrelated_or_empty_messages() -> None:
+    snapshot = load_snapshot(FAQ_FILE)
+    assert build_faq_context(snapshot, "um okay") is None
+    assert build_faq_context(snapshot, "   ") is None
+    assert build_faq_context(snapshot, "pricing", max_tokens=0) is None
+
+
+def test_statements_get_no_context() -> None:
+    snapshot = load_snapshot(FAQ_FILE)
+    for statement in (
+        "My name is Dave and I work at Acme",
+        "My email is dave@acme.com",
+        "We have a team of ten people",
+        "We run an online store",
+    ):
+        assert build_faq_context(snapshot, statement) is None, statement
+    assert build_faq_context(snapshot, "Do you support subscriptions?") is not None
+
+
+def test_is_question() -> None:
+    assert is_question("Do you support subscriptions?")
+    assert is_question("so how much does it cost")
+    assert is_question("Tell me about payouts")
+    assert is_question("we sell online, is there a free tier?")
+    assert not is_question("We run an online store")
+    assert not is_question("okay")
+    assert not is_question("")
+
+
+def test_poorly_covered_questions_get_no_context() -> None:
+    snapshot = load_snapshot(FAQ_FILE)
+    query = "What is the best restaurant for a team lunch?"
+    assert build_faq_context(snapshot, query) is None
+    assert build_faq_context(snapshot, query, min_coverage=0.0) is not None
+
+
+def test_weak_matches_are_dropped() -> None:
+    results = [(_entry("a", "Strong."), 10.0), (_entry("b", "Also good."), 6.0), (_entry("c", "Incidental."), 2.0)]
+    assert select_snippets(results, 100) == ["- a: Strong.", "- b: Also good."]
+
+
+def test_snippets_that_do_not_fit_are_skipped() -> None:
+    long_answer = "word " * 100
+    results = [(_entry("a", "Short."), 10.0), (_entry("b", long_answer), 9.0), (_entry("c", "Tiny."), 8.0)]
+    assert select_snippets(results, 20) == ["- a: Short.", "- c: Tiny."]
+
+
+def test_oversized_best_snippet_is_truncated() -> None:
+    snippets = select_snippets([(_entry("a", "word " * 100), 1.0)], 10)
+    assert len(snippets) == 1
+    assert snippets[0].endswith("…")
+    assert estimate_tokens(snippets[0]) <= 9
+
+
+def test_budget_too_small_to_truncate_into_gets_no_snippet() -> None:
+    results = [(_entry("a", "word " * 100), 1.0)]
+    assert select_snippets(results, 1) == []
+    assert select_snippets(results, 0) == []
@@ -0,0 +1,88 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from faq_search import FAQIndex, TrigramIndex, tokenize
+
+FAQ_FILE = Path(__file__).resolve().parents[2] / "shared-data" / "day5_company_faq.json"
+
+
+@pytest.fixture(scope="module")
+def company_data() -> dict:
+    with open(FAQ_FILE) as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="module")
+def index(company_data) -> FAQIndex:
+    return FAQIndex.from_company_data(company_data)
+
+
+def test_tokenize_drops_stopwords_and_stems() -> None:
+    assert tokenize("What are the Payments fees?") == ["payment", "fee"]
+
+
+def test_stopword_only_query_matches_nothing(index) -> None:
+    assert index.search("what is the a") == []
+
+
+def test_indexes_every_section(index, company_data) -> None:
+    sources = {entry.source for entry, _ in index.search("customers benefits pricing payment faq", top_k=len(index))}
+    assert {"faq", "products", "pricing", "target_customers", "key_benefits"} <= sources
+    assert len(index) == (
+        len(company_data["faq"]) + len(company_data["products"]) + len(company_data["pricing"]) + 2
+    )
+
+
+def test_ranks_best_match_first(index) -> None:
+    entry, _ = index.search("How long does integration take?")[0]
+    assert entry.title == "How long does integration take?"
+
+    entry, _ = index.search("tell me about subscriptions")[0]
+    assert entry.source in ("products", "pricing")
+    assert "Subscriptions" in entry.answer
+
+
+def test_top_k_is_ordered_and_bounded(index) -> None:
+    results = index.search("payment links pricing", top_k=3)
+    assert len(results) == 3
+    scores = [score for _, score in results]
+    assert scores == sorted(scores, reverse=True)
+
+
+@pytest.mark.parametrize(
+    ("query", "expected"),
+    [
+        ("razor pay pricing", "pricing"),
+        ("pay outs", "payout"),
+        ("subscripshun", "Subscriptions"),
+        ("integrashun", "integration"),
+    ],
+)
+def test_tolerates_asr_errors(index, query, expected) -> None:
+    entry, _ = index.search(query)[0]
+    assert expected.lower() in entry.answer.lower()
+
+
+def test_fuzzy_matching_can_be_disabled(company_data) -> None:
+    strict = FAQIndex.from_company_data(company_data, fuzzy_threshold=None)
+    assert strict.search("subscripshun") == []
+
+
+def test_trigram_lookup_threshold() -> None:
+    vocab = TrigramIndex(["subscription", "integration", "settlement"])
+    assert vocab.lookup("subscripshun", threshold=0.4)[0][0] == "subscription"
+    assert vocab.lookup("subscripshun", threshold=0.9) == []
+    assert vocab.lookup("xyz") == []
+
+
+def test_empty_index() -> None:
+    assert FAQIndex.from_company_data({}).search("pricing") == []
+
+
+def test_min_coverage_drops_incidental_matches(index) -> None:
+    query = "What is the best restaurant for a team lunch?"
+    assert index.search(query)
+    assert index.search(query, min_coverage=0.3) == []
+    assert index.search("Do you support subscriptions?", min_coverage=0.3)[0][0].title == "Subscriptions"
@@ -0,0 +1,220 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import faq_source
+from faq_source import FAQRegistry, FAQSource, QueryCache, load_snapshot, query_key
+
+FAQ_FILE = Path(__file__).resolve().parents[2] / "shared-data" / "day5_company_faq.json"
+
+
+def _write(path, answer: str, mtime: float) -> None:
+    data = {
+        "company": {"name": "Acme", "description": "Payments"},
+        "faq": [{"question": "How long does settlement take?", "answer": answer}],
+    }
+    path.write_text(json.dumps(data))
+    # Explicit mtimes so back-to-back writes within the clock's resolution still differ
+    os.utime(path, (mtime, mtime))
+
+
+def _answer(snapshot) -> str:
+    return snapshot.search("settlement")[0][0].answer
+
+
+def test_missing_file_gives_empty_snapshot(tmp_path) -> None:
+    snapshot = load_snapshot(tmp_path / "missing.json")
+    assert snapshot.company_data == {}
+    assert snapshot.search("pricing") == []
+    assert snapshot.company_name == "our company"
+
+
+def test_query_key_normalizes_case_punctuation_stopwords_and_plurals() -> None:
+    index = load_snapshot(FAQ_FILE).index
+    assert query_key("What are your Payment-Gateway fees?", index) == query_key("payment gateway fee", index)
+    assert query_key("pricing", index) != query_key("payouts", index)
+    assert query_key("What is your pricing?") == query_key("what IS your pricing")
+    assert query_key("What is your pricing?") != query_key("pricing")
+
+
+def test_query_key_keeps_joined_compounds_apart() -> None:
+    snapshot = load_snapshot(FAQ_FILE)
+    assert query_key("pay out", snapshot.index) != query_key("pay", snapshot.index)
+    assert snapshot.search("pay") == snapshot.index.search("pay")
+    assert snapshot.search("pay out") == snapshot.index.search("pay out")
+    assert snapshot.search("pay out") != snapshot.search("pay")
+
+
+def test_search_results_are_memoized_by_normalized_query(tmp_path, monkeypatch) -> None:
+    path = tmp_path / "faq.json"
+    _write(path, "Two days.", 1_000)
+    snapshot = load_snapshot(path)
+    calls = []
+    original = snapshot.index.search
+    monkeypatch.setattr(snapshot.index, "search", lambda *args, **kwargs: calls.append(args) or original(*args, **kwargs))
+
+    first = snapshot.search("How long does settlement take?")
+    assert snapshot.search("how LONG does the settlement take?!") == first
+    assert snapshot.search("long settlements take") == first
+    assert len(calls) == 1
+    # Callers get their own list and can't corrupt the cached entry
+    first.clear()
+    assert snapshot.search("long settlement take")
+    assert snapshot.cache.stats() == {"size": 1, "hits": 3, "misses": 1, "hit_ratio": 0.75}
+
+
+def test_query_cache_evicts_least_recently_used() -> None:
+    cache = QueryCache(max_size=2)
+    cache.put(("a",), (1,))
+    cache.put(("b",), (2,))
+    assert cache.get(("a",)) == (1,)
+    cache.put(("c",), (3,))
+    assert cache.get(("b",)) is None
+    assert len(cache) == 2
+    disabled = QueryCache(max_size=0)
+    disabled.put(("a",), (1,))
+    assert disabled.get(("a",)) is None
+
+
+def test_reload_swaps_snapshot_and_keeps_old_one_intact(tmp_path) -> None:
+    path = tmp_path / "faq.json"
+    _write(path, "Two days.", 1_000)
+    source = FAQSource(path)
+    pinned = source.snapshot
+    assert not source.reload_if_changed()
+
+    _write(path, "Next day.", 2_000)
+    assert source.reload_if_changed()
+    assert _answer(source.snapshot) == "Next day."
+    # A call that started before the reload still sees its own version
+    assert _answer(pinned) == "Two days."
+    assert source.reloads == 1
+
+
+def test_malformed_edit_keeps_previous_snapshot(tmp_path) -> None:
+    path = tmp_path / "faq.json"
+    _write(path, "Two days.", 1_000)
+    source = FAQSource(path)
+
+    path.write_text('{"faq": [')
+    os.utime(path, (2_000, 2_000))
+    assert not source.reload_if_changed()
+    assert _answer(source.snapshot) == "Two days."
+
+    _write(path, "Same day.", 3_000)
+    assert source.reload_if_changed()
+    assert _answer(source.snapshot) == "Same day."
+
+
+def test_missing_or_empty_file_keeps_previous_snapshot(tmp_path) -> None:
+    path = tmp_path / "faq.json"
+    _write(path, "Two days.", 1_000)
+    source = FAQSource(path)
+
+    # An editor's atomic save can briefly remove the file
+    path.unlink()
+    assert not source.reload_if_changed()
+    assert _answer(source.snapshot) == "Two days."
+    assert source.snapshot.company_name == "Acme"
+
+    path.write_text("{}")
+    os.utime(path, (2_000, 2_000))
+    assert not source.reload_if_changed()
+    assert _answer(source.snapshot) == "Two days."
+
+    _write(path, "Same day.", 3_000)
+    assert source.reload_if_changed()
+    assert _answer(source.snapshot) == "Same day."
+
+
+def test_watcher_picks_up_changes(tmp_path) -> None:
+    path = tmp_path / "faq.json"
+    _write(path, "Two days.", 1_000)
+    source = FAQSource(path)
+    source.watch(interval=0.01)
+    try:
+        _write(path, "Next day.", 2_000)
+        deadline = time.monotonic() + 5
+        while source.reloads == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        source.stop()
+    assert _answer(source.snapshot) == "Next day."
+
+
+def _registry(tmp_path, tenants, **kwargs) -> FAQRegistry:
+    directory = tmp_path / "tenants"
+    directory.mkdir()
+    for i, tenant in enumerate(tenants):
+        _write(directory / f"{tenant}.json", f"{tenant} answer", 1_000 + i)
+    default = tmp_path / "default.json"
+    _write(default, "default answer", 1_000)
+    return FAQRegistry(directory, FAQSource(default), **kwargs)
+
+
+def test_registry_loads_tenants_lazily_and_shares_them(tmp_path) -> None:
+    registry = _registry(tmp_path, ["acme", "globex"])
+    assert registry.stats()["tenants"] == 0
+
+    first = registry.get("acme")
+    assert _answer(first) == "acme answer"
+    assert registry.get("acme") is first
+    stats = registry.stats()
+    assert (stats["tenants"], stats["hits"], stats["misses"]) == (1, 1, 1)
+
+
+def test_registry_falls_back_to_default(tmp_path) -> None:
+    registry = _registry(tmp_path, ["acme"])
+    for tenant in (None, "", "unknown", "../default", "a/b"):
+        assert _answer(registry.get(tenant)) == "default answer"
+    assert registry.stats()["tenants"] == 0
+
+    # An unknown tenant is not remembered as missing
+    _write(tmp_path / "tenants" / "unknown.json", "late answer", 2_000)
+    assert _answer(registry.get("unknown")) == "late answer"
+
+
+def test_registry_evicts_least_recently_used(tmp_path) -> None:
+    sample = tmp_path / "sample.json"
+    _write(sample, "a answer", 1_000)
+    # Room for exactly two tenants of this size
+    registry = _registry(tmp_path, ["a", "b", "c"], max_bytes=2 * faq_source.estimate_bytes(sample))
+
+    registry.get("a")
+    registry.get("b")
+    registry.get("a")
+    registry.get("c")
+    assert list(registry._sources) == ["a", "c"]
+    assert registry.evictions == 1
+
+
+def test_registry_loads_each_tenant_once_under_concurrency(tmp_path, monkeypatch) -> None:
+    registry = _registry(tmp_path, ["acme"])
+    loads = []
+    original = faq_source.load_snapshot
+
+    def _slow_load(*args, **kwargs):
+        loads.append(args[0])
+        time.sleep(0.05)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(faq_source, "load_snapshot", _slow_load)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("acme"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert all(snapshot is results[0] for snapshot in results)
+
+
+def test_registry_reloads_resident_tenants(tmp_path) -> None:
+    registry = _registry(tmp_path, ["acme"])
+    registry.get("acme")
+    _write(tmp_path / "tenants" / "acme.json", "new answer", 5_000)
+    assert registry.reload_if_changed() == 1
+    assert _answer(registry.get("acme")) == "new answer"
@@ -0,0 +1,62 @@
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from faq_vectors import VectorIndex
+
+FAQ_FILE = Path(__file__).resolve().parents[2] / "shared-data" / "day5_company_faq.json"
+
+
+@pytest.fixture
+def faq_copy(tmp_path) -> Path:
+    path = tmp_path / "faq.json"
+    shutil.copy(FAQ_FILE, path)
+    return path
+
+
+def test_paraphrase_hits_pricing(faq_copy) -> None:
+    index = VectorIndex.build(json.loads(faq_copy.read_text()))
+    entry, score = index.search("how much do you charge")[0]
+    assert entry.title == "How much does it cost?"
+    assert 0 < score <= 1
+
+
+def test_unrelated_query_returns_nothing(faq_copy) -> None:
+    index = VectorIndex.build(json.loads(faq_copy.read_text()))
+    assert index.search("hello") == []
+
+
+def test_matrix_is_cached_and_memory_mapped(faq_copy) -> None:
+    data = json.loads(faq_copy.read_text())
+    built = VectorIndex.load_or_build(faq_copy, data)
+    assert faq_copy.with_suffix(".vectors.npy").exists()
+
+    mapped = VectorIndex.load_or_build(faq_copy, data)
+    assert isinstance(mapped._matrix, np.memmap)
+    assert mapped.search("settlements") == built.search("settlements")
+
+
+def test_stale_cache_is_rebuilt(faq_copy) -> None:
+    data = json.loads(faq_copy.read_text())
+    VectorIndex.load_or_build(faq_copy, data)
+
+    data["faq"].append({"question": "Do you support crypto?", "answer": "No, we do not."})
+    index = VectorIndex.load_or_build(faq_copy, data)
+    assert not isinstance(index._matrix, np.memmap)
+    assert index.search("crypto")[0][0].title == "Do you support crypto?"
+
+
+def test_cached_matrix_of_wrong_shape_is_rebuilt(faq_copy) -> None:
+    data = json.loads(faq_copy.read_text())
+    built = VectorIndex.load_or_build(faq_copy, data)
+    # Fingerprint still matches, but the matrix lost its last row
+    matrix_path = faq_copy.with_suffix(".vectors.npy")
+    np.save(matrix_path, np.load(matrix_path)[:-1])
+
+    index = VectorIndex.load_or_build(faq_copy, data)
+    assert not isinstance(index._matrix, np.memmap)
+    assert index._matrix.shape == built._matrix.shape
+    assert VectorIndex.load_or_build(faq_copy, data)._matrix.shape == built._matrix.shape
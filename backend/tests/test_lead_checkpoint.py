@@ -0,0 +1,139 @@
+import asyncio
+import json
+import os
+
+from lead_checkpoint import CheckpointDirectory, LeadCheckpointer, recover_orphans
+from lead_store import JSONLLeadStore, Lead, LeadWriter
+
+
+def _checkpointer(tmp_path, lead: Lead, saved: list, delay: float = 0.05):
+    checkpoints = CheckpointDirectory(tmp_path / "checkpoints")
+    writer = LeadWriter(JSONLLeadStore(tmp_path / "leads.jsonl"))
+
+    def save(lead: Lead) -> None:
+        saved.append(lead.to_dict())
+        writer.submit(lead.to_dict())
+        lead.mark_saved()
+
+    return checkpoints, writer, LeadCheckpointer(lead, checkpoints, writer, save, delay=delay)
+
+
+def _checkpoint_files(checkpoints: CheckpointDirectory) -> list:
+    return sorted(path.name for path in checkpoints.directory.iterdir())
+
+
+async def test_burst_of_changes_is_one_checkpoint_write(tmp_path) -> None:
+    lead = Lead()
+    checkpoints, writer, checkpointer = _checkpointer(tmp_path, lead, [])
+    for field, value in (("name", "Dave"), ("company", "Acme"), ("email", "dave@acme.com")):
+        lead.set_field(field, value)
+    await asyncio.sleep(0.2)
+
+    assert checkpointer.writes == 1
+    [name] = _checkpoint_files(checkpoints)
+    data = json.loads((checkpoints.directory / name).read_text())
+    assert data["pid"] == os.getpid()
+    assert data["lead"]["email"] == "dave@acme.com"
+    await checkpointer.aclose()
+    await writer.aclose()
+
+
+async def test_shutdown_saves_unsaved_lead_and_removes_checkpoint(tmp_path) -> None:
+    lead = Lead()
+    saved = []
+    checkpoints, writer, checkpointer = _checkpointer(tmp_path, lead, saved, delay=10)
+    lead.set_field("use_case", "payouts")
+    await checkpointer.aclose()
+
+    assert [record["use_case"] for record in saved] == ["payouts"]
+    assert _checkpoint_files(checkpoints) == []
+    assert [record["use_case"] for record in writer.store.current()] == ["payouts"]
+    await writer.aclose()
+
+
+async def test_saved_lead_drops_its_checkpoint(tmp_path) -> None:
+    lead = Lead()
+    saved = []
+    checkpoints, writer, checkpointer = _checkpointer(tmp_path, lead, saved)
+    lead.set_field("name", "Dave")
+    await asyncio.sleep(0.2)
+    assert len(_checkpoint_files(checkpoints)) == 1
+
+    checkpointer._save(lead)  # what end_call_summary does
+    await asyncio.sleep(0.2)
+    assert _checkpoint_files(checkpoints) == []
+    await checkpointer.aclose()
+    assert len(saved) == 1  # nothing new to save at shutdown
+    await writer.aclose()
+
+
+async def test_empty_lead_is_never_stored(tmp_path) -> None:
+    lead = Lead()
+    saved = []
+    checkpoints, writer, checkpointer = _checkpointer(tmp_path, lead, saved)
+    await checkpointer.aclose()
+    assert saved == []
+    assert _checkpoint_files(checkpoints) == []
+    await writer.aclose()
+
+
+def test_recovers_orphans_of_dead_workers_only(tmp_path, monkeypatch) -> None:
+    checkpoints = CheckpointDirectory(tmp_path / "checkpoints")
+    dead, live = Lead(name="Dave"), Lead(name="Live")
+    checkpoints.save(dead.to_dict())
+    checkpoints.save(live.to_dict())
+    for lead, pid in ((dead, 999_999_999), (live, 1)):
+        path = checkpoints.directory / f"{lead.lead_id}.json"
+        path.write_text(json.dumps({"pid": pid, "lead": lead.to_dict()}))
+    monkeypatch.setattr("lead_checkpoint.psutil.pid_exists", lambda pid: pid == 1)
+
+    store = JSONLLeadStore(tmp_path / "leads.jsonl")
+    assert recover_orphans(checkpoints, store) == 1
+    [recovered] = list(store.current())
+    assert recovered["name"] == "Dave" and recovered["timestamp"]
+    assert _checkpoint_files(checkpoints) == [f"{live.lead_id}.json"]
+
+    # The session had been saved before the crash: recovery updates it rather than duplicating it
+    checkpoints.save({**dead.to_dict(), "role": "CTO"})
+    monkeypatch.setattr("lead_checkpoint.psutil.pid_exists", lambda pid: False)
+    assert recover_orphans(checkpoints, store) == 2
+    assert sorted(lead["name"] for lead in store.current()) == ["Dave", "Live"]
+    store.close()
+
+
+class _FailingStore(JSONLLeadStore):
+    fail = True
+
+    def upsert_many(self, leads) -> None:
+        if self.fail:
+            raise OSError("disk full")
+        super().upsert_many(leads)
+
+
+async def test_failed_write_keeps_the_checkpoint(tmp_path) -> None:
+    lead = Lead()
+    checkpoints = CheckpointDirectory(tmp_path / "checkpoints")
+    store = _FailingStore(tmp_path / "leads.jsonl")
+    writer = LeadWriter(store)
+
+    def save(lead: Lead) -> None:
+        writer.submit(lead.to_dict())
+        lead.mark_saved()
+
+    checkpointer = LeadCheckpointer(lead, checkpoints, writer, save, delay=0.05)
+    lead.set_field("name", "Dave")
+    await asyncio.sleep(0.2)
+    lead.set_field("company", "Acme")
+    save(lead)  # before the change above was checkpointed
+    await asyncio.sleep(0.2)
+    await checkpointer.aclose()
+
+    assert list(store.current()) == []
+    [recovered] = list(checkpoints.orphans())
+    assert (recovered["name"], recovered["company"]) == ("Dave", "Acme")
+
+    # Once the store accepts writes, the kept checkpoint is recovered into it
+    store.fail = False
+    assert recover_orphans(checkpoints, store) == 1
+    assert _checkpoint_files(checkpoints) == []
+    await writer.aclose()
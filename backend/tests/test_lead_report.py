@@ -0,0 +1,144 @@
+import csv
+import io
+import json
+import tracemalloc
+
+import pytest
+
+from lead_report import (
+    CSVOutput,
+    FrequentItems,
+    current_leads,
+    iter_json_array,
+    iter_leads,
+    latest_versions,
+    lead_filter,
+    main,
+    run,
+    team_size_bucket,
+)
+from lead_store import JSONLLeadStore, migrate_legacy
+
+
+def _lead(i: int, **values) -> dict:
+    return {
+        "name": f"Lead {i}",
+        "company": "Acme",
+        "team_size": str(i),
+        "timeline": "now" if i % 2 else "later",
+        "questions_asked": ["What does Razorpay do?", f"question {i}"],
+        "timestamp": f"2025-11-{10 + i % 10:02d}T10:00:00",
+        **values,
+    }
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 64, 1 << 16])
+def test_json_array_is_parsed_across_chunk_boundaries(chunk_size) -> None:
+    values = [{"name": "Zoë", "nested": {"a": [1, 2.5, None]}}, 12345, "x,]", [], True, -0.5e3]
+    text = json.dumps(values, indent=2)
+    assert list(iter_json_array(io.StringIO(text), chunk_size=chunk_size)) == values
+    assert list(iter_json_array(io.StringIO(" [ ] "), chunk_size=chunk_size)) == []
+
+
+@pytest.mark.parametrize("text", ["", "{}", "[1, 2", "[1 2]", '[{"a": ]'])
+def test_malformed_arrays_raise(text) -> None:
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO(text), chunk_size=4))
+
+
+def test_reads_arrays_and_logs_by_content(tmp_path) -> None:
+    array = tmp_path / "leads.json"
+    array.write_text(json.dumps([_lead(0), "junk", _lead(1)], indent=2))
+    log = tmp_path / "leads.jsonl"
+    log.write_text("\n".join(json.dumps(_lead(i)) for i in range(3)) + "\n")
+    assert [lead["name"] for lead in iter_leads(array)] == ["Lead 0", "Lead 1"]
+    assert len(list(iter_leads(log))) == 3
+
+
+def test_latest_versions_keeps_last_save_of_each_lead(tmp_path) -> None:
+    log = tmp_path / "leads.jsonl"
+    records = [_lead(0), _lead(1, lead_id="a"), _lead(2, lead_id="b"), _lead(1, lead_id="a", role="CTO")]
+    log.write_text("".join(json.dumps(record) + "\n" for record in records))
+    latest = list(latest_versions(log))
+    assert [(lead["name"], lead.get("role")) for lead in latest] == [("Lead 0", None), ("Lead 1", "CTO"), ("Lead 2", None)]
+
+
+def test_migrated_lead_and_its_return_visit_are_one_lead(tmp_path, capsys) -> None:
+    legacy = tmp_path / "leads.json"
+    legacy.write_text(json.dumps([_lead(0, email="l0@acme.com"), _lead(1)]))
+    log = tmp_path / "leads.jsonl"
+    store = JSONLLeadStore(log)
+    migrate_legacy(legacy, store)
+    store.upsert_many([{"email": "L0@acme.com", "role": "CTO", "questions_asked": ["Do you support UPI?"]}])
+    assert len(list(store.current())) == 2
+    store.close()
+
+    assert len(list(current_leads(log))) == 2
+    main([str(log), "--json"])
+    report = json.loads(capsys.readouterr().out)
+    assert report["total"] == 2
+    assert {"question": "What does Razorpay do?", "count": 2} in report["top_questions"]
+
+
+def test_reports_count_each_lead_once_unless_asked_for_every_version(tmp_path, capsys) -> None:
+    log = tmp_path / "leads.jsonl"
+    records = [_lead(1, lead_id="a"), _lead(2, lead_id="b"), _lead(1, lead_id="a", role="CTO")]
+    log.write_text("".join(json.dumps(record) + "\n" for record in records))
+    array = tmp_path / "leads.json"
+    array.write_text(json.dumps(records))
+    assert len(list(current_leads(log))) == 2
+    assert len(list(current_leads(array))) == 3
+
+    main([str(log), "--json"])
+    assert json.loads(capsys.readouterr().out)["total"] == 2
+    main([str(log), "--all-versions", "--json"])
+    assert json.loads(capsys.readouterr().out)["total"] == 3
+
+
+def test_frequent_items_stay_bounded_and_keep_heavy_hitters() -> None:
+    items = FrequentItems(capacity=10)
+    for i in range(10_000):
+        items.add("pricing" if i % 3 == 0 else f"rare {i}")
+    assert len(items._counts) <= 10
+    assert items.most_common(1)[0][0] == "pricing"
+    # Undercounts by at most total / (capacity + 1)
+    assert items.most_common(1)[0][1] >= 3334 - 10_000 // 11
+
+
+def test_report_aggregates_and_filters(tmp_path) -> None:
+    leads = [_lead(i) for i in range(1, 13)] + [_lead(0, team_size=None, timeline="next quarter")]
+    report = run(leads, lead_filter())
+    summary = report.to_dict(top=1)
+    assert summary["total"] == 13
+    assert summary["timeline"] == {"now": 6, "soon": 0, "later": 6, "other": 1, "unknown": 0}
+    assert summary["team_size"]["2-10"] == 9 and summary["team_size"]["11-50"] == 2
+    assert summary["team_size"]["unknown"] == 1
+    assert summary["top_questions"] == [{"question": "What does Razorpay do?", "count": 13}]
+
+    matches = lead_filter(timeline="NOW", since="2025-11-13", until="2025-11-16", min_team_size=4)
+    assert [lead["name"] for lead in leads if matches(lead)] == ["Lead 5"]
+    assert team_size_bucket("about 1,200 people") == "1001+"
+
+
+def test_filtered_leads_are_written_as_csv() -> None:
+    out = io.StringIO()
+    run([_lead(1), _lead(2)], lead_filter(timeline="now"), CSVOutput(out))
+    rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+    assert len(rows) == 1
+    assert rows[0]["name"] == "Lead 1"
+    assert rows[0]["questions_asked"] == "What does Razorpay do? | question 1"
+
+
+def test_memory_does_not_grow_with_history(tmp_path) -> None:
+    def peak(count: int) -> int:
+        path = tmp_path / f"leads-{count}.json"
+        with open(path, "w") as f:
+            f.write("[" + ",".join(json.dumps(_lead(i)) for i in range(count)) + "]")
+        tracemalloc.start()
+        run(iter_leads(path), lead_filter(), question_capacity=100)
+        result = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return result
+
+    small, large = peak(1_000), peak(20_000)
+    assert large < small * 2
@@ -0,0 +1,339 @@
+import json
+import threading
+
+import pytest
+
+import lead_store
+from lead_store import (
+    JSONLLeadStore,
+    Lead,
+    LeadWriter,
+    SQLiteLeadStore,
+    export_json,
+    identity_key,
+    iter_jsonl,
+    merge_leads,
+    migrate_legacy,
+)
+
+
+def _lead(i: int) -> dict:
+    return {"name": f"Lead {i}", "company": "Acme", "questions_asked": ["pricing"], "timestamp": None}
+
+
+def test_append_writes_one_line_per_lead(tmp_path) -> None:
+    store = JSONLLeadStore(tmp_path / "leads.jsonl", fsync_every=2)
+    for i in range(3):
+        store.append(_lead(i))
+    store.close()
+
+    lines = (tmp_path / "leads.jsonl").read_text().splitlines()
+    assert [json.loads(line)["name"] for line in lines] == ["Lead 0", "Lead 1", "Lead 2"]
+
+
+def test_concurrent_appends_are_not_lost(tmp_path) -> None:
+    path = tmp_path / "leads.jsonl"
+    stores = [JSONLLeadStore(path) for _ in range(4)]
+
+    def write(store: JSONLLeadStore, offset: int) -> None:
+        for i in range(50):
+            store.append(_lead(offset + i))
+
+    threads = [threading.Thread(target=write, args=(store, n * 100)) for n, store in enumerate(stores)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for store in stores:
+        store.close()
+
+    assert len(list(iter_jsonl(path))) == 200
+
+
+def test_torn_last_line_is_skipped(tmp_path) -> None:
+    path = tmp_path / "leads.jsonl"
+    path.write_text(json.dumps(_lead(0)) + "\n" + '{"name": "tor')
+    assert [lead["name"] for lead in iter_jsonl(path)] == ["Lead 0"]
+
+
+def test_export_produces_legacy_array(tmp_path) -> None:
+    store = JSONLLeadStore(tmp_path / "leads.jsonl")
+    store.append(_lead(0))
+    store.append(_lead(1))
+    store.close()
+
+    assert export_json(iter_jsonl(tmp_path / "leads.jsonl"), tmp_path / "leads.json") == 2
+    assert json.loads((tmp_path / "leads.json").read_text()) == [_lead(0), _lead(1)]
+
+    assert export_json([], tmp_path / "empty.json") == 0
+    assert json.loads((tmp_path / "empty.json").read_text()) == []
+
+
+def test_migrate_legacy_runs_once(tmp_path) -> None:
+    legacy = tmp_path / "leads.json"
+    legacy.write_text(json.dumps([_lead(0)]))
+    store = JSONLLeadStore(tmp_path / "leads.jsonl")
+
+    migrate_legacy(legacy, store)
+    migrate_legacy(legacy, store)
+    assert len(list(store)) == 1
+
+
+def test_sqlite_indexed_queries(tmp_path) -> None:
+    store = SQLiteLeadStore(tmp_path / "leads.db")
+    store.append({**_lead(0), "email": "Dave@Example.com", "timeline": "now", "timestamp": "2025-11-25T10:00:00"})
+    store.append_many(
+        [
+            {**_lead(1), "company": "Globex", "timeline": "later", "timestamp": "2025-11-26T10:00:00"},
+            {**_lead(2), "team_size": 10, "timeline": "now", "timestamp": "2025-11-27T10:00:00"},
+        ]
+    )
+
+    assert len(store) == 3
+    assert [lead["name"] for lead in store.find_by_email("dave@example.com")] == ["Lead 0"]
+    assert [lead["name"] for lead in store.find_by_company("acme")] == ["Lead 0", "Lead 2"]
+    assert [lead["name"] for lead in store.find_by_timeline("now")] == ["Lead 0", "Lead 2"]
+    assert [lead["name"] for lead in store.find_between("2025-11-26", "2025-11-27")] == ["Lead 1"]
+    assert store.find_by_timeline("now")[1]["team_size"] == 10
+    assert [lead["name"] for lead in store] == ["Lead 0", "Lead 1", "Lead 2"]
+
+    plan = store._conn.execute(
+        "EXPLAIN QUERY PLAN SELECT data FROM leads WHERE email = ? COLLATE NOCASE", ("x",)
+    ).fetchall()
+    assert "idx_leads_email" in str(plan)
+    store.close()
+
+
+async def test_writer_persists_in_background(tmp_path) -> None:
+    writer = LeadWriter(SQLiteLeadStore(tmp_path / "leads.db"))
+    for i in range(20):
+        writer.submit(_lead(i))
+    await writer.flush()
+    assert len(writer.store) == 20
+
+    writer.submit(_lead(20))
+    await writer.aclose()
+    assert len(SQLiteLeadStore(tmp_path / "leads.db")) == 21
+
+
+async def test_writer_accepts_leads_from_other_threads(tmp_path) -> None:
+    writer = LeadWriter(JSONLLeadStore(tmp_path / "leads.jsonl"))
+    threads = [threading.Thread(target=writer.submit, args=(_lead(i),)) for i in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    await writer.aclose()
+    assert len(list(iter_jsonl(tmp_path / "leads.jsonl"))) == 10
+
+
+def test_identity_ignores_case_punctuation_and_legal_suffixes() -> None:
+    assert identity_key({"name": "Dave  Smith", "company": "Acme, Inc."}) == identity_key(
+        {"name": "dave smith", "company": "ACME"}
+    )
+    assert identity_key({"name": "Dave", "company": None}) is None
+    assert identity_key({"name": None, "company": "Acme"}) is None
+
+
+def test_merge_keeps_known_fields_and_dedupes_questions() -> None:
+    existing = {"lead_id": "a", "name": "Dave", "role": "CTO", "team_size": "10", "questions_asked": ["Pricing?"]}
+    new = {"name": "Dave", "role": None, "team_size": "12", "questions_asked": ["pricing", "Free tier"]}
+    assert merge_leads(existing, new) == {
+        "lead_id": "a",
+        "name": "Dave",
+        "role": "CTO",
+        "team_size": "12",
+        "questions_asked": ["Pricing?", "Free tier"],
+    }
+
+
+def test_upserts_match_by_email_then_name_and_company(tmp_path) -> None:
+    store = JSONLLeadStore(tmp_path / "leads.jsonl")
+    [first] = store.upsert_many([{"name": "Dave", "company": "Acme", "email": None, "questions_asked": ["pricing"]}])
+    [by_identity] = store.upsert_many([{"name": "dave", "company": "Acme Ltd", "email": "Dave@Acme.com"}])
+    [by_email] = store.upsert_many([{"name": None, "company": None, "email": "dave@acme.com ", "timeline": "now"}])
+    assert first["lead_id"] == by_identity["lead_id"] == by_email["lead_id"]
+    assert len(list(store.current())) == 1
+    # Later sessions win where they know a value
+    assert by_email["name"] == "dave" and by_email["timeline"] == "now"
+
+    # Same name and company but a different email is someone else
+    [other] = store.upsert_many([{"name": "Dave", "company": "Acme", "email": "dave@other.com"}])
+    assert other["lead_id"] != first["lead_id"]
+    # Without email, name or company there is nothing safe to merge on
+    store.upsert_many([{"use_case": "payouts"}, {"use_case": "payouts"}])
+    assert len(list(store.current())) == 4
+    store.close()
+
+
+def test_offset_index_is_saved_for_the_next_process(tmp_path, monkeypatch) -> None:
+    path = tmp_path / "leads.jsonl"
+    store = JSONLLeadStore(path)
+    store.append(_lead(0))  # legacy, folded into the lead below
+    [saved] = store.upsert_many([{"name": "lead 0", "company": "Acme", "email": "l0@acme.com"}])
+    store.close()
+    assert store.index_path.exists()
+    indexed = path.stat().st_size
+
+    scans = []
+    original = lead_store._scan
+    monkeypatch.setattr(lead_store, "_scan", lambda f, start, *args, **kwargs: scans.append(start) or original(f, start, *args, **kwargs))
+    other_process = JSONLLeadStore(path)
+    other_process.append(_lead(1))
+    [merged] = other_process.upsert_many([{"email": "L0@ACME.COM", "timeline": "now"}])
+    # Only the line appended after the saved index was read
+    assert scans == [indexed]
+    assert merged["lead_id"] == saved["lead_id"] and merged["timeline"] == "now"
+    other_process.close()
+
+
+def test_offset_index_is_saved_while_the_store_is_open(tmp_path) -> None:
+    path = tmp_path / "leads.jsonl"
+    path.write_text("".join(json.dumps(_lead(i)) + "\n" for i in range(5)))
+    store = JSONLLeadStore(path, index_save_every=3)
+    store.upsert_many([_lead(5)])
+    # Indexing the existing log was enough to save it, without waiting for close()
+    assert store.index_path.exists()
+    saved = store.index_path.stat().st_mtime_ns
+    store.upsert_many([_lead(6)])
+    assert store.index_path.stat().st_mtime_ns == saved
+
+    other_process = JSONLLeadStore(path)
+    [lead] = other_process.upsert_many([{"name": "lead 6", "company": "ACME", "role": "CTO"}])
+    assert lead["questions_asked"] == ["pricing"] and lead["role"] == "CTO"
+    assert len(list(other_process.current())) == 7
+    other_process.close()
+    store.close()
+
+
+def test_writer_close_flushes_and_closes_the_store(tmp_path) -> None:
+    store = JSONLLeadStore(tmp_path / "leads.jsonl")
+    writer = LeadWriter(store)
+    writer.submit(_lead(0))
+    writer.close()
+    assert [lead["name"] for lead in iter_jsonl(store.path)] == ["Lead 0"]
+    assert store.index_path.exists()
+
+
+def test_stale_offset_index_is_rebuilt(tmp_path) -> None:
+    path = tmp_path / "leads.jsonl"
+    store = JSONLLeadStore(path)
+    store.upsert_many([{**_lead(0), "email": "a@acme.com"}])
+    store.close()
+    # The log is replaced, so the saved index no longer describes it
+    path.write_text(json.dumps({**_lead(9), "email": "b@acme.com"}) + "\n")
+    store = JSONLLeadStore(path)
+    [lead] = store.upsert_many([{"email": "b@acme.com", "timeline": "now"}])
+    assert lead["name"] == "Lead 9"
+    assert [record["email"] for record in store.current()] == ["b@acme.com"]
+    store.close()
+
+
+def test_jsonl_upserts_merge_and_fold_legacy_duplicates(tmp_path) -> None:
+    path = tmp_path / "leads.jsonl"
+    store = JSONLLeadStore(path)
+    # Legacy records written before upserts, one of them duplicated
+    store.append_many([_lead(0), {**_lead(0), "email": "lead0@acme.com"}, _lead(1)])
+    other_process = JSONLLeadStore(path)
+
+    [first] = store.upsert_many([{"name": "LEAD 0", "company": "acme", "timeline": "now", "questions_asked": ["demo"]}])
+    [second] = other_process.upsert_many([{"email": "LEAD0@acme.com", "role": "CFO", "questions_asked": ["pricing"]}])
+    assert second["lead_id"] == first["lead_id"]
+    assert second["timeline"] == "now" and second["role"] == "CFO"
+    assert second["questions_asked"] == ["pricing", "demo"]
+
+    current = list(store.current())
+    assert [lead["name"] for lead in current] == ["LEAD 0", "Lead 1"]
+    assert current[0] == second
+    # The log itself stays append-only
+    assert len(list(iter_jsonl(path))) == 5
+    store.close()
+    other_process.close()
+
+
+def test_jsonl_upsert_after_torn_line(tmp_path) -> None:
+    path = tmp_path / "leads.jsonl"
+    path.write_text(json.dumps(_lead(0)) + "\n" + '{"name": "Lea')
+    store = JSONLLeadStore(path)
+    store.upsert_many([_lead(1)])
+    store.close()
+    assert [lead["name"] for lead in iter_jsonl(path)] == ["Lead 0", "Lead 1"]
+
+
+def test_sqlite_upserts_update_in_place(tmp_path) -> None:
+    store = SQLiteLeadStore(tmp_path / "leads.db")
+    store.append(_lead(0))  # a row from before upserts, without an id
+    store.upsert_many([{"name": "lead 0", "company": "Acme Inc", "email": "l0@acme.com", "questions_asked": ["demo"]}])
+    [merged] = store.upsert_many([{"email": "L0@ACME.COM", "timeline": "later"}])
+
+    assert len(store) == 1
+    assert merged["lead_id"]
+    assert list(store.current()) == [merged]
+    assert merged["name"] == "lead 0" and merged["timeline"] == "later"
+    assert merged["questions_asked"] == ["pricing", "demo"]
+    assert store.find_by_timeline("later") == [merged]
+
+    plan = store._conn.execute("EXPLAIN QUERY PLAN SELECT id FROM leads WHERE identity = ?", ("x",)).fetchall()
+    assert "idx_leads_identity" in str(plan)
+    store.close()
+
+
+@pytest.mark.parametrize("backend", ["jsonl", "sqlite"])
+async def test_writer_merges_returning_visitors(tmp_path, backend) -> None:
+    store = JSONLLeadStore(tmp_path / "leads.jsonl") if backend == "jsonl" else SQLiteLeadStore(tmp_path / "leads.db")
+    writer = LeadWriter(store)
+    writer.submit({**_lead(0), "email": "a@acme.com"})
+    writer.submit({"name": None, "company": None, "email": "A@acme.com", "team_size": "5"})
+    await writer.flush()
+    [lead] = list(store.current())
+    assert lead["name"] == "Lead 0" and lead["team_size"] == "5"
+    await writer.aclose()
+
+
+def test_lead_state_is_independent_per_session() -> None:
+    first, second = Lead(), Lead()
+    assert first.set_field("name", "Dave")
+    assert not first.set_field("timestamp", "now")
+    first.add_question("pricing")
+    first.add_question("pricing")
+
+    assert second.name is None
+    assert second.questions_asked == []
+    assert second.lead_id != first.lead_id
+    assert first.to_dict() == {
+        "lead_id": first.lead_id,
+        "name": "Dave",
+        "company": None,
+        "email": None,
+        "role": None,
+        "use_case": None,
+        "team_size": None,
+        "timeline": None,
+        "questions_asked": ["pricing"],
+        "conversation_summary": None,
+        "timestamp": None,
+    }
+
+
+def test_lead_tracks_unsaved_changes() -> None:
+    changes = []
+    lead = Lead()
+    lead.on_change = lambda: changes.append(lead.revision)
+    assert not lead.unsaved and not lead.has_data()
+    lead.set_field("name", "Dave")
+    lead.add_question("pricing")
+    lead.add_question("pricing")
+    assert changes == [1, 2]
+    assert lead.unsaved and lead.has_data()
+    lead.mark_saved()
+    assert not lead.unsaved
+
+
+def test_resaving_a_session_updates_its_lead(tmp_path) -> None:
+    store = JSONLLeadStore(tmp_path / "leads.jsonl")
+    lead = Lead(use_case="payouts")
+    store.upsert_many([lead.to_dict()])
+    lead.set_field("team_size", "10")
+    store.upsert_many([lead.to_dict()])
+    assert [record["team_size"] for record in store.current()] == ["10"]
+    store.close()
@@ -0,0 +1,36 @@
+import load_test
+from lead_store import open_lead_store
+
+
+def test_percentiles() -> None:
+    stats = load_test.percentiles([i / 100 for i in range(1, 101)])
+    assert (stats["p50"], stats["p95"], stats["p99"], stats["max"]) == (0.5, 0.95, 0.99, 1.0)
+    assert load_test.percentiles([])["p95"] is None
+
+
+async def test_runs_concurrent_sessions(monkeypatch, tmp_path) -> None:
+    stub = load_test.MurfStub(latency=0.0, download_latency=0.0)
+    await stub.start()
+    monkeypatch.setenv("MURF_API_URL", stub.base_url)
+    monkeypatch.setenv("MURF_API_KEY", "test-key")
+    import agent
+
+    shared_data = sorted(agent.LEADS_DIR.rglob("*")) if agent.LEADS_DIR.exists() else None
+    storage = agent.open_lead_storage(tmp_path)
+    monkeypatch.setattr(agent, "lead_storage", storage)
+    monkeypatch.setattr(agent, "tts_cache", None)
+    try:
+        result = await load_test.run_level(agent, 2, script=load_test.SCRIPT[2:], ttft=0.0, token_delay=0.0)
+    finally:
+        await storage.writer.aclose()
+        await stub.close()
+
+    turns = len(load_test.SCRIPT) - 2
+    assert result.errors == 0
+    assert result.turns == 2 * turns
+    assert set(result.tool_latency) == {"all", "search_faq", "collect_lead_info", "end_call_summary"}
+    assert result.tts_ttfb["p50"] is not None
+    assert stub.requests >= 2 * turns
+    assert len(list(open_lead_store("jsonl", path=tmp_path / "leads.jsonl"))) == 2
+    # Nothing was written to the real shared-data directory
+    assert (sorted(agent.LEADS_DIR.rglob("*")) if agent.LEADS_DIR.exists() else None) == shared_data
@@ -0,0 +1,421 @@
+import asyncio
+import io
+import struct
+import time
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from livekit.agents import tokenize
+
+import murf_tts
+from resilience import CircuitBreaker, RetryBudget
+from text_chunker import AdaptiveChunker
+from tts_cache import AudioCache, CacheablePhrases
+from voice_catalog import Voice, VoiceCatalog
+
+SAMPLE_RATE = 24000
+
+
+def _wav(samples: int, value: int = 0) -> bytes:
+    pcm = struct.pack(f"<{samples}h", *(value or i % 100 for i in range(samples)))
+    fmt = struct.pack("<HHIIHH", 1, 1, SAMPLE_RATE, SAMPLE_RATE * 2, 2, 16)
+    body = b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt + b"data" + struct.pack("<I", len(pcm)) + pcm
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+@pytest.fixture
+async def murf_stub():
+    """Local stand-in for Murf's generate + audioFile download flow."""
+    state = {"requests": [], "peers": set(), "downloads": 0, "delay": 0.0, "status": 200, "wav": _wav(SAMPLE_RATE // 10)}
+
+    async def generate(request: web.Request) -> web.Response:
+        state["requests"].append(await request.json())
+        state["peers"].add(request.transport.get_extra_info("peername"))
+        url = request.url.with_path(f"/audio/{len(state['requests'])}.wav")
+        n = len(state["requests"])
+        delay = state["delay"]
+        await asyncio.sleep(delay(n) if callable(delay) else delay)
+        status = state["status"](n) if callable(state["status"]) else state["status"]
+        # /fallback serves the same audio but never fails, standing in for a second provider
+        if status != 200 and request.path.startswith("/v1"):
+            return web.json_response({"error": "unavailable"}, status=status)
+        return web.json_response({"audioFile": str(url)})
+
+    async def audio(request: web.Request) -> web.Response:
+        state["peers"].add(request.transport.get_extra_info("peername"))
+        state["downloads"] += 1
+        if state.get("tagged"):
+            # Every sample carries the request number, so ordering is checkable
+            body = _wav(SAMPLE_RATE // 10, int(request.match_info["n"]))
+        else:
+            body = state["wav"]
+        return web.Response(body=body, content_type="audio/wav")
+
+    app = web.Application()
+    app.router.add_post("/v1/speech/generate", generate)
+    app.router.add_post("/fallback/speech/generate", generate)
+    app.router.add_get("/audio/{n}.wav", audio)
+    server = TestServer(app)
+    await server.start_server()
+    state["base_url"] = str(server.make_url("/v1"))
+    yield state
+    await server.close()
+
+
+@pytest.fixture
+def api_key(monkeypatch) -> None:
+    monkeypatch.setenv("MURF_API_KEY", "test-key")
+
+
+async def _synthesize(tts: murf_tts.TTS, text: str) -> list:
+    async with tts.synthesize(text) as stream:
+        return [audio async for audio in stream]
+
+
+async def test_synthesize_returns_pcm(murf_stub, api_key) -> None:
+    tts = murf_tts.TTS(base_url=murf_stub["base_url"])
+    try:
+        frames = await _synthesize(tts, "Hello there")
+    finally:
+        await tts.aclose()
+
+    assert sum(audio.frame.samples_per_channel for audio in frames) == SAMPLE_RATE // 10
+    assert {audio.frame.samples_per_channel for audio in frames} == {SAMPLE_RATE // 50}
+    assert murf_stub["requests"][0]["text"] == "Hello there"
+    assert murf_stub["requests"][0]["voiceId"] == "en-US-ryan"
+
+
+async def test_connections_are_reused(murf_stub, api_key) -> None:
+    tts = murf_tts.TTS(base_url=murf_stub["base_url"])
+    try:
+        for i in range(5):
+            await _synthesize(tts, f"Sentence {i}")
+    finally:
+        await tts.aclose()
+
+    assert len(murf_stub["requests"]) == 5
+    assert len(murf_stub["peers"]) == 1
+
+
+async def test_long_audio_is_split_into_fixed_frames(murf_stub, api_key) -> None:
+    murf_stub["wav"] = _wav(SAMPLE_RATE * 2)
+    tts = murf_tts.TTS(base_url=murf_stub["base_url"], frame_size_ms=10, chunk_size=4096)
+    try:
+        async with tts.synthesize("A longer answer") as stream:
+            first = await stream.__anext__()
+            assert first.frame.samples_per_channel == SAMPLE_RATE // 100
+            rest = [audio async for audio in stream]
+    finally:
+        await tts.aclose()
+
+    assert 1 + len(rest) == 200
+
+
+def test_framer_slices_fixed_frames_and_keeps_tail() -> None:
+    framer = murf_tts.AudioFramer(sample_rate=1000, frame_size_ms=10)
+    pcm = bytes(range(50))
+    frames = list(framer.push(pcm[:15])) + list(framer.push(pcm[15:]))
+    assert [bytes(frame.data.cast("B")) for frame in frames] == [pcm[:20], pcm[20:40]]
+    tail = framer.flush()
+    assert bytes(tail.data.cast("B")) == pcm[40:]
+    assert framer.flush() is None
+
+
+def test_requires_api_key(monkeypatch) -> None:
+    monkeypatch.delenv("MURF_API_KEY", raising=False)
+    with pytest.raises(ValueError):
+        murf_tts.TTS()
+
+
+async def test_cached_phrases_skip_murf(murf_stub, api_key, tmp_path) -> None:
+    cache = AudioCache(tmp_path, max_memory_bytes=1024 * 1024)
+    cacheable = CacheablePhrases(["Got it, I've noted that down."])
+    tts = murf_tts.TTS(base_url=murf_stub["base_url"], cache=cache, cacheable=cacheable)
+    try:
+        first = await _synthesize(tts, "Got it, I've noted that down.")
+        second = await _synthesize(tts, "Got it,  I've noted that down. ")
+        # Anything not among the known phrases (e.g. with a caller's name) is never stored
+        await _synthesize(tts, "Thanks Priya, talk soon.")
+        await _synthesize(tts, "Thanks Priya, talk soon.")
+    finally:
+        await tts.aclose()
+
+    assert len(murf_stub["requests"]) == 3
+    assert len(list(tmp_path.glob("*/*.pcm"))) == 1
+    assert [bytes(a.frame.data) for a in first] == [bytes(a.frame.data) for a in second]
+    assert cache.stats()["hits_memory"] == 1
+
+    # A fresh process only has the disk tier
+    tts = murf_tts.TTS(base_url=murf_stub["base_url"], cache=AudioCache(tmp_path))
+    try:
+        await _synthesize(tts, "Got it, I've noted that down.")
+    finally:
+        await tts.aclose()
+    assert len(murf_stub["requests"]) == 3
+
+
+async def test_presynthesize_is_incremental(murf_stub, api_key, tmp_path) -> None:
+    cache = AudioCache(tmp_path)
+    tts = murf_tts.TTS(base_url=murf_stub["base_url"], cache=cache)
+    try:
+        phrases = ["Welcome to Razorpay. How can I help?", "Got it, I've noted that down."]
+        assert await tts.presynthesize(phrases, max_concurrency=2) == 3
+        assert await tts.presynthesize(phrases) == 0
+
+        phrases[0] = "Welcome to Razorpay. What brings you here?"
+        assert await tts.presynthesize(phrases) == 1
+    finally:
+        await tts.aclose()
+
+    assert len(murf_stub["requests"]) == 4
+
+
+async def _stream(tts: murf_tts.TTS, text: str) -> list:
+    stream = tts.stream()
+    stream.push_text(text)
+    stream.end_input()
+    try:
+        return [audio.frame async for audio in stream]
+    finally:
+        await stream.aclose()
+
+
+def _sample_values(frames: list) -> list:
+    values = []
+    for frame in frames:
+        for value in frame.data:
+            if not values or values[-1] != value:
+                values.append(value)
+    return values
+
+
+async def test_lookahead_overlaps_requests_and_keeps_order(murf_stub, api_key) -> None:
+    murf_stub["tagged"] = True
+    murf_stub["delay"] = 0.2
+    text = "First sentence here. Second sentence here. Third sentence here."
+
+    tokenizer = tokenize.basic.SentenceTokenizer(min_sentence_len=5)
+    serial = murf_tts.TTS(base_url=murf_stub["base_url"], tokenizer=tokenizer, lookahead=0)
+    pipelined = murf_tts.TTS(base_url=murf_stub["base_url"], tokenizer=tokenizer, lookahead=2)
+    try:
+        started = time.perf_counter()
+        await _stream(serial, text)
+        serial_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        frames = await _stream(pipelined, text)
+        pipelined_time = time.perf_counter() - started
+    finally:
+        await serial.aclose()
+        await pipelined.aclose()
+
+    assert pipelined_time < serial_time - 0.2
+    # Requests 4-6 belong to the pipelined run and must play back in order
+    assert _sample_values(frames)[:3] == [4, 5, 6]
+
+
+async def test_closing_stream_cancels_unplayed_requests(murf_stub, api_key) -> None:
+    # The first sentence is quick; the ones synthesized ahead of it are slow
+    murf_stub["delay"] = lambda n: 0.0 if n == 1 else 0.5
+    tokenizer = tokenize.basic.SentenceTokenizer(min_sentence_len=5)
+    tts = murf_tts.TTS(base_url=murf_stub["base_url"], tokenizer=tokenizer, lookahead=3)
+    stream = tts.stream()
+    try:
+        stream.push_text("One sentence here. Two sentence here. Three sentence here. Four sentence here.")
+        stream.end_input()
+        await stream.__anext__()
+        assert len(murf_stub["requests"]) == 4
+        await stream.aclose()
+        await asyncio.sleep(0.7)
+    finally:
+        await tts.aclose()
+
+    # Only the first sentence's audio was fetched; the rest were cancelled in flight
+    assert murf_stub["downloads"] == 1
+
+
+async def test_transient_errors_are_retried(murf_stub, api_key) -> None:
+    murf_stub["status"] = lambda n: 503 if n == 1 else 200
+    tts = murf_tts.TTS(base_url=murf_stub["base_url"])
+    try:
+        frames = await _synthesize(tts, "Hello there")
+    finally:
+        await tts.aclose()
+
+    assert sum(audio.frame.samples_per_channel for audio in frames) == SAMPLE_RATE // 10
+    assert len(murf_stub["requests"]) == 2
+    assert tts.stats()["retries"] == 1
+
+
+async def test_client_errors_and_empty_budget_are_not_retried(murf_stub, api_key) -> None:
+    murf_stub["status"] = 400
+    tts = murf_tts.TTS(base_url=murf_stub["base_url"])
+    no_budget = murf_tts.TTS(base_url=murf_stub["base_url"], retry_budget=RetryBudget(min_tokens=0))
+    try:
+        with pytest.raises(aiohttp.ClientResponseError):
+            await _synthesize(tts, "Hello there")
+        assert len(murf_stub["requests"]) == 1
+
+        murf_stub["status"] = 503
+        with pytest.raises(aiohttp.ClientResponseError):
+            await _synthesize(no_budget, "Hello there")
+        assert len(murf_stub["requests"]) == 2
+    finally:
+        await tts.aclose()
+        await no_budget.aclose()
+
+
+async def test_slow_request_is_hedged(murf_stub, api_key) -> None:
+    murf_stub["delay"] = lambda n: 2.0 if n == 1 else 0.0
+    murf_stub["tagged"] = True
+    tts = murf_tts.TTS(base_url=murf_stub["base_url"], hedge_after=0.1)
+    try:
+        start = time.monotonic()
+        frames = await _synthesize(tts, "Hello there")
+        elapsed = time.monotonic() - start
+    finally:
+        await tts.aclose()
+
+    assert elapsed < 1.0
+    assert set(_sample_values([audio.frame for audio in frames])) == {2}
+    stats = tts.stats()
+    assert (stats["hedges"], stats["hedge_wins"]) == (1, 1)
+    assert murf_stub["downloads"] == 1
+
+
+async def test_hedging_stays_off_once_latency_is_tracked(murf_stub, api_key) -> None:
+    tts = murf_tts.TTS(base_url=murf_stub["base_url"], hedge_after=None)
+    try:
+        for _ in range(10):
+            await _synthesize(tts, "Hello there")
+        murf_stub["delay"] = 0.3
+        await _synthesize(tts, "Hello there")
+    finally:
+        await tts.aclose()
+    assert tts.stats()["hedges"] == 0
+    assert len(murf_stub["requests"]) == 11
+
+
+async def test_zero_p95_is_used_but_floored(murf_stub, api_key) -> None:
+    tts = murf_tts.TTS(base_url=murf_stub["base_url"], hedge_after=2.0)
+    try:
+        for _ in range(10):
+            tts._latency.record(0.0)
+        murf_stub["delay"] = 0.02
+        await _synthesize(tts, "Hello there")
+        assert tts.stats()["hedges"] == 0  # under the floor
+
+        for _ in range(10):
+            tts._latency.record(0.0)
+        murf_stub["delay"] = 0.3
+        await _synthesize(tts, "Hello there")
+        assert tts.stats()["hedges"] == 1  # well before the 2 s default
+    finally:
+        await tts.aclose()
+
+
+async def test_open_circuit_plays_cached_filler_once(murf_stub, api_key) -> None:
+    # Longer than the first chunk, so the tokenizer would split it
+    filler = "I'm having a little trouble speaking right now, please bear with me for a moment."
+    tts = murf_tts.TTS(
+        base_url=murf_stub["base_url"],
+        tokenizer=AdaptiveChunker(first_chunk_chars=60),
+        cache=AudioCache(None),
+        max_retries=5,
+        circuit_breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60),
+        filler_text=filler,
+    )
+    try:
+        assert await tts.presynthesize([]) == 1
+        murf_stub["status"] = 503
+        frames = await _synthesize(tts, "Our pricing starts at two percent.")
+        assert sum(audio.frame.samples_per_channel for audio in frames) == SAMPLE_RATE // 10
+        # The breaker opened after two failures, so Murf isn't called again
+        assert await _synthesize(tts, "Anything else?") == []
+    finally:
+        await tts.aclose()
+
+    assert len(murf_stub["requests"]) == 3
+    assert tts.stats()["circuit"] == "open"
+    assert tts.stats()["fallbacks"] == 2
+
+
+async def test_fallback_tts_is_used_when_murf_is_down(murf_stub, api_key) -> None:
+    murf_stub["status"] = 503
+    fallback = murf_tts.TTS(base_url=murf_stub["base_url"].replace("/v1", "/fallback"))
+    tts = murf_tts.TTS(
+        base_url=murf_stub["base_url"],
+        circuit_breaker=CircuitBreaker(failure_threshold=1),
+        fallback_tts=fallback,
+    )
+    try:
+        frames = await _synthesize(tts, "Hello there")
+    finally:
+        await tts.aclose()
+        await fallback.aclose()
+
+    assert sum(audio.frame.samples_per_channel for audio in frames) == SAMPLE_RATE // 10
+    assert tts.stats()["fallbacks"] == 1
+
+
+async def test_wav_with_extra_chunks_and_other_format_is_converted(murf_stub, api_key) -> None:
+    # 0.1 s of 48 kHz stereo with a LIST chunk before the audio
+    pcm = struct.pack(f"<{9600}h", *([1000] * 9600))
+    fmt = struct.pack("<HHIIHH", 1, 2, 48000, 48000 * 4, 4, 16)
+    info = b"INFOISFT" + struct.pack("<I", 4) + b"Murf"
+    body = (
+        b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt
+        + b"LIST" + struct.pack("<I", len(info)) + info
+        + b"data" + struct.pack("<I", len(pcm)) + pcm
+    )
+    murf_stub["wav"] = b"RIFF" + struct.pack("<I", len(body)) + body
+    tts = murf_tts.TTS(base_url=murf_stub["base_url"], chunk_size=333)
+    try:
+        frames = await _synthesize(tts, "Hello there")
+    finally:
+        await tts.aclose()
+
+    assert abs(sum(audio.frame.samples_per_channel for audio in frames) - SAMPLE_RATE // 10) <= 1
+    assert {audio.frame.sample_rate for audio in frames} == {SAMPLE_RATE}
+    assert set(_sample_values([audio.frame for audio in frames])) == {1000}
+
+
+async def test_compressed_format_is_decoded(murf_stub, api_key) -> None:
+    av = pytest.importorskip("av")
+    np = pytest.importorskip("numpy")
+    out = io.BytesIO()
+    with av.open(out, "w", format="mp3") as container:
+        stream = container.add_stream("libmp3lame", rate=SAMPLE_RATE, layout="mono")
+        frame = av.AudioFrame.from_ndarray(np.zeros((1, SAMPLE_RATE // 2), dtype=np.int16), format="s16", layout="mono")
+        frame.sample_rate = SAMPLE_RATE
+        for packet in [*stream.encode(frame), *stream.encode(None)]:
+            container.mux(packet)
+    murf_stub["wav"] = out.getvalue()
+
+    tts = murf_tts.TTS(base_url=murf_stub["base_url"], audio_format="mp3")
+    try:
+        frames = await _synthesize(tts, "Hello there")
+    finally:
+        await tts.aclose()
+
+    assert murf_stub["requests"][0]["format"] == "MP3"
+    # MP3 adds encoder padding, so only check the duration roughly
+    total = sum(audio.frame.samples_per_channel for audio in frames)
+    assert SAMPLE_RATE // 2 <= total < SAMPLE_RATE
+    assert {audio.frame.samples_per_channel for audio in frames[:-1]} == {SAMPLE_RATE // 50}
+
+
+def test_rejects_unknown_audio_format(api_key) -> None:
+    with pytest.raises(ValueError):
+        murf_tts.TTS(audio_format="AIFF")
+
+
+def test_voice_and_style_are_checked_against_the_catalog(api_key) -> None:
+    catalog = VoiceCatalog([Voice("en-US-ryan", "Ryan", "Male", "en-US", styles=("Conversational",))])
+    murf_tts.TTS(voice="en-US-ryan", style="Conversational", voice_catalog=catalog)
+    with pytest.raises(ValueError, match="did you mean en-US-ryan"):
+        murf_tts.TTS(voice="en-US-rayn", voice_catalog=catalog)
+    with pytest.raises(ValueError, match="no style"):
+        murf_tts.TTS(voice="en-US-ryan", style="Whisper", voice_catalog=catalog)
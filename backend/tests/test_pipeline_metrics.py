@@ -0,0 +1,97 @@
+import threading
+import time
+import urllib.request
+
+import pytest
+from livekit.agents import metrics
+from prometheus_client import CollectorRegistry, Histogram, generate_latest
+
+import pipeline_metrics
+from pipeline_metrics import TurnLatency
+
+
+def _histogram(registry: CollectorRegistry, name: str, labels: tuple[str, ...] = ()) -> Histogram:
+    return Histogram(name, "Test latency", labels, buckets=(0.1, 1.0), registry=registry)
+
+
+def test_histogram_renders_cumulative_buckets() -> None:
+    registry = CollectorRegistry()
+    histogram = _histogram(registry, "test_seconds", ("tool",))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.labels("search_faq").observe(value)
+
+    lines = generate_latest(registry).decode().splitlines()
+    assert "# TYPE test_seconds histogram" in lines
+    assert 'test_seconds_bucket{le="0.1",tool="search_faq"} 2.0' in lines
+    assert 'test_seconds_bucket{le="1.0",tool="search_faq"} 3.0' in lines
+    assert 'test_seconds_bucket{le="+Inf",tool="search_faq"} 4.0' in lines
+    assert 'test_seconds_count{tool="search_faq"} 4.0' in lines
+    assert 'test_seconds_sum{tool="search_faq"} 2.65' in lines
+
+
+def test_threads_record_concurrently() -> None:
+    registry = CollectorRegistry()
+    histogram = _histogram(registry, "threads_seconds")
+
+    def _record() -> None:
+        for _ in range(10_000):
+            histogram.observe(0.5)
+
+    threads = [threading.Thread(target=_record) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert registry.get_sample_value("threads_seconds_count") == 40_000
+    assert registry.get_sample_value("threads_seconds_sum") == pytest.approx(20_000)
+
+
+def test_turn_latency_joins_parts_in_any_order() -> None:
+    registry = CollectorRegistry()
+    turns = TurnLatency(_histogram(registry, "turn_seconds"), max_pending=2)
+    turns.add("a", "tts", 0.3)
+    turns.add("a", "eou", 0.2)
+    turns.add("b", "eou", 0.1)
+    turns.add("a", "llm", 0.4)
+    assert registry.get_sample_value("turn_seconds_count") == 1
+    assert registry.get_sample_value("turn_seconds_sum") == pytest.approx(0.9)
+
+    # Turns that never complete are dropped instead of accumulating
+    for speech_id in "cdef":
+        turns.add(speech_id, "eou", 0.1)
+    assert len(turns._pending) == 2
+
+
+def test_record_maps_session_metrics() -> None:
+    before = pipeline_metrics.REGISTRY.get_sample_value("sdr_eou_delay_seconds_sum")
+    pipeline_metrics.record(
+        metrics.EOUMetrics(
+            timestamp=time.time(),
+            end_of_utterance_delay=0.25,
+            transcription_delay=0.1,
+            on_user_turn_completed_delay=0.0,
+            speech_id="s1",
+        )
+    )
+    assert pipeline_metrics.REGISTRY.get_sample_value("sdr_eou_delay_seconds_sum") == pytest.approx(before + 0.25)
+
+
+async def test_timed_tool_and_http_endpoint() -> None:
+    @pipeline_metrics.timed_tool("test_tool")
+    async def tool() -> str:
+        return "ok"
+
+    assert await tool() == "ok"
+    server = pipeline_metrics.start_http_server(0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url) as response:
+            assert response.headers["Content-Type"].startswith("text/plain")
+            body = response.read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert 'sdr_tool_duration_seconds_count{tool="test_tool"} 1.0' in body
+    assert "# TYPE sdr_turn_latency_seconds histogram" in body
@@ -0,0 +1,73 @@
+from resilience import CircuitBreaker, LatencyTracker, RetryBudget, backoff_delay
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_latency_percentile_needs_min_samples() -> None:
+    tracker = LatencyTracker(window=100, min_samples=5)
+    for value in (0.1, 0.2, 0.3, 0.4):
+        tracker.record(value)
+    assert tracker.percentile(95) is None
+    for i in range(100):
+        tracker.record(i / 100)
+    assert len(tracker) == 100
+    assert tracker.percentile(95) == 0.94
+
+
+def test_retry_budget_refills_with_traffic() -> None:
+    budget = RetryBudget(ratio=0.5, min_tokens=1, max_tokens=2)
+    assert budget.withdraw()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert budget.withdraw()
+    for _ in range(10):
+        budget.deposit()
+    assert budget.tokens == 2
+
+
+def test_circuit_breaker_opens_and_probes() -> None:
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    clock.now = 10
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    # Only one probe at a time
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    clock.now = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_abandoned_probe_is_retried_after_timeout() -> None:
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=5, clock=clock)
+    breaker.record_failure()
+    clock.now = 5
+    assert breaker.allow()
+    clock.now = 10
+    assert breaker.allow()
+
+
+def test_backoff_is_jittered_and_capped() -> None:
+    delays = [backoff_delay(attempt, base=0.1, cap=0.3) for attempt in range(1, 6) for _ in range(20)]
+    assert all(0 <= delay <= 0.3 for delay in delays)
+    assert len(set(delays)) > 1
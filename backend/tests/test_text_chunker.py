@@ -0,0 +1,75 @@
+import pytest
+
+from text_chunker import AdaptiveChunker, split_long
+
+REPLY = (
+    "Hi there! Razorpay helps businesses accept, process and disburse payments with its product suite, "
+    "which includes payment gateway, payment links, subscriptions and more. It is used by startups. "
+    "It is also used by enterprises. We support UPI, cards, netbanking and wallets."
+)
+
+
+async def _stream(chunker: AdaptiveChunker, pieces: list[str]) -> list[str]:
+    stream = chunker.stream()
+    for piece in pieces:
+        stream.push_text(piece)
+    stream.end_input()
+    return [data.token async for data in stream]
+
+
+def test_first_chunk_short_then_merged() -> None:
+    chunks = AdaptiveChunker(first_chunk_chars=60, target_chunk_chars=150, max_chunk_chars=300).tokenize(REPLY)
+    assert chunks[0] == "Hi there!"
+    # Short trailing sentences are merged instead of becoming one request each
+    assert chunks[-1].startswith("It is used by startups. It is also used by enterprises.")
+    assert len(chunks) == 3
+    assert " ".join(chunks) == REPLY
+
+
+def test_long_first_sentence_split_at_clause() -> None:
+    chunks = AdaptiveChunker(first_chunk_chars=40).tokenize(
+        "Our payment gateway supports cards, UPI and wallets, and settles funds the next day."
+    )
+    assert chunks[0] == "Our payment gateway supports cards,"
+    assert all(len(chunk) <= 300 for chunk in chunks)
+
+
+def test_split_long_respects_limit() -> None:
+    text = "word " * 100
+    pieces = split_long(text, 50)
+    assert all(len(piece) <= 50 for piece in pieces)
+    assert " ".join(pieces) == text.strip()
+    assert split_long("a" * 80, 50) == ["a" * 80]
+
+
+async def test_stream_matches_tokenize_for_word_by_word_input() -> None:
+    chunker = AdaptiveChunker()
+    words = [f"{word} " for word in REPLY.split(" ")]
+    assert await _stream(chunker, words) == chunker.tokenize(REPLY)
+
+
+async def test_first_chunk_emitted_before_sentence_ends() -> None:
+    stream = AdaptiveChunker(first_chunk_chars=30).stream()
+    stream.push_text("Thanks for asking, our onboarding team usually")
+    stream.push_text(" gets you live within a week")
+    # The opening clause is available before the sentence (or input) ends
+    data = await stream.__anext__()
+    assert data.token == "Thanks for asking,"
+    stream.end_input()
+    assert [data.token async for data in stream] == ["our onboarding team usually gets you live within a week"]
+
+
+async def test_flush_starts_new_segment_with_short_first_chunk() -> None:
+    stream = AdaptiveChunker(first_chunk_chars=20, target_chunk_chars=100).stream()
+    stream.push_text("Hello. How are you today?")
+    stream.flush()
+    stream.push_text("Great. Let me check that for you now.")
+    stream.end_input()
+    tokens = [data async for data in stream]
+    assert [data.token for data in tokens] == ["Hello.", "How are you today?", "Great.", "Let me check that for you now."]
+    assert tokens[0].segment_id != tokens[2].segment_id
+
+
+def test_rejects_inconsistent_sizes() -> None:
+    with pytest.raises(ValueError):
+        AdaptiveChunker(first_chunk_chars=400, max_chunk_chars=300)
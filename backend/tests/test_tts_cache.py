@@ -0,0 +1,63 @@
+import os
+
+from tts_cache import AudioCache, CacheablePhrases
+
+
+async def test_lru_evicts_to_byte_budget() -> None:
+    cache = AudioCache(None, max_memory_bytes=10)
+    await cache.put("a", b"1234")
+    await cache.put("b", b"5678")
+    assert await cache.get("a") == b"1234"  # a is now most recent
+    await cache.put("c", b"9012")
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == b"1234"
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["memory_bytes"] == 8
+    assert (stats["hits_memory"], stats["misses"]) == (2, 1)
+
+
+async def test_disk_tier_backs_memory(tmp_path) -> None:
+    key = AudioCache.make_key("en-US-ryan", "Conversational", 24000, "Hello")
+    await AudioCache(tmp_path).put(key, b"pcm")
+
+    cache = AudioCache(tmp_path)
+    assert cache.contains(key)
+    assert await cache.get(key) == b"pcm"
+    assert await cache.get(key) == b"pcm"
+    assert (cache.hits_disk, cache.hits_memory) == (1, 1)
+
+
+def test_key_depends_on_voice_and_normalized_text() -> None:
+    key = AudioCache.make_key("en-US-ryan", "Conversational", 24000, "Hello  there ")
+    assert key == AudioCache.make_key("en-US-ryan", "Conversational", 24000, "Hello there")
+    assert key != AudioCache.make_key("en-US-natalie", "Conversational", 24000, "Hello there")
+    assert key != AudioCache.make_key("en-US-ryan", "Conversational", 16000, "Hello there")
+
+
+async def test_disk_tier_evicts_least_recently_used_files(tmp_path) -> None:
+    cache = AudioCache(tmp_path, max_memory_bytes=0, max_disk_bytes=10)
+    await cache.put("aa1", b"1234")
+    await cache.put("bb2", b"5678")
+    os.utime(tmp_path / "aa" / "aa1.pcm", (1, 1))
+    os.utime(tmp_path / "bb" / "bb2.pcm", (2, 2))
+
+    # A new process picks up what is on disk and its recency
+    cache = AudioCache(tmp_path, max_memory_bytes=0, max_disk_bytes=10)
+    assert await cache.get("aa1") == b"1234"  # aa1 is now most recent
+    await cache.put("cc3", b"9012")
+
+    assert not (tmp_path / "bb" / "bb2.pcm").exists()
+    assert await cache.get("aa1") == b"1234"
+    assert cache.stats()["disk_evictions"] == 1
+    assert cache.stats()["disk_bytes"] == 8
+
+
+def test_only_sentences_of_known_phrases_are_cacheable() -> None:
+    cacheable = CacheablePhrases(["Got it, I've noted that down.", "We offer UPI. Cards are supported too."])
+    assert cacheable("Cards are  supported too.")
+    assert cacheable("Got it, I've noted that down.")
+    assert not cacheable("Thanks Priya from Acme, talk soon.")
+    assert not cacheable("down. We offer")  # spans two phrases
+    assert not cacheable("   ")
@@ -0,0 +1,108 @@
+import json
+import time
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from voice_catalog import VoiceCatalog, get_catalog, load_catalog, save_catalog
+
+API_VOICES = {
+    "voices": [
+        {
+            "voiceId": "en-US-ryan",
+            "displayName": "Ryan",
+            "gender": "Male",
+            "locale": "en-US",
+            "availableStyles": ["Conversational", "Narration"],
+            "supportedLocales": {"en-US": {"detail": "English (US)", "availableStyles": ["Promo"]}},
+        },
+        {"voiceId": "en-US-natalie", "displayName": "Natalie", "gender": "Female", "locale": "en-US",
+         "availableStyles": ["Conversational"]},
+        {"voiceId": "en-UK-ruby", "displayName": "Ruby", "gender": "Female", "locale": "en-UK",
+         "availableStyles": ["Narration"]},
+        {"voiceId": "de-DE-matthias", "name": "Matthias", "gender": "Male", "language": "de-DE"},
+    ]
+}
+
+
+def _ids(voices) -> list[str]:
+    return [voice.voice_id for voice in voices]
+
+
+def test_indexes_by_language_gender_and_style() -> None:
+    catalog = VoiceCatalog.from_api(API_VOICES)
+    assert len(catalog) == 4
+    assert _ids(catalog.find(language="en")) == ["en-UK-ruby", "en-US-natalie", "en-US-ryan"]
+    assert _ids(catalog.find(language="EN-us", gender="female")) == ["en-US-natalie"]
+    assert _ids(catalog.find(style="narration")) == ["en-UK-ruby", "en-US-ryan"]
+    assert _ids(catalog.find(style="Promo", name="ry")) == ["en-US-ryan"]
+    assert catalog.find(language="fr") == []
+    # The older response shape (a bare list with name/language) is understood too
+    assert VoiceCatalog.from_api(API_VOICES["voices"]).get("DE-de-Matthias").name == "Matthias"
+
+
+def test_validate_suggests_close_matches() -> None:
+    catalog = VoiceCatalog.from_api(API_VOICES)
+    assert catalog.validate("en-US-ryan", "conversational").name == "Ryan"
+    with pytest.raises(ValueError, match="did you mean en-US-ryan"):
+        catalog.validate("en-US-rayn")
+    with pytest.raises(ValueError, match="no style 'Angry'"):
+        catalog.validate("en-US-natalie", "Angry")
+    # Voices listed without styles accept any style
+    catalog.validate("de-DE-matthias", "Angry")
+
+
+def test_cache_round_trips_and_is_parsed_once(tmp_path) -> None:
+    path = tmp_path / "voices.json"
+    assert load_catalog(path) is None
+    catalog = VoiceCatalog.from_api(API_VOICES)
+    save_catalog(catalog, path)
+    loaded = load_catalog(path)
+    assert _ids(loaded) == _ids(catalog) and loaded.fetched_at == catalog.fetched_at
+    assert load_catalog(path) is loaded
+
+    path.write_text(json.dumps({"version": 0, "voices": []}))
+    assert load_catalog(path) is None
+
+
+@pytest.fixture
+async def voices_api():
+    state = {"requests": 0, "status": 200}
+
+    async def voices(request: web.Request) -> web.Response:
+        state["requests"] += 1
+        assert request.headers["api-key"] == "test-key"
+        return web.json_response(API_VOICES, status=state["status"])
+
+    app = web.Application()
+    app.router.add_get("/v1/speech/voices", voices)
+    server = TestServer(app)
+    await server.start_server()
+    state["base_url"] = str(server.make_url("/v1"))
+    yield state
+    await server.close()
+
+
+async def test_catalog_is_refetched_after_ttl(voices_api, tmp_path) -> None:
+    path = tmp_path / "voices.json"
+    fetch = {"api_key": "test-key", "path": path, "base_url": voices_api["base_url"]}
+    catalog = await get_catalog(**fetch)
+    assert len(catalog) == 4 and voices_api["requests"] == 1
+    await get_catalog(**fetch)
+    assert voices_api["requests"] == 1
+
+    save_catalog(VoiceCatalog(list(catalog)[:1], fetched_at=time.time() - 3600), path)
+    assert len(await get_catalog(**fetch, ttl=7200)) == 1
+    assert len(await get_catalog(**fetch, ttl=60)) == 4
+    assert voices_api["requests"] == 2
+
+
+async def test_stale_cache_is_kept_when_refresh_fails(voices_api, tmp_path) -> None:
+    path = tmp_path / "voices.json"
+    save_catalog(VoiceCatalog([], fetched_at=0), path)
+    voices_api["status"] = 503
+    catalog = await get_catalog("test-key", path=path, base_url=voices_api["base_url"])
+    assert catalog is not None and len(catalog) == 0
+    assert await get_catalog(path=tmp_path / "missing.json", api_key="test-key",
+                             base_url=voices_api["base_url"]) is None
@@ -0,0 +1,87 @@
+import struct
+
+import numpy as np
+import pytest
+
+from wav_format import (
+    WAVE_FORMAT_IEEE_FLOAT,
+    WAVE_FORMAT_PCM,
+    PCMConverter,
+    WavFormat,
+    WavStreamParser,
+)
+
+
+def _chunk(chunk_id: bytes, body: bytes) -> bytes:
+    return chunk_id + struct.pack("<I", len(body)) + body + b"\0" * (len(body) & 1)
+
+
+def _wav(pcm: bytes, sample_rate: int = 24000, num_channels: int = 1, bits: int = 16, encoding: int = WAVE_FORMAT_PCM, extra: bytes = b"") -> bytes:
+    block_align = num_channels * bits // 8
+    fmt = struct.pack("<HHIIHH", encoding, num_channels, sample_rate, sample_rate * block_align, block_align, bits)
+    body = b"WAVE" + _chunk(b"fmt ", fmt) + extra + _chunk(b"data", pcm)
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+def _parse(data: bytes, chunk_size: int) -> tuple[WavStreamParser, bytes]:
+    parser = WavStreamParser()
+    payload = b"".join(bytes(parser.push(data[i : i + chunk_size])) for i in range(0, len(data), chunk_size))
+    return parser, payload
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 44, 4096])
+def test_skips_extra_chunks_at_any_chunk_size(chunk_size) -> None:
+    pcm = bytes(range(256)) * 4
+    extra = _chunk(b"LIST", b"INFOISFT\x05\x00\x00\x00Murf\x00") + _chunk(b"fact", struct.pack("<I", 512))
+    parser, payload = _parse(_wav(pcm, extra=extra) + _chunk(b"id3 ", b"tag"), chunk_size)
+    assert payload == pcm
+    assert parser.format == WavFormat(WAVE_FORMAT_PCM, 1, 24000, 16)
+
+
+def test_payload_is_a_view_of_the_input() -> None:
+    parser = WavStreamParser()
+    assert len(parser.push(_wav(b"\0" * 8)[:-8])) == 0
+    chunk = bytearray(b"\x01\x02\x03\x04\x05\x06\x07\x08")
+    payload = parser.push(chunk)
+    chunk[0] = 9
+    assert payload[0] == 9
+
+
+def test_non_riff_input_is_raw_pcm() -> None:
+    parser, payload = _parse(b"\x01\x00\x02\x00\x03\x00", 2)
+    assert parser.raw
+    assert payload == b"\x01\x00\x02\x00\x03\x00"
+
+
+def test_rejects_unsupported_formats() -> None:
+    with pytest.raises(ValueError):
+        WavStreamParser().push(_wav(b"\0" * 4, encoding=0x0055))
+    with pytest.raises(ValueError):
+        WavStreamParser().push(b"RIFF\0\0\0\0AVI ")
+
+
+def test_matching_format_passes_through() -> None:
+    converter = PCMConverter(WavFormat(WAVE_FORMAT_PCM, 1, 24000, 16), 24000)
+    data = memoryview(b"\x01\x00\x02\x00")
+    assert converter.passthrough
+    assert converter.convert(data) is data
+
+
+def test_downmixes_and_resamples_across_chunks() -> None:
+    # One second of 48 kHz stereo, 24-bit, with the same ramp on both channels
+    ramp = np.linspace(-0.5, 0.5, 48000)
+    ints = (np.repeat(ramp, 2) * (1 << 23)).astype("<i4")
+    pcm = b"".join(int(value).to_bytes(3, "little", signed=True) for value in ints)
+    converter = PCMConverter(WavFormat(WAVE_FORMAT_PCM, 2, 48000, 24), 24000)
+    out = b"".join(bytes(converter.convert(memoryview(pcm[i : i + 1001]))) for i in range(0, len(pcm), 1001))
+
+    samples = np.frombuffer(out, dtype="<i2") / 32768
+    assert abs(len(samples) - 24000) <= 1
+    expected = np.interp(np.arange(len(samples)) * 2, np.arange(48000), ramp)
+    assert np.abs(samples - expected).max() < 1e-3
+
+
+def test_float_input_is_converted() -> None:
+    converter = PCMConverter(WavFormat(WAVE_FORMAT_IEEE_FLOAT, 1, 24000, 32), 24000)
+    out = converter.convert(memoryview(np.array([0.0, 0.5, -1.0], dtype="<f4").tobytes()))
+    assert np.frombuffer(out, dtype="<i2").tolist() == [0, 16384, -32768]